@@ -0,0 +1,32 @@
+"""add properties gin index
+
+Revision ID: 5909bd10f2e6
+Revises: 131aab4d9e49
+Create Date: 2021-02-08 10:12:41.903612
+
+"""  # noqa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5909bd10f2e6"
+down_revision = "131aab4d9e49"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """upgrade to this revision"""
+    # `jsonb_path_ops` only supports containment (`@>`) but is much smaller and faster than the default `jsonb_ops`
+    op.create_index(
+        "ix_items_properties",
+        "items",
+        ["properties"],
+        schema="data",
+        postgresql_using="gin",
+        postgresql_ops={"properties": "jsonb_path_ops"},
+    )
+
+
+def downgrade():
+    """downgrade to previous revision"""
+    op.drop_index("ix_items_properties", table_name="items", schema="data")
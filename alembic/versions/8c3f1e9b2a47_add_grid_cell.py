@@ -0,0 +1,36 @@
+"""add grid cell
+
+Revision ID: 8c3f1e9b2a47
+Revises: d4e2a7c3b1f0
+Create Date: 2021-02-15 11:03:52.418250
+
+"""  # noqa
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8c3f1e9b2a47"
+down_revision = "d4e2a7c3b1f0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """upgrade to this revision"""
+    op.add_column("items", sa.Column("grid_cell", sa.VARCHAR(12)), schema="data")
+    # `ST_GeoHash` matches `stac_api.models.geohash.encode`
+    op.execute(
+        "UPDATE data.items SET grid_cell = ST_GeoHash(ST_Centroid(geometry), 12) "
+        "WHERE NOT ST_IsEmpty(geometry)"
+    )
+    # Prefix matches (prefilter) and prefix grouping (aggregations), independent of the database collation
+    op.execute(
+        "CREATE INDEX ix_items_grid_cell ON data.items (grid_cell text_pattern_ops)"
+    )
+
+
+def downgrade():
+    """downgrade to previous revision"""
+    op.drop_index("ix_items_grid_cell", table_name="items", schema="data")
+    op.drop_column("items", "grid_cell", schema="data")
@@ -0,0 +1,25 @@
+"""add datetime id index
+
+Revision ID: a3c5e8f0b9d2
+Revises: f1b7d3a9c2e5
+Create Date: 2021-02-24 10:26:48.331702
+
+"""  # noqa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a3c5e8f0b9d2"
+down_revision = "f1b7d3a9c2e5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """upgrade to this revision"""
+    # Default sort order, keyset predicates are row comparisons on `(datetime, id)`
+    op.execute("CREATE INDEX ix_items_datetime_id ON data.items (datetime, id)")
+
+
+def downgrade():
+    """downgrade to previous revision"""
+    op.drop_index("ix_items_datetime_id", table_name="items", schema="data")
@@ -0,0 +1,96 @@
+"""add collection extents
+
+Revision ID: b6d1f4e8a2c7
+Revises: a3c5e8f0b9d2
+Create Date: 2021-02-26 16:41:08.215930
+
+Maintains the spatial and temporal extent of each collection, and the range (`min`/`max`) summaries of
+`ApiSettings.summary_queryables`, from statement-level triggers on `data.items`.  Triggers fire once per statement with
+the changed rows in transition tables, and only queue aggregates in `data.collection_extent_deltas`:
+    - inserted rows queue the aggregates of their collections.
+    - deleted rows only queue a recomputation (a scan of the items of the collection) when they lie on a bound.
+    - updates are a delete followed by an insert.
+The queue is merged into `data.collection_extents` and published to the `extent` and `summaries` of the collection
+rows by `data.merge_collection_extents()`, run periodically by the API (see
+`stac_api.clients.postgres.extents.CollectionExtentsClient`), so writers never update the collection rows.  Summaries
+which aren't maintained are kept as posted, collections left without items keep their last extent.  Existing
+collections are backfilled by the upgrade (a full scan of `data.items`), `SELECT data.refresh_collection_extent(<id>)`
+recomputes a collection.  The functions and summary columns are generated by
+`stac_api.clients.postgres.extents.install`, with the default summary queryables.
+"""  # noqa
+from alembic import op
+from stac_api.clients.postgres.extents import install
+
+# revision identifiers, used by Alembic.
+revision = "b6d1f4e8a2c7"
+down_revision = "a3c5e8f0b9d2"
+branch_labels = None
+depends_on = None
+
+# Default of `ApiSettings.summary_queryables`
+SUMMARY_QUERYABLES = ["gsd", "eo:cloud_cover"]
+
+AGGREGATES = (
+    "xmin FLOAT, ymin FLOAT, xmax FLOAT, ymax FLOAT, "
+    "start_datetime TIMESTAMP, end_datetime TIMESTAMP"
+)
+
+
+def upgrade():
+    """upgrade to this revision"""
+    op.execute("CREATE TABLE data.summary_queryables (field VARCHAR(1024) PRIMARY KEY)")
+    op.execute(
+        "CREATE TABLE data.collection_extents ("
+        "collection_id VARCHAR(1024) PRIMARY KEY REFERENCES data.collections (id) ON DELETE CASCADE, "
+        f"{AGGREGATES})"
+    )
+    # Insert-only queue, merged (and emptied) by `data.merge_collection_extents()`
+    op.execute(
+        "CREATE TABLE data.collection_extent_deltas ("
+        "collection_id VARCHAR(1024) NOT NULL REFERENCES data.collections (id) ON DELETE CASCADE, "
+        f"recompute BOOLEAN NOT NULL DEFAULT false, {AGGREGATES})"
+    )
+
+    # Functions, summary columns and backfill
+    install(op.get_bind(), SUMMARY_QUERYABLES)
+
+    # Transition tables require one trigger per event, updates shrink before widening
+    op.execute(
+        "CREATE TRIGGER items_extent_insert AFTER INSERT ON data.items "
+        "REFERENCING NEW TABLE AS new_items "
+        "FOR EACH STATEMENT EXECUTE FUNCTION data.widen_collection_extents()"
+    )
+    op.execute(
+        "CREATE TRIGGER items_extent_delete AFTER DELETE ON data.items "
+        "REFERENCING OLD TABLE AS old_items "
+        "FOR EACH STATEMENT EXECUTE FUNCTION data.shrink_collection_extents()"
+    )
+    op.execute(
+        "CREATE TRIGGER items_extent_update_1 AFTER UPDATE ON data.items "
+        "REFERENCING OLD TABLE AS old_items "
+        "FOR EACH STATEMENT EXECUTE FUNCTION data.shrink_collection_extents()"
+    )
+    op.execute(
+        "CREATE TRIGGER items_extent_update_2 AFTER UPDATE ON data.items "
+        "REFERENCING NEW TABLE AS new_items "
+        "FOR EACH STATEMENT EXECUTE FUNCTION data.widen_collection_extents()"
+    )
+
+
+def downgrade():
+    """downgrade to previous revision"""
+    for trigger in [
+        "items_extent_insert",
+        "items_extent_delete",
+        "items_extent_update_1",
+        "items_extent_update_2",
+    ]:
+        op.execute(f"DROP TRIGGER {trigger} ON data.items")
+    op.execute("DROP FUNCTION data.merge_collection_extents()")
+    op.execute("DROP FUNCTION data.shrink_collection_extents()")
+    op.execute("DROP FUNCTION data.widen_collection_extents()")
+    op.execute("DROP FUNCTION data.refresh_collection_extent(VARCHAR)")
+    op.execute("DROP FUNCTION data.publish_collection_extents(VARCHAR[])")
+    op.execute("DROP TABLE data.collection_extent_deltas")
+    op.execute("DROP TABLE data.collection_extents")
+    op.execute("DROP TABLE data.summary_queryables")
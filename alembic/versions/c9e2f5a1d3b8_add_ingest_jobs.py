@@ -0,0 +1,55 @@
+"""add ingest jobs
+
+Revision ID: c9e2f5a1d3b8
+Revises: b6d1f4e8a2c7
+Create Date: 2021-03-01 09:12:44.602157
+
+Background bulk ingests (see `stac_api.clients.postgres.jobs`): the status and counts of each job are kept in
+`data.ingest_jobs`, the items of a job are staged in `data.ingest_job_items` until they are written.
+"""  # noqa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c9e2f5a1d3b8"
+down_revision = "b6d1f4e8a2c7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """upgrade to this revision"""
+    op.execute(
+        "CREATE TABLE data.ingest_jobs ("
+        "id VARCHAR(36) PRIMARY KEY, "
+        "collection_id VARCHAR(1024) NOT NULL, "
+        "status VARCHAR(20) NOT NULL, "
+        "created TIMESTAMP NOT NULL DEFAULT now(), "
+        "started TIMESTAMP, "
+        "finished TIMESTAMP, "
+        "total INTEGER NOT NULL DEFAULT 0, "
+        "processed INTEGER NOT NULL DEFAULT 0, "
+        "inserted INTEGER NOT NULL DEFAULT 0, "
+        "updated INTEGER NOT NULL DEFAULT 0, "
+        "unchanged INTEGER NOT NULL DEFAULT 0, "
+        "rejected INTEGER NOT NULL DEFAULT 0, "
+        "errors JSONB NOT NULL DEFAULT '[]', "
+        "error TEXT)"
+    )
+    # Jobs left unfinished are resumed (or failed if their body wasn't staged) on startup
+    op.execute(
+        "CREATE INDEX ix_ingest_jobs_unfinished ON data.ingest_jobs (created) "
+        "WHERE status IN ('staging', 'queued', 'running')"
+    )
+    op.execute(
+        "CREATE TABLE data.ingest_job_items ("
+        "job_id VARCHAR(36) NOT NULL REFERENCES data.ingest_jobs (id) ON DELETE CASCADE, "
+        "line INTEGER NOT NULL, "
+        "item JSONB NOT NULL, "
+        "PRIMARY KEY (job_id, line))"
+    )
+
+
+def downgrade():
+    """downgrade to previous revision"""
+    op.execute("DROP TABLE data.ingest_job_items")
+    op.execute("DROP TABLE data.ingest_jobs")
@@ -0,0 +1,88 @@
+"""add item ids
+
+Revision ID: d2f8b4c6e1a9
+Revises: c9e2f5a1d3b8
+Create Date: 2021-03-02 11:05:37.184920
+
+The primary key of a partitioned `data.items` includes the partition key (see the `partition items` migration), so it
+no longer keeps item ids unique, which reads and deletes by id rely on.  Ids of partitioned tables are registered in
+`data.item_ids`, whose primary key rejects an id which is already used by another collection (or datetime).  The
+registry is maintained by statement-level triggers, so bulk writes pay for one statement per write.  Partitions which
+are dropped bypass the triggers, their ids are unregistered by the application (see
+`PartitionManager.drop_collection_partition`).  Unpartitioned tables are left as is.
+"""  # noqa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d2f8b4c6e1a9"
+down_revision = "c9e2f5a1d3b8"
+branch_labels = None
+depends_on = None
+
+
+def _is_partitioned() -> bool:
+    conn = op.get_bind()
+    return bool(
+        conn.execute(
+            "SELECT count(*) FROM pg_partitioned_table WHERE partrelid = 'data.items'::regclass"
+        ).scalar()
+    )
+
+
+def upgrade():
+    """upgrade to this revision"""
+    if not _is_partitioned():
+        return
+    conn = op.get_bind()
+    duplicates = conn.execute(
+        "SELECT id FROM data.items GROUP BY id HAVING count(*) > 1 LIMIT 10"
+    ).fetchall()
+    if duplicates:
+        raise ValueError(
+            f"Item ids must be unique, duplicated ids: {[row.id for row in duplicates]}"
+        )
+
+    op.execute("CREATE TABLE data.item_ids (id VARCHAR(1024) PRIMARY KEY)")
+    op.execute(
+        """
+        CREATE FUNCTION data.register_item_ids() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO data.item_ids SELECT id FROM new_items;
+            ELSIF TG_OP = 'DELETE' THEN
+                DELETE FROM data.item_ids WHERE id IN (SELECT id FROM old_items);
+            ELSE
+                DELETE FROM data.item_ids WHERE id IN (SELECT id FROM old_items EXCEPT SELECT id FROM new_items);
+                INSERT INTO data.item_ids SELECT id FROM new_items EXCEPT SELECT id FROM old_items;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER items_ids_insert AFTER INSERT ON data.items "
+        "REFERENCING NEW TABLE AS new_items "
+        "FOR EACH STATEMENT EXECUTE FUNCTION data.register_item_ids()"
+    )
+    op.execute(
+        "CREATE TRIGGER items_ids_delete AFTER DELETE ON data.items "
+        "REFERENCING OLD TABLE AS old_items "
+        "FOR EACH STATEMENT EXECUTE FUNCTION data.register_item_ids()"
+    )
+    op.execute(
+        "CREATE TRIGGER items_ids_update AFTER UPDATE ON data.items "
+        "REFERENCING OLD TABLE AS old_items NEW TABLE AS new_items "
+        "FOR EACH STATEMENT EXECUTE FUNCTION data.register_item_ids()"
+    )
+    op.execute("INSERT INTO data.item_ids SELECT id FROM data.items")
+
+
+def downgrade():
+    """downgrade to previous revision"""
+    if not _is_partitioned():
+        return
+    for trigger in ["items_ids_insert", "items_ids_delete", "items_ids_update"]:
+        op.execute(f"DROP TRIGGER {trigger} ON data.items")
+    op.execute("DROP FUNCTION data.register_item_ids()")
+    op.execute("DROP TABLE data.item_ids")
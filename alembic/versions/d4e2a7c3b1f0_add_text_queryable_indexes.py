@@ -0,0 +1,43 @@
+"""add text queryable indexes
+
+Revision ID: d4e2a7c3b1f0
+Revises: 5909bd10f2e6
+Create Date: 2021-02-10 16:41:07.220184
+
+"""  # noqa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d4e2a7c3b1f0"
+down_revision = "5909bd10f2e6"
+branch_labels = None
+depends_on = None
+
+# Must match `ApiSettings.text_queryables`
+TEXT_QUERYABLES = ["aidash:feeder_id", "aidash:segment_id"]
+
+
+def upgrade():
+    """upgrade to this revision"""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for field in TEXT_QUERYABLES:
+        name = field.split(":")[-1]
+        # Prefix matches (startsWith), independent of the database collation
+        op.execute(
+            f"CREATE INDEX ix_items_{name}_pattern "
+            f"ON data.items ((properties ->> '{field}') text_pattern_ops)"
+        )
+        # Infix and suffix matches (contains, endsWith)
+        op.execute(
+            f"CREATE INDEX ix_items_{name}_trgm "
+            f"ON data.items USING GIN ((properties ->> '{field}') gin_trgm_ops)"
+        )
+
+
+def downgrade():
+    """downgrade to previous revision"""
+    for field in TEXT_QUERYABLES:
+        name = field.split(":")[-1]
+        op.execute(f"DROP INDEX data.ix_items_{name}_pattern")
+        op.execute(f"DROP INDEX data.ix_items_{name}_trgm")
+    op.execute("DROP EXTENSION IF EXISTS pg_trgm")
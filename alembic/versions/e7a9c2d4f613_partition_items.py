@@ -0,0 +1,128 @@
+"""partition items
+
+Revision ID: e7a9c2d4f613
+Revises: 8c3f1e9b2a47
+Create Date: 2021-02-18 09:47:15.602311
+
+Partitions `data.items` by collection (`PARTITION_STRATEGY=collection`, list partitioning) or by month
+(`PARTITION_STRATEGY=datetime`, range partitioning).  Without `PARTITION_STRATEGY` the table is left as is.
+
+The table is rebuilt: rows are copied to a new partitioned table, which requires an outage on large catalogs.  The
+primary key must include the partition key, the global uniqueness of item ids is enforced by `data.item_ids` (see the
+`add item ids` migration).  Indexes are recreated from the definitions of the existing table, including those of promoted fields.
+New partitions are created by the application (see `stac_api.clients.postgres.partitions.PartitionManager`).
+"""  # noqa
+import os
+
+from alembic import op
+from stac_api.clients.postgres.partitions import (
+    DEFAULT_PARTITION,
+    collection_partition,
+    datetime_partition,
+    month_start,
+    next_month,
+)
+
+# revision identifiers, used by Alembic.
+revision = "e7a9c2d4f613"
+down_revision = "8c3f1e9b2a47"
+branch_labels = None
+depends_on = None
+
+PARTITION_KEYS = {"collection": "LIST (collection_id)", "datetime": "RANGE (datetime)"}
+
+
+def _indexes(table: str):
+    """Definitions of the secondary indexes of a table."""
+    conn = op.get_bind()
+    return [
+        row.indexdef
+        for row in conn.execute(
+            "SELECT indexdef FROM pg_indexes "
+            f"WHERE schemaname = 'data' AND tablename = '{table}' AND indexname != '{table}_pkey'"
+        )
+    ]
+
+
+def _rebuild(partition_by: str = None):
+    """Copy data.items to a new table (optionally partitioned) with the same columns and indexes."""
+    indexes = _indexes("items")
+    op.execute("ALTER TABLE data.items RENAME TO items_old")
+    op.execute(
+        "ALTER TABLE data.items_old RENAME CONSTRAINT items_pkey TO items_old_pkey"
+    )
+    op.execute(
+        "ALTER TABLE data.items_old "
+        "RENAME CONSTRAINT items_collection_id_fkey TO items_old_collection_id_fkey"
+    )
+    op.execute(
+        "CREATE TABLE data.items (LIKE data.items_old INCLUDING DEFAULTS)"
+        + (f" PARTITION BY {partition_by}" if partition_by else "")
+    )
+    if partition_by and partition_by.startswith("LIST"):
+        primary_key = "id, collection_id"
+    elif partition_by:
+        primary_key = "id, datetime"
+    else:
+        primary_key = "id"
+    op.execute(
+        f"ALTER TABLE data.items ADD CONSTRAINT items_pkey PRIMARY KEY ({primary_key})"
+    )
+    op.execute(
+        "ALTER TABLE data.items ADD CONSTRAINT items_collection_id_fkey "
+        "FOREIGN KEY (collection_id) REFERENCES data.collections (id)"
+    )
+    return indexes
+
+
+def _finish(indexes):
+    op.execute("INSERT INTO data.items SELECT * FROM data.items_old")
+    op.execute("DROP TABLE data.items_old")
+    # Indexes created on the partitioned table are created on every partition
+    for indexdef in indexes:
+        op.execute(indexdef)
+
+
+def upgrade():
+    """upgrade to this revision"""
+    strategy = os.environ.get("PARTITION_STRATEGY")
+    if not strategy:
+        return
+    if strategy not in PARTITION_KEYS:
+        raise ValueError(f"Unknown partition strategy: {strategy}")
+
+    indexes = _rebuild(PARTITION_KEYS[strategy])
+    conn = op.get_bind()
+    if strategy == "collection":
+        for (collection_id,) in conn.execute("SELECT id FROM data.collections"):
+            conn.execute(
+                f'CREATE TABLE data."{collection_partition(collection_id)}" '
+                "PARTITION OF data.items FOR VALUES IN (%(collection_id)s)",
+                {"collection_id": collection_id},
+            )
+    else:
+        (start, end) = conn.execute(
+            "SELECT min(datetime), max(datetime) FROM data.items_old"
+        ).first()
+        month = month_start(start) if start else None
+        while month and month <= end:
+            conn.execute(
+                f'CREATE TABLE data."{datetime_partition(month)}" '
+                "PARTITION OF data.items FOR VALUES FROM (%(start)s) TO (%(end)s)",
+                {"start": month, "end": next_month(month)},
+            )
+            month = next_month(month)
+    op.execute(f"CREATE TABLE data.{DEFAULT_PARTITION} PARTITION OF data.items DEFAULT")
+    _finish(indexes)
+
+
+def downgrade():
+    """downgrade to previous revision"""
+    conn = op.get_bind()
+    is_partitioned = conn.execute(
+        "SELECT count(*) FROM pg_partitioned_table WHERE partrelid = 'data.items'::regclass"
+    ).scalar()
+    if not is_partitioned:
+        return
+    # Index definitions of the parent table (partitions have their own copies)
+    _finish(_rebuild())
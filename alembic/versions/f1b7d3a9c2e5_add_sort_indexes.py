@@ -0,0 +1,42 @@
+"""add sort indexes
+
+Revision ID: f1b7d3a9c2e5
+Revises: e7a9c2d4f613
+Create Date: 2021-02-22 14:12:36.907154
+
+"""  # noqa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f1b7d3a9c2e5"
+down_revision = "e7a9c2d4f613"
+branch_labels = None
+depends_on = None
+
+# Must match `ApiSettings.sortable_queryables`, the expressions must match `Item.get_field`
+SORTABLE_QUERYABLES = {
+    "gsd": "FLOAT",
+    "eo:cloud_cover": "FLOAT",
+    "aidash:feeder_id": None,
+    "aidash:segment_id": "INTEGER",
+}
+
+
+def upgrade():
+    """upgrade to this revision"""
+    for (field, field_type) in SORTABLE_QUERYABLES.items():
+        name = field.split(":")[-1]
+        expression = f"(properties ->> '{field}')"
+        if field_type:
+            expression = f"CAST({expression} AS {field_type})"
+        # Ties are broken on id, so sorted pages (and their keyset predicates) are index range scans
+        op.execute(
+            f"CREATE INDEX ix_items_{name}_sort ON data.items (({expression}), id)"
+        )
+
+
+def downgrade():
+    """downgrade to previous revision"""
+    for field in SORTABLE_QUERYABLES:
+        name = field.split(":")[-1]
+        op.execute(f"DROP INDEX data.ix_items_{name}_sort")
@@ -0,0 +1,73 @@
+"""Benchmark bulk item loading with COPY against multi-row INSERT.
+
+Loads copies of an item (with random ids) into a collection with each loading method of `BulkTransactionsClient` and
+each chunk size, reporting the throughput.  Loaded items are deleted after each run, for example:
+    python scripts/benchmark_ingest.py --collection joplin --items 20000 --chunk-sizes 500 5000 20000
+"""
+
+import argparse
+import json
+import os
+import time
+import uuid
+from typing import Dict, List
+
+from stac_api.clients.postgres.session import Session
+from stac_api.clients.postgres.transactions import COPY, INSERT, BulkTransactionsClient
+from stac_api.config import PostgresSettings, inject_settings
+from stac_api.models import database, schemas
+
+DEFAULT_ITEM = os.path.join(
+    os.path.dirname(__file__), "..", "tests", "data", "test_item.json"
+)
+
+
+def make_items(template: Dict, collection: str, count: int) -> schemas.Items:
+    """Copy an item with random ids."""
+    items = []
+    for _ in range(count):
+        item = dict(template, id=f"benchmark-{uuid.uuid4()}", collection=collection)
+        items.append(item)
+    return schemas.Items(items=items)
+
+
+def benchmark_ingest():
+    """benchmark ingest"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--collection", required=True, help="existing collection")
+    parser.add_argument("--item", default=DEFAULT_ITEM, help="template item (json)")
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument(
+        "--chunk-sizes", type=int, nargs="+", default=[100, 1000, 10000]
+    )
+    parser.add_argument("--methods", nargs="+", default=[INSERT, COPY])
+    args = parser.parse_args()
+
+    settings = PostgresSettings()
+    inject_settings(settings)
+    session = Session(
+        settings.reader_connection_string, settings.writer_connection_string
+    )
+    with open(args.item) as f:
+        template = json.load(f)
+    items = make_items(template, args.collection, args.items)
+    ids: List[str] = [item.id for item in items.items]
+
+    for method in args.methods:
+        client = BulkTransactionsClient(session=session, method=method)
+        for chunk_size in args.chunk_sizes:
+            start = time.perf_counter()
+            client.bulk_item_insert(items, chunk_size=chunk_size)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{method:>6}, chunks of {chunk_size:>6}: "
+                f"{len(ids) / elapsed:10.1f} rows/s ({elapsed:.2f}s)"
+            )
+            with session.writer.context_session() as db:
+                db.query(database.Item).filter(database.Item.id.in_(ids)).delete(
+                    synchronize_session=False
+                )
+
+
+if __name__ == "__main__":
+    benchmark_ingest()
@@ -0,0 +1,113 @@
+"""Benchmark keyset pagination against sqlakeyset.
+
+Walks the pages of the default search order (or a sort field) with the in-project keyset engine
+(`stac_api.clients.postgres.keyset`) and with sqlakeyset, reporting the time per page and the bookmark size.
+Requires the benchmark extra (`pip install .[benchmark]`), for example:
+    python scripts/benchmark_pagination.py --collection joplin --pages 50 --limit 100
+"""
+
+import argparse
+import statistics
+import time
+from typing import Callable, List, Optional, Tuple
+
+from stac_api.clients.postgres.core import CoreCrudClient
+from stac_api.clients.postgres.keyset import Bookmark, get_page
+from stac_api.clients.postgres.session import Session
+from stac_api.config import PostgresSettings
+from stac_api.models import schemas
+
+
+def walk(read_page: Callable, pages: int) -> Tuple[List[float], List[int]]:
+    """Time reading consecutive pages, stops at the last page.
+
+    Returns:
+        The time taken by each page and the size of its bookmark.
+    """
+    timings = []
+    sizes = []
+    bookmark = None
+    for _ in range(pages):
+        start = time.perf_counter()
+        (bookmark, size) = read_page(bookmark)
+        timings.append(time.perf_counter() - start)
+        sizes.append(size)
+        if bookmark is None:
+            break
+    return timings, sizes
+
+
+def materialize(items) -> None:
+    """Serialize the items of a page as the API does."""
+    for item in items:
+        item.base_url = "http://localhost/"
+        schemas.Item.from_orm(item)
+
+
+def report(name: str, timings: List[float], sizes: List[int]) -> None:
+    """Print page timings."""
+    timings_ms = sorted(t * 1000 for t in timings)
+    print(
+        f"{name:>10}: {len(timings)} pages, "
+        f"median {statistics.median(timings_ms):.2f}ms, "
+        f"p95 {timings_ms[int(0.95 * (len(timings_ms) - 1))]:.2f}ms, "
+        f"max bookmark {max(sizes)} bytes"
+    )
+
+
+def benchmark_pagination():
+    """benchmark pagination"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--collection", help="restrict the search to a collection")
+    parser.add_argument("--sortby", help="sort field (ex. eo:cloud_cover)")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    settings = PostgresSettings()
+    client = CoreCrudClient(
+        session=Session(
+            settings.reader_connection_string, settings.writer_connection_string
+        )
+    )
+    search_request = schemas.STACSearch(
+        collections=[args.collection] if args.collection else None,
+        sortby=[{"field": args.sortby, "direction": "asc"}] if args.sortby else None,
+        limit=args.limit,
+    )
+    order_by = client._sort_keys(search_request.sortby)
+
+    def native(bookmark: Optional[str]):
+        with client.session.reader.context_session() as session:
+            query = client._search_query(session, search_request)
+            page = get_page(
+                query,
+                order_by,
+                per_page=args.limit,
+                bookmark=Bookmark.decode(bookmark) if bookmark else None,
+            )
+            materialize(page)
+            token = page.next.encode() if page.next else None
+            return token, len(token or "")
+
+    report("keyset", *walk(native, args.pages))
+
+    try:
+        import sqlakeyset
+    except ImportError:
+        print("sqlakeyset is not installed, skipping the baseline")
+        return
+
+    def baseline(bookmark: Optional[str]):
+        with client.session.reader.context_session() as session:
+            query = client._search_query(session, search_request)
+            page = sqlakeyset.get_page(query, per_page=args.limit, page=bookmark)
+            materialize(page)
+            token = page.paging.bookmark_next if page.paging.has_next else None
+            return token, len(token or "")
+
+    report("sqlakeyset", *walk(baseline, args.pages))
+
+
+if __name__ == "__main__":
+    benchmark_pagination()
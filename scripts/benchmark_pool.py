@@ -0,0 +1,104 @@
+"""Benchmark search throughput against the size of the reader connection pool.
+
+Runs the same search from a number of concurrent workers (the size of the threadpool serving sync endpoints) for
+each pool size, reporting the throughput, latency and time spent waiting for a connection, for example:
+    python scripts/benchmark_pool.py --pool-sizes 2 5 10 20 --concurrency 40 --duration 10
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from stac_api.clients.postgres.core import CoreCrudClient
+from stac_api.clients.postgres.session import PoolOptions, Session
+from stac_api.config import PostgresSettings, inject_settings
+from stac_api.errors import PoolExhausted
+from stac_api.models import schemas
+
+
+class BenchmarkRequest:
+    """Request passed to the client, only its base url is used."""
+
+    base_url = "http://localhost/"
+
+
+def run(
+    client: CoreCrudClient,
+    search_request: schemas.STACSearch,
+    concurrency: int,
+    duration: float,
+) -> List[float]:
+    """Run searches from concurrent workers until the duration elapses.
+
+    Returns:
+        The latency of each search.
+    """
+    deadline = time.monotonic() + duration
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def worker():
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                client.post_search(search_request, request=BenchmarkRequest)
+            except PoolExhausted:
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+    return latencies
+
+
+def benchmark_pool():
+    """benchmark pool"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[2, 5, 10, 20])
+    parser.add_argument("--max-overflow", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=40)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--collection", help="restrict the search to a collection")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    settings = PostgresSettings()
+    inject_settings(settings)
+    search_request = schemas.STACSearch(
+        collections=[args.collection] if args.collection else None,
+        limit=args.limit,
+    )
+
+    for size in args.pool_sizes:
+        session = Session(
+            settings.reader_connection_string,
+            settings.writer_connection_string,
+            reader_pool=PoolOptions(size=size, max_overflow=args.max_overflow),
+        )
+        client = CoreCrudClient(session=session)
+        latencies = sorted(
+            t * 1000
+            for t in run(client, search_request, args.concurrency, args.duration)
+        )
+        status = session.reader.pool_status()
+        session.reader.cached_engine.dispose()
+        if not latencies:
+            print(f"pool size {size:>3}: no search completed")
+            continue
+        print(
+            f"pool size {size:>3}: {len(latencies) / args.duration:8.1f} searches/s, "
+            f"median {statistics.median(latencies):.2f}ms, "
+            f"p95 {latencies[int(0.95 * (len(latencies) - 1))]:.2f}ms, "
+            f"wait avg {status['wait_time_avg_ms']:.2f}ms, "
+            f"wait max {status['wait_time_max_ms']:.2f}ms, "
+            f"timeouts {status['timeouts']}"
+        )
+
+
+if __name__ == "__main__":
+    benchmark_pool()
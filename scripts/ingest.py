@@ -0,0 +1,413 @@
+"""Ingest collections and items from files, directories or urls.
+
+Inputs are GeoJSON documents (a collection, an item or a FeatureCollection of items) or newline-delimited JSON files
+(`.ndjson`, `.jsonl`, one collection or item per line), directories are searched recursively.  Collections are created
+first, then items are upserted in batches by a pool of workers, either through the bulk transaction endpoint of the API
+(`--api`) or directly in the database (`--database`).  Items are upserted, so an ingest may be run again.
+
+Lines which aren't JSON objects, and items without a collection, are logged and counted as rejected.  Failed batches
+are retried with exponential backoff.  Completed batches are recorded in a checkpoint file, a resumed
+ingest (same inputs and batch size) skips them, for example:
+    python scripts/ingest.py data/ --api http://localhost:8081 --workers 8 --batch-size 1000 --checkpoint ingest.ckpt
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
+from urllib.parse import urljoin
+
+import requests
+import sqlalchemy as sa
+
+from stac_api.clients.postgres.session import Session
+from stac_api.clients.postgres.transactions import (
+    BulkTransactionsClient,
+    TransactionsClient,
+)
+from stac_api.config import PostgresSettings, inject_settings
+from stac_api.errors import ConflictError, DatabaseError, PoolExhausted
+from stac_api.models import schemas
+
+logger = logging.getLogger("ingest")
+
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+JSON_EXTENSIONS = (".json", ".geojson")
+
+# A batch is identified by its source and the position of its first item in the source
+Batch = Tuple[str, int, List[Dict]]
+
+
+class RetryableError(Exception):
+    """A failure which may succeed when retried (ex. connection error, unavailable database)."""
+
+
+def sources(paths: List[str]) -> Iterator[str]:
+    """List the files (or urls) of the inputs, in a stable order."""
+    for path in paths:
+        if path.startswith(("http://", "https://")) or not os.path.isdir(path):
+            yield path
+            continue
+        for (root, dirs, files) in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(NDJSON_EXTENSIONS + JSON_EXTENSIONS):
+                    yield os.path.join(root, name)
+
+
+def _lines(source: str) -> Iterator[str]:
+    """Read the JSON documents of a source, one per line for newline-delimited files."""
+    ndjson = source.endswith(NDJSON_EXTENSIONS)
+    if source.startswith(("http://", "https://")):
+        resp = requests.get(source)
+        resp.raise_for_status()
+        yield from resp.text.splitlines() if ndjson else [resp.text]
+        return
+    with open(source) as f:
+        yield from f if ndjson else [f.read()]
+
+
+def read_documents(source: str) -> Iterator[Union[Dict, ValueError]]:
+    """Read the collections and items of a source, items are read lazily from local newline-delimited files.
+
+    Lines which aren't JSON objects are yielded as `ValueError`s, so they are reported without failing the ingest.
+    """
+    for (number, line) in enumerate(_lines(source), start=1):
+        if not line.strip():
+            continue
+        try:
+            document = json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"line {number}: {e}")
+            continue
+        if not isinstance(document, dict):
+            yield ValueError(f"line {number}: not an object")
+            continue
+        if document.get("type") == "FeatureCollection":
+            yield from document["features"]
+        else:
+            yield document
+
+
+def is_collection(document: Dict) -> bool:
+    """Tell collections from items."""
+    return document.get("type") == "Collection" or (
+        "extent" in document and "geometry" not in document
+    )
+
+
+def backoff(func: Callable, retries: int, base_delay: float, *args, **kwargs) -> Any:
+    """Call a function, retrying `RetryableError`s with exponential backoff (and jitter)."""
+    for attempt in range(retries + 1):
+        try:
+            return func(*args, **kwargs)
+        except RetryableError as e:
+            if attempt == retries:
+                raise
+            delay = base_delay * 2**attempt * (1 + random.random())
+            logger.warning(f"{e}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+class ApiTarget:
+    """Write through the bulk transaction endpoint of the API."""
+
+    def __init__(self, url: str, timeout: float = 300.0):
+        """Create the target."""
+        self.url = url
+        self.timeout = timeout
+        self.local = threading.local()
+
+    @property
+    def http(self) -> requests.Session:
+        """HTTP session of the current worker."""
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def _request(self, method: str, path: str, body: Dict) -> requests.Response:
+        try:
+            resp = self.http.request(
+                method, urljoin(self.url, path), json=body, timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            raise RetryableError(str(e)) from e
+        if resp.status_code >= 500 or resp.status_code == 429:
+            raise RetryableError(f"{method} {path}: {resp.status_code} {resp.text}")
+        return resp
+
+    def create_collection(self, collection: Dict) -> None:
+        """Create a collection, existing collections are left as is."""
+        resp = self._request("POST", "/collections", collection)
+        if resp.status_code != 409:
+            resp.raise_for_status()
+
+    def upsert_items(self, collection_id: str, items: List[Dict]) -> Dict:
+        """Upsert a batch of items."""
+        resp = self._request(
+            "PUT", f"/collections/{collection_id}/bulk_items", {"items": items}
+        )
+        resp.raise_for_status()
+        return resp.json()
+
+
+class IngestRequest:
+    """Request passed to the clients, only its base url is used."""
+
+    base_url = ""
+
+
+class DatabaseTarget:
+    """Write directly to the database (`POSTGRES_*` environment variables)."""
+
+    def __init__(self):
+        """Create the target."""
+        settings = PostgresSettings()
+        inject_settings(settings)
+        session = Session(
+            settings.reader_connection_string, settings.writer_connection_string
+        )
+        self.transactions = TransactionsClient(session=session)
+        self.bulk_transactions = BulkTransactionsClient(session=session)
+
+    def create_collection(self, collection: Dict) -> None:
+        """Create a collection, existing collections are left as is."""
+        try:
+            self.transactions.create_collection(
+                schemas.Collection.parse_obj(collection), request=IngestRequest
+            )
+        except ConflictError:
+            pass
+
+    def upsert_items(self, collection_id: str, items: List[Dict]) -> Dict:
+        """Upsert a batch of items."""
+        try:
+            result = self.bulk_transactions.bulk_item_upsert(
+                schemas.BulkItems(items=items)
+            )
+        except (sa.exc.OperationalError, DatabaseError, PoolExhausted) as e:
+            raise RetryableError(str(e)) from e
+        return json.loads(result.json(exclude_none=True))
+
+
+class Checkpoint:
+    """Record of the completed batches, appended to a file as batches complete."""
+
+    def __init__(self, path: Optional[str]):
+        """Load the batches completed by previous runs."""
+        self.path = path
+        self.completed: Set[str] = set()
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.completed = {line.strip() for line in f if line.strip()}
+
+    @staticmethod
+    def key(batch: Batch) -> str:
+        """Key of a batch."""
+        (source, start, items) = batch
+        return f"{source}:{start}:{len(items)}"
+
+    def done(self, batch: Batch) -> bool:
+        """Whether a batch was completed."""
+        return self.key(batch) in self.completed
+
+    def record(self, batch: Batch) -> None:
+        """Record a completed batch."""
+        if not self.path:
+            return
+        with self.lock, open(self.path, "a") as f:
+            f.write(self.key(batch) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class Progress:
+    """Count ingested items and report the throughput."""
+
+    def __init__(self, interval: float = 10.0):
+        """Start the clock."""
+        self.interval = interval
+        self.start = self.last_report = time.monotonic()
+        self.counts = {"inserted": 0, "updated": 0, "unchanged": 0, "rejected": 0}
+        self.skipped = 0
+        self.failed = 0
+        self.lock = threading.Lock()
+
+    @property
+    def items(self) -> int:
+        """Number of processed items."""
+        return sum(self.counts.values())
+
+    def reject(self, reason: str) -> None:
+        """Count an item rejected before it was sent."""
+        with self.lock:
+            self.counts["rejected"] += 1
+        logger.warning(f"Rejected {reason}")
+
+    def add(self, result: Dict) -> None:
+        """Count the items of a completed batch."""
+        with self.lock:
+            for key in self.counts:
+                self.counts[key] += result.get(key, 0)
+            for status in result.get("items", []):
+                if status["status"] == "rejected":
+                    logger.warning(
+                        f"Rejected {status.get('id')}: {status.get('reason')}"
+                    )
+            if time.monotonic() - self.last_report >= self.interval:
+                self.last_report = time.monotonic()
+                self.report()
+
+    def report(self) -> None:
+        """Log the counts and throughput."""
+        elapsed = time.monotonic() - self.start
+        logger.info(
+            f"{self.items} items in {elapsed:.1f}s ({self.items / max(elapsed, 1e-9):.1f} items/s), "
+            + ", ".join(f"{key} {value}" for (key, value) in self.counts.items())
+            + f", skipped {self.skipped}, failed batches {self.failed}"
+        )
+
+
+def batches(
+    paths: List[str],
+    batch_size: int,
+    create_collection: Callable[[Dict], None],
+    transform: Optional[Callable[[Dict], Dict]] = None,
+    reject: Optional[Callable[[str], None]] = None,
+) -> Iterator[Batch]:
+    """Create the collections of the inputs and batch their items (per source and collection).
+
+    Invalid documents are passed to `reject`, they keep their position so batches are the same on every run.
+    """
+    for source in sources(paths):
+        pending: Dict[str, Tuple[int, List[Dict]]] = {}
+        for (position, document) in enumerate(read_documents(source)):
+            if isinstance(document, ValueError):
+                if reject:
+                    reject(f"{source}: {document}")
+                continue
+            if is_collection(document):
+                create_collection(document)
+                continue
+            if transform:
+                document = transform(document)
+            if "collection" not in document:
+                if reject:
+                    reject(f"{source}: {document.get('id')} has no collection")
+                continue
+            (start, items) = pending.setdefault(document["collection"], (position, []))
+            items.append(document)
+            if len(items) >= batch_size:
+                del pending[document["collection"]]
+                yield (source, start, items)
+        for (start, items) in pending.values():
+            yield (source, start, items)
+
+
+def ingest(
+    paths: List[str],
+    target,
+    workers: int = 4,
+    batch_size: int = 500,
+    retries: int = 5,
+    retry_delay: float = 1.0,
+    checkpoint: Optional[str] = None,
+    report_interval: float = 10.0,
+    transform: Optional[Callable[[Dict], Dict]] = None,
+) -> Progress:
+    """Ingest the collections and items of the inputs.
+
+    Collections are created as they are read, before their items.  At most twice as many batches as workers are read
+    ahead, so memory use is bounded by the batch size.  Items may be modified by `transform` before they are sent.
+
+    Returns:
+        The counts of the ingest.
+    """
+    done = Checkpoint(checkpoint)
+    progress = Progress(report_interval)
+
+    def run(batch: Batch) -> None:
+        (_, _, items) = batch
+        result = backoff(
+            target.upsert_items, retries, retry_delay, items[0]["collection"], items
+        )
+        progress.add(result)
+        done.record(batch)
+
+    in_flight: Dict[Future, Batch] = {}
+
+    def collect(futures) -> None:
+        for future in futures:
+            batch = in_flight.pop(future)
+            try:
+                future.result()
+            except Exception as e:
+                progress.failed += 1
+                logger.error(f"Batch {Checkpoint.key(batch)} failed: {e}")
+
+    def create_collection(collection: Dict) -> None:
+        backoff(target.create_collection, retries, retry_delay, collection)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for batch in batches(
+            paths, batch_size, create_collection, transform, progress.reject
+        ):
+            if done.done(batch):
+                progress.skipped += len(batch[2])
+                continue
+            if len(in_flight) >= 2 * workers:
+                (completed, _) = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(completed)
+            in_flight[executor.submit(run, batch)] = batch
+        collect(list(wait(in_flight).done))
+
+    progress.report()
+    return progress
+
+
+def main():
+    """ingest"""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("paths", nargs="+", help="files, directories or urls")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--api", help="url of the API")
+    target.add_argument(
+        "--database", action="store_true", help="write directly to the database"
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument(
+        "--retry-delay", type=float, default=1.0, help="seconds before the first retry"
+    )
+    parser.add_argument("--checkpoint", help="file recording the completed batches")
+    parser.add_argument(
+        "--report-interval", type=float, default=10.0, help="seconds between reports"
+    )
+    args = parser.parse_args()
+
+    progress = ingest(
+        args.paths,
+        ApiTarget(args.api) if args.api else DatabaseTarget(),
+        workers=args.workers,
+        batch_size=args.batch_size,
+        retries=args.retries,
+        retry_delay=args.retry_delay,
+        checkpoint=args.checkpoint,
+        report_interval=args.report_interval,
+    )
+    if progress.failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    main()
@@ -1,32 +1,29 @@
 """Ingest sample data during docker-compose"""
 
-from urllib.parse import urljoin
+from typing import Dict
 
-import requests
+from ingest import ApiTarget, ingest
 
 bucket = "arturo-stac-api-test-data"
 app_host = "http://host.docker.internal:8081"
 
 
+def drop_extensions(item: Dict) -> Dict:
+    """The sample items declare extensions which aren't validated by the API."""
+    item.pop("stac_extensions", None)
+    return item
+
+
 def ingest_joplin_data():
     """ingest data"""
-    r = requests.get(f"https://{bucket}.s3.amazonaws.com/joplin/collection.json")
-    collection = r.json()
-
-    r = requests.post(urljoin(app_host, "/collections"), json=collection)
-    if r.status_code not in (200, 409):
-        r.raise_for_status()
-
-    r = requests.get(f"https://{bucket}.s3.amazonaws.com/joplin/index.geojson")
-    index = r.json()
-    for feat in index["features"]:
-        del feat["stac_extensions"]
-        r = requests.post(
-            urljoin(app_host, f"/collections/{collection['id']}/items"), json=feat
-        )
-        if r.status_code == 409:
-            continue
-        r.raise_for_status()
+    ingest(
+        [
+            f"https://{bucket}.s3.amazonaws.com/joplin/collection.json",
+            f"https://{bucket}.s3.amazonaws.com/joplin/index.geojson",
+        ],
+        ApiTarget(app_host),
+        transform=drop_extensions,
+    )
 
 
 if __name__ == "__main__":
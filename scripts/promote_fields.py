@@ -0,0 +1,53 @@
+"""Promote item properties to indexed columns.
+
+Run before adding the fields to `INDEXED_FIELDS`, for example:
+    python scripts/promote_fields.py eo:cloud_cover aidash:feeder_id
+Once every process runs with the new `INDEXED_FIELDS`, remove the copies left in the item properties:
+    python scripts/promote_fields.py eo:cloud_cover aidash:feeder_id --strip-properties
+"""
+
+import argparse
+import logging
+
+from stac_api.clients.postgres.promotion import FieldPromotionClient
+from stac_api.clients.postgres.session import Session
+from stac_api.config import PostgresSettings
+
+
+def promote_fields():
+    """promote fields"""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("fields", nargs="+", help="queryable fields to promote")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--throttle", type=float, default=0.1, help="seconds to sleep between batches"
+    )
+    parser.add_argument(
+        "--strip-properties",
+        action="store_true",
+        help="remove the promoted fields from the item properties",
+    )
+    args = parser.parse_args()
+
+    settings = PostgresSettings()
+    client = FieldPromotionClient(
+        session=Session(
+            settings.reader_connection_string, settings.writer_connection_string
+        ),
+        batch_size=args.batch_size,
+        throttle=args.throttle,
+    )
+    for field in args.fields:
+        if args.strip_properties:
+            count = client.strip_properties(field)
+            print(f"Stripped {field} from the properties of {count} rows")
+            continue
+        count = client.promote(field)
+        print(f"Promoted {field} ({count} rows backfilled)")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    promote_fields()
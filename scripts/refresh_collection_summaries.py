@@ -0,0 +1,40 @@
+"""Install the collection summaries of `SUMMARY_QUERYABLES` in the database, and recompute every collection.
+
+Run after changing `SUMMARY_QUERYABLES`, or after promoting a summarized field (see `scripts/promote_fields.py`), for
+example:
+    SUMMARY_QUERYABLES='["gsd", "eo:cloud_cover", "height"]' python scripts/refresh_collection_summaries.py
+Every item is scanned, item writes wait until the refresh commits.
+"""
+
+import argparse
+import logging
+
+from stac_api.clients.postgres.extents import CollectionExtentsClient
+from stac_api.clients.postgres.session import Session
+from stac_api.config import PostgresSettings, inject_settings
+
+
+def refresh_collection_summaries():
+    """refresh collection summaries"""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.parse_args()
+
+    settings = PostgresSettings()
+    inject_settings(settings)
+    client = CollectionExtentsClient(
+        session=Session(
+            settings.reader_connection_string, settings.writer_connection_string
+        )
+    )
+    installed = client.installed_fields()
+    client.refresh(settings.summary_queryables)
+    print(
+        f"Summarized {sorted(settings.summary_queryables)} (previously {sorted(installed)})"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    refresh_collection_summaries()
@@ -16,7 +16,6 @@ install_requires = [
     "shapely",
     "sqlalchemy",
     "geoalchemy2<0.8.0",
-    "sqlakeyset",
     "stac-pydantic>=1.3.5",
     "pydantic[dotenv]",
     "titiler==0.1.0a12",
@@ -26,6 +25,10 @@ install_requires = [
 extra_reqs = {
     "dev": ["pytest", "pytest-cov", "pytest-asyncio", "pre-commit", "requests"],
     "docs": ["mkdocs", "mkdocs-material"],
+    # `stac_api.clients.postgres.async_core`
+    "async": ["asyncpg"],
+    # Baseline of `scripts/benchmark_pagination.py`
+    "benchmark": ["sqlakeyset"],
 }
 
 
@@ -1,5 +1,5 @@
 """fastapi app creation."""
-from typing import Any, Dict, List, Optional, Type
+from typing import Any, Dict, List, Optional, Type, Union
 
 import attr
 from fastapi import APIRouter, FastAPI
@@ -13,12 +13,12 @@ from stac_api.api.models import (
     CollectionUri,
     EmptyRequest,
     ItemCollectionUri,
-    ItemUri,
+    ItemGetRequest,
     SearchGetRequest,
     _create_request_model,
 )
 from stac_api.api.routes import create_endpoint_from_model, create_endpoint_with_depends
-from stac_api.clients.base import BaseCoreClient
+from stac_api.clients.base import AsyncBaseCoreClient, BaseCoreClient
 from stac_api.config import ApiSettings, inject_settings
 from stac_api.errors import DEFAULT_STATUS_CODES, add_exception_handlers
 from stac_api.models import schemas
@@ -36,8 +36,8 @@ class StacApi:
             API settings and configuration, potentially using environment variables.
             See https://pydantic-docs.helpmanual.io/usage/settings/.
         client:
-            A subclass of `stac_api.clients.BaseCoreClient`.  Defines the application logic which is injected
-            into the API.
+            A subclass of `stac_api.clients.BaseCoreClient` (or `AsyncBaseCoreClient`).  Defines the application
+            logic which is injected into the API.
         extensions:
             API extensions to include with the application.  This may include official STAC extensions as well as
             third-party add ons.
@@ -49,7 +49,7 @@ class StacApi:
     """
 
     settings: ApiSettings = attr.ib()
-    client: BaseCoreClient = attr.ib()
+    client: Union[BaseCoreClient, AsyncBaseCoreClient] = attr.ib()
     extensions: List[ApiExtension] = attr.ib(default=attr.Factory(list))
     exceptions: Dict[Type[Exception], int] = attr.ib(
         default=attr.Factory(lambda: DEFAULT_STATUS_CODES)
@@ -119,7 +119,7 @@ class StacApi:
             response_model_exclude_unset=True,
             response_model_exclude_none=True,
             methods=["GET"],
-            endpoint=create_endpoint_with_depends(self.client.get_item, ItemUri),
+            endpoint=create_endpoint_with_depends(self.client.get_item, ItemGetRequest),
         )
         router.add_api_route(
             name="Search",
@@ -1,14 +1,26 @@
 """stac_api.api.extensions."""
+from .aggregation import AggregationExtension
+from .batch import BatchSearchExtension
 from .context import ContextExtension
+from .diagnostics import DiagnosticsExtension
+from .export import ExportExtension
 from .fields import FieldsExtension
+from .filter import FilterExtension
+from .jobs import IngestJobsExtension
 from .query import QueryExtension
 from .sort import SortExtension
 from .tiles import TilesExtension
 from .transaction import BulkTransactionExtension, TransactionExtension
 
 __all__ = (
+    "AggregationExtension",
+    "BatchSearchExtension",
     "ContextExtension",
+    "DiagnosticsExtension",
+    "ExportExtension",
     "FieldsExtension",
+    "FilterExtension",
+    "IngestJobsExtension",
     "QueryExtension",
     "SortExtension",
     "TilesExtension",
@@ -0,0 +1,52 @@
+"""aggregation extension."""
+import attr
+from fastapi import APIRouter, FastAPI
+
+from stac_api.api.extensions.extension import ApiExtension
+from stac_api.api.models import _create_request_model
+from stac_api.api.routes import create_endpoint_from_model
+from stac_api.clients.base import BaseAggregationClient
+from stac_api.models import schemas
+
+
+@attr.s
+class AggregationExtension(ApiExtension):
+    """Aggregation Extension.
+
+    The aggregation extension adds the `POST /aggregate` endpoint which accepts the same parameters as `POST /search`
+    plus a list of aggregations, computed over every item matched by the search:
+        - collection: count by collection
+        - datetime: datetime histogram with a given interval
+        - terms: count by value of a queryable
+        - stats: count, min, max, avg and sum of a numeric queryable
+        - grid: count by grid cell
+
+    Attributes:
+        client: aggregation application logic
+    """
+
+    client: BaseAggregationClient = attr.ib()
+
+    def register(self, app: FastAPI) -> None:
+        """Register the extension with a FastAPI application.
+
+        Args:
+            app: target FastAPI application.
+
+        Returns:
+            None
+        """
+        aggregation_request_model = _create_request_model(schemas.AggregationRequest)
+
+        router = APIRouter()
+        router.add_api_route(
+            name="Aggregate",
+            path="/aggregate",
+            response_model=schemas.AggregationCollection,
+            response_model_exclude_none=True,
+            methods=["POST"],
+            endpoint=create_endpoint_from_model(
+                self.client.aggregate, aggregation_request_model
+            ),
+        )
+        app.include_router(router, tags=["Aggregation Extension"])
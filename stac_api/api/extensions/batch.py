@@ -0,0 +1,59 @@
+"""batch search extension."""
+from typing import List
+
+import attr
+from fastapi import APIRouter, FastAPI
+
+from stac_api.api.extensions.extension import ApiExtension
+from stac_api.api.models import _create_request_model
+from stac_api.api.routes import create_endpoint_from_model
+from stac_api.clients.base import BaseBatchSearchClient
+from stac_api.models import schemas
+
+
+@attr.s
+class BatchSearchExtension(ApiExtension):
+    """Batch Search Extension.
+
+    The batch search extension runs a list of searches in a single request, saving clients which issue many small
+    searches (ex. one per map tile) a round trip per search, and returns the FeatureCollection of each search in
+    request order.  Known items are read by id in a single request, in request order and without pagination, ids which
+    don't exist are listed in the `missing` member of the response:
+        - POST /search/batch
+        - POST /search/ids
+
+    Attributes:
+        client: batch search application logic
+    """
+
+    client: BaseBatchSearchClient = attr.ib()
+
+    def register(self, app: FastAPI) -> None:
+        """Register the extension with a FastAPI application.
+
+        Args:
+            app: target FastAPI application.
+
+        Returns:
+            None
+        """
+        search_request_model = _create_request_model(schemas.STACSearch)
+
+        router = APIRouter()
+        router.add_api_route(
+            name="Batch Search",
+            path="/search/batch",
+            methods=["POST"],
+            endpoint=create_endpoint_from_model(
+                self.client.batch_search, List[search_request_model]  # type:ignore
+            ),
+        )
+        router.add_api_route(
+            name="Get Items",
+            path="/search/ids",
+            methods=["POST"],
+            endpoint=create_endpoint_from_model(
+                self.client.get_items, _create_request_model(schemas.ItemsByIds)
+            ),
+        )
+        app.include_router(router, tags=["Batch Search Extension"])
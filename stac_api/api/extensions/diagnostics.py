@@ -0,0 +1,76 @@
+"""diagnostics extension."""
+import secrets
+from typing import List, Optional
+
+import attr
+from fastapi import APIRouter, Depends, FastAPI, Header
+
+from stac_api import config
+from stac_api.api.extensions.extension import ApiExtension
+from stac_api.api.models import EmptyRequest, _create_request_model
+from stac_api.api.routes import (
+    create_endpoint_from_model,
+    create_endpoint_with_depends,
+)
+from stac_api.clients.base import BaseDiagnosticsClient
+from stac_api.errors import ForbiddenError
+from stac_api.models import schemas
+
+
+def require_admin(x_api_key: Optional[str] = Header(None)) -> None:
+    """Check the admin api key (`ApiSettings.admin_api_key`), admin endpoints are disabled if no key is configured."""
+    admin_api_key = config.settings.admin_api_key
+    if not admin_api_key or not secrets.compare_digest(x_api_key or "", admin_api_key):
+        raise ForbiddenError("A valid admin api key is required")
+
+
+@attr.s
+class DiagnosticsExtension(ApiExtension):
+    """Diagnostics Extension.
+
+    The diagnostics extension adds the admin only `POST /search/explain` endpoint, which returns the compiled SQL,
+    bound parameters and `EXPLAIN (ANALYZE, BUFFERS)` output of a search.  Requests must provide the
+    `ApiSettings.admin_api_key` in the `X-API-Key` header.
+
+    The admin only `GET /diagnostics/pools` endpoint returns the metrics of the database connection pools (connections
+    checked out, overflow and time spent waiting for a connection).
+
+    Attributes:
+        client: diagnostics application logic
+    """
+
+    client: BaseDiagnosticsClient = attr.ib()
+
+    def register(self, app: FastAPI) -> None:
+        """Register the extension with a FastAPI application.
+
+        Args:
+            app: target FastAPI application.
+
+        Returns:
+            None
+        """
+        search_request_model = _create_request_model(schemas.STACSearch)
+
+        router = APIRouter()
+        router.add_api_route(
+            name="Explain Search",
+            path="/search/explain",
+            response_model=schemas.QueryPlan,
+            methods=["POST"],
+            dependencies=[Depends(require_admin)],
+            endpoint=create_endpoint_from_model(
+                self.client.explain_search, search_request_model
+            ),
+        )
+        router.add_api_route(
+            name="Connection Pools",
+            path="/diagnostics/pools",
+            response_model=List[schemas.PoolStatus],
+            methods=["GET"],
+            dependencies=[Depends(require_admin)],
+            endpoint=create_endpoint_with_depends(
+                self.client.pool_status, EmptyRequest
+            ),
+        )
+        app.include_router(router, tags=["Diagnostics Extension"])
@@ -0,0 +1,72 @@
+"""export extension."""
+from typing import Callable
+
+import attr
+from fastapi import APIRouter, FastAPI
+from starlette.responses import StreamingResponse
+
+from stac_api.api.extensions.extension import ApiExtension
+from stac_api.api.models import CollectionUri, _create_request_model
+from stac_api.api.routes import create_endpoint_from_model, create_endpoint_with_depends
+from stac_api.clients.base import BaseExportClient
+from stac_api.models import schemas
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _ndjson(func: Callable) -> Callable:
+    """Wrap a client method returning lines in a streaming response."""
+
+    def _stream(*args, **kwargs) -> StreamingResponse:
+        return StreamingResponse(func(*args, **kwargs), media_type=NDJSON_MEDIA_TYPE)
+
+    return _stream
+
+
+@attr.s
+class ExportExtension(ApiExtension):
+    """Export Extension.
+
+    The export extension streams every item of a collection, or every item matched by a search, as newline-delimited
+    GeoJSON (one item per line) from a single server-side cursor, so bulk consumers don't have to follow pagination
+    tokens:
+        - GET /collections/{collectionId}/export
+        - POST /search/export
+
+    Attributes:
+        client: export application logic
+    """
+
+    client: BaseExportClient = attr.ib()
+
+    def register(self, app: FastAPI) -> None:
+        """Register the extension with a FastAPI application.
+
+        Args:
+            app: target FastAPI application.
+
+        Returns:
+            None
+        """
+        search_request_model = _create_request_model(schemas.STACSearch)
+
+        router = APIRouter()
+        router.add_api_route(
+            name="Export Collection",
+            path="/collections/{collectionId}/export",
+            response_class=StreamingResponse,
+            methods=["GET"],
+            endpoint=create_endpoint_with_depends(
+                _ndjson(self.client.export_collection), CollectionUri
+            ),
+        )
+        router.add_api_route(
+            name="Export Search",
+            path="/search/export",
+            response_class=StreamingResponse,
+            methods=["POST"],
+            endpoint=create_endpoint_from_model(
+                _ndjson(self.client.export_search), search_request_model
+            ),
+        )
+        app.include_router(router, tags=["Export Extension"])
@@ -0,0 +1,29 @@
+"""filter extension."""
+import attr
+from fastapi import FastAPI
+
+from stac_api.api.extensions.extension import ApiExtension
+
+
+@attr.s
+class FilterExtension(ApiExtension):
+    """Filter Extension.
+
+    The Filter extension adds a `filter` parameter to `/search` requests which allows the caller to filter items with
+    CQL2 expressions, written either as CQL2-JSON or CQL2-text (selected with the `filter-lang` parameter).  Unlike the
+    Query extension, filters may combine predicates with AND/OR/NOT and use spatial and temporal operators.  Set
+    `ApiSettings.filter_strict_mode` to reject filters which can't be served by an index.
+
+    https://github.com/radiantearth/stac-api-spec/tree/master/fragments/filter
+    """
+
+    def register(self, app: FastAPI) -> None:
+        """Register the extension with a FastAPI application.
+
+        Args:
+            app: target FastAPI application.
+
+        Returns:
+            None
+        """
+        pass
@@ -0,0 +1,92 @@
+"""ingest jobs extension."""
+import attr
+from fastapi import APIRouter, FastAPI, Path
+from starlette import status
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from stac_api.api.extensions.extension import ApiExtension
+from stac_api.api.models import JobUri
+from stac_api.api.routes import create_endpoint_with_depends
+from stac_api.clients.base import BaseIngestJobsClient
+from stac_api.models import schemas
+
+
+@attr.s
+class IngestJobsExtension(ApiExtension):
+    """Ingest Jobs Extension.
+
+    Bulk ingests run in the background instead of within the request, so large ingests aren't cut short by client or
+    load balancer timeouts:
+        POST /collections/{collectionId}/bulk_items/jobs
+        GET /jobs/{jobId}
+        DELETE /jobs/{jobId}
+
+    The body is newline-delimited items (`application/x-ndjson`), as for `PUT /collections/{collectionId}/bulk_items/
+    stream`.  Items are staged and the job is queued before the response (`202 Accepted`), its status, progress and
+    rejected items are then read from `GET /jobs/{jobId}`.  Failed jobs keep the items they didn't write staged until
+    they are cancelled (`DELETE /jobs/{jobId}`).  Jobs are run by a worker pool in the API process, which is started
+    and stopped with the application.
+
+    Attributes:
+        client: ingest jobs application logic
+    """
+
+    client: BaseIngestJobsClient = attr.ib()
+
+    def register(self, app: FastAPI) -> None:
+        """Register the extension with a FastAPI application.
+
+        Args:
+            app: target FastAPI application.
+
+        Returns:
+            None
+        """
+        router = APIRouter()
+
+        async def _submit(
+            request: Request,
+            collectionId: str = Path(..., description="Collection ID"),
+        ):
+            """Endpoint."""
+            return await self.client.submit_job(
+                collectionId, request.stream(), request=request
+            )
+
+        router.add_api_route(
+            name="Submit Ingest Job",
+            path="/collections/{collectionId}/bulk_items/jobs",
+            response_model=schemas.IngestJob,
+            response_model_exclude_none=True,
+            status_code=status.HTTP_202_ACCEPTED,
+            methods=["POST"],
+            endpoint=_submit,
+        )
+        router.add_api_route(
+            name="Get Ingest Job",
+            path="/jobs/{jobId}",
+            response_model=schemas.IngestJob,
+            response_model_exclude_none=True,
+            methods=["GET"],
+            endpoint=create_endpoint_with_depends(self.client.get_job, JobUri),
+        )
+        router.add_api_route(
+            name="Cancel Ingest Job",
+            path="/jobs/{jobId}",
+            response_model=schemas.IngestJob,
+            response_model_exclude_none=True,
+            methods=["DELETE"],
+            endpoint=create_endpoint_with_depends(self.client.cancel_job, JobUri),
+        )
+        app.include_router(router, tags=["Ingest Jobs Extension"])
+
+        # Both wait on the database (and the workers), off the event loop
+        async def _resume_jobs():
+            await run_in_threadpool(self.client.resume_jobs)
+
+        async def _shutdown():
+            await run_in_threadpool(self.client.shutdown)
+
+        app.add_event_handler("startup", _resume_jobs)
+        app.add_event_handler("shutdown", _shutdown)
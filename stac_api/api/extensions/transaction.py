@@ -1,6 +1,7 @@
 """transaction extension."""
 import attr
-from fastapi import APIRouter, FastAPI
+from fastapi import APIRouter, FastAPI, Path
+from starlette.requests import Request
 
 from stac_api.api.extensions.extension import ApiExtension
 from stac_api.api.models import CollectionUri, ItemUri, _create_request_model
@@ -114,8 +115,15 @@ class TransactionExtension(ApiExtension):
 class BulkTransactionExtension(ApiExtension):
     """Bulk Transaction Extension.
 
-    Bulk Transaction extension adds the `POST /collections/{collectionId}/bulk_items` endpoint to the application
-    for efficient bulk insertion of items.
+    Bulk Transaction extension adds endpoints for efficient bulk insertion of items:
+        POST /collections/{collectionId}/bulk_items
+        PUT /collections/{collectionId}/bulk_items
+        PUT /collections/{collectionId}/bulk_items/stream
+
+    `PUT` inserts new items and replaces existing ones, reporting the outcome of each item (inserted, updated,
+    unchanged or rejected) instead of failing the whole request, so ingests can be re-run.  The stream endpoint reads
+    newline-delimited items (`application/x-ndjson`) as they are received and writes them in fixed-size chunks, so
+    batches of any size are ingested in bounded memory.
     """
 
     client: BaseBulkTransactionsClient = attr.ib()
@@ -143,4 +151,32 @@ class BulkTransactionExtension(ApiExtension):
                 self.client.bulk_item_insert, items_request_model
             ),
         )
+        router.add_api_route(
+            name="Bulk Upsert Item",
+            path="/collections/{collectionId}/bulk_items",
+            response_model=schemas.BulkItemsResult,
+            response_model_exclude_none=True,
+            methods=["PUT"],
+            endpoint=create_endpoint_from_model(
+                self.client.bulk_item_upsert, _create_request_model(schemas.BulkItems)
+            ),
+        )
+
+        async def _stream(
+            request: Request,
+            collectionId: str = Path(..., description="Collection ID"),
+        ):
+            """Endpoint."""
+            return await self.client.bulk_item_stream(
+                request.stream(), collection_id=collectionId, request=request
+            )
+
+        router.add_api_route(
+            name="Bulk Upsert Item Stream",
+            path="/collections/{collectionId}/bulk_items/stream",
+            response_model=schemas.BulkItemsResult,
+            response_model_exclude_none=True,
+            methods=["PUT"],
+            endpoint=_stream,
+        )
         app.include_router(router, tags=["Bulk Transaction Extension"])
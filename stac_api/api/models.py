@@ -4,7 +4,7 @@ import abc
 from typing import Dict, Optional, Type, Union
 
 import attr
-from fastapi import Body, Path
+from fastapi import Body, Path, Query
 from pydantic import BaseModel, create_model
 from pydantic.fields import UndefinedType
 
@@ -73,6 +73,33 @@ class ItemUri(CollectionUri):
         return {"id": self.itemId}
 
 
+@attr.s
+class ItemGetRequest(ItemUri):
+    """Get item."""
+
+    simplify: Optional[float] = attr.ib(default=Query(None, ge=0))
+    precision: Optional[int] = attr.ib(default=Query(None, ge=0, le=15))
+
+    def kwargs(self) -> Dict:
+        """kwargs."""
+        return {
+            "id": self.itemId,
+            "simplify": self.simplify,
+            "precision": self.precision,
+        }
+
+
+@attr.s
+class JobUri(APIRequest):
+    """Get ingest job."""
+
+    jobId: str = attr.ib(default=Path(..., description="Job ID"))
+
+    def kwargs(self) -> Dict:
+        """kwargs."""
+        return {"id": self.jobId}
+
+
 @attr.s
 class EmptyRequest(APIRequest):
     """Empty request."""
@@ -88,10 +115,18 @@ class ItemCollectionUri(CollectionUri):
 
     limit: int = attr.ib(default=10)
     token: str = attr.ib(default=None)
+    simplify: Optional[float] = attr.ib(default=Query(None, ge=0))
+    precision: Optional[int] = attr.ib(default=Query(None, ge=0, le=15))
 
     def kwargs(self) -> Dict:
         """kwargs."""
-        return {"id": self.collectionId, "limit": self.limit, "token": self.token}
+        return {
+            "id": self.collectionId,
+            "limit": self.limit,
+            "token": self.token,
+            "simplify": self.simplify,
+            "precision": self.precision,
+        }
 
 
 @attr.s
@@ -107,6 +142,10 @@ class SearchGetRequest(APIRequest):
     token: Optional[str] = attr.ib(default=None)
     fields: Optional[str] = attr.ib(default=None)
     sortby: Optional[str] = attr.ib(default=None)
+    filter: Optional[str] = attr.ib(default=None)
+    filter_lang: Optional[str] = attr.ib(default=Query(None, alias="filter-lang"))
+    simplify: Optional[float] = attr.ib(default=Query(None, ge=0))
+    precision: Optional[int] = attr.ib(default=Query(None, ge=0, le=15))
 
     def kwargs(self) -> Dict:
         """kwargs."""
@@ -122,4 +161,8 @@ class SearchGetRequest(APIRequest):
             "token": self.token,
             "fields": self.fields.split(",") if self.fields else self.fields,
             "sortby": self.sortby.split(",") if self.sortby else self.sortby,
+            "filter": self.filter,
+            "filter_lang": self.filter_lang,
+            "simplify": self.simplify,
+            "precision": self.precision,
         }
@@ -1,4 +1,5 @@
 """route factories."""
+import asyncio
 from typing import Callable, Type
 
 from fastapi import Depends
@@ -16,7 +17,8 @@ def create_endpoint_from_model(
 
     Wrap a callable in a function which uses the desired request model.  It is expected
     that the signature of the callable matches that of the request model.  This is best for validating
-    request bodies (ex. POST requests).
+    request bodies (ex. POST requests).  Coroutine functions are awaited on the event loop, other callables are run in
+    the threadpool.
 
     Args:
         func: the wrapped function.
@@ -25,6 +27,16 @@ def create_endpoint_from_model(
     Returns:
         callable: fastapi route which may be added to a router/application
     """
+    if asyncio.iscoroutinefunction(func):
+
+        async def _async_endpoint(
+            request: Request,
+            request_data: request_model,  # type:ignore
+        ):
+            """Endpoint."""
+            return await func(request_data, request=request)
+
+        return _async_endpoint
 
     def _endpoint(
         request: Request,
@@ -45,7 +57,8 @@ def create_endpoint_with_depends(
 
     Wrap a callable in a function which uses the desired `APIRequest` to define request parameters.  It is expected
     that the return of `APIRequest.kwargs` matches that of the callable.  This works best for validating query/path
-    parameters (ex. GET request) and allows for dependency injection.
+    parameters (ex. GET request) and allows for dependency injection.  Coroutine functions are awaited on the event
+    loop, other callables are run in the threadpool.
 
     Args:
         func: the wrapped function
@@ -54,6 +67,16 @@ def create_endpoint_with_depends(
     Returns:
         callable: fastapi route which may be added to a router/application
     """
+    if asyncio.iscoroutinefunction(func):
+
+        async def _async_endpoint(
+            request: Request,
+            request_data: request_model = Depends(),  # type:ignore
+        ):
+            """Endpoint."""
+            return await func(request=request, **request_data.kwargs())  # type:ignore
+
+        return _async_endpoint
 
     def _endpoint(
         request: Request,
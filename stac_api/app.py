@@ -1,16 +1,31 @@
 """FastAPI application."""
 from stac_api.api.app import StacApi
 from stac_api.api.extensions import (
+    AggregationExtension,
+    BatchSearchExtension,
+    DiagnosticsExtension,
+    ExportExtension,
     BulkTransactionExtension,
     FieldsExtension,
+    FilterExtension,
+    IngestJobsExtension,
     QueryExtension,
     SortExtension,
     TilesExtension,
     TransactionExtension,
     ContextExtension
 )
+from stac_api.clients.postgres.aggregation import AggregationClient
+from stac_api.clients.postgres.async_core import AsyncCoreCrudClient
+from stac_api.clients.postgres.async_session import AsyncSession
+from stac_api.clients.postgres.batch import BatchSearchClient
 from stac_api.clients.postgres.core import CoreCrudClient
-from stac_api.clients.postgres.session import Session
+from stac_api.clients.postgres.diagnostics import DiagnosticsClient
+from stac_api.clients.postgres.export import ExportClient
+from stac_api.clients.postgres.extents import CollectionExtentsClient
+from stac_api.clients.postgres.jobs import IngestJobsClient
+from stac_api.clients.postgres.replicas import ReadYourWritesMiddleware
+from stac_api.clients.postgres.session import PoolOptions, Session
 from stac_api.clients.postgres.transactions import (
     BulkTransactionsClient,
     TransactionsClient,
@@ -19,21 +34,53 @@ from stac_api.clients.tiles.ogc import TilesClient
 from stac_api.config import PostgresSettings
 
 settings = PostgresSettings()
-session = Session(settings.reader_connection_string, settings.writer_connection_string)
+session = Session(
+    settings.reader_connection_strings,
+    settings.writer_connection_string,
+    reader_routing=settings.reader_routing,
+    max_replica_lag=settings.replica_max_lag,
+    replica_check_interval=settings.replica_check_interval,
+    read_your_writes=settings.read_your_writes_window is not None,
+    reader_pool=PoolOptions.from_settings(settings, "reader"),
+    writer_pool=PoolOptions.from_settings(settings, "writer"),
+)
+async_session = None
+core_client = CoreCrudClient(session=session)
+if settings.async_client:
+    async_session = AsyncSession(
+        settings.reader_connection_string,
+        settings.writer_connection_string,
+        reader_pool=PoolOptions.from_settings(settings, "reader"),
+        writer_pool=PoolOptions.from_settings(settings, "writer"),
+    )
+    core_client = AsyncCoreCrudClient(session=async_session)
 api = StacApi(
     settings=settings,
     extensions=[
         TransactionExtension(client=TransactionsClient(session=session)),
         BulkTransactionExtension(client=BulkTransactionsClient(session=session)),
+        IngestJobsExtension(client=IngestJobsClient(session=session)),
         #FieldsExtension(),
         QueryExtension(),
+        FilterExtension(),
         SortExtension(),
         TilesExtension(TilesClient(session=session)),
-        ContextExtension()
+        ContextExtension(),
+        AggregationExtension(client=AggregationClient(session=session)),
+        DiagnosticsExtension(client=DiagnosticsClient(session=session)),
+        ExportExtension(client=ExportClient(session=session)),
+        BatchSearchExtension(client=BatchSearchClient(session=session)),
     ],
-    client=CoreCrudClient(session=session),
+    client=core_client,
 )
 app = api.app
+if settings.read_your_writes_window is not None:
+    app.add_middleware(ReadYourWritesMiddleware, window=settings.read_your_writes_window)
+if async_session is not None:
+    app.add_event_handler("shutdown", async_session.close)
+extents_client = CollectionExtentsClient(session=session)
+app.add_event_handler("startup", extents_client.start)
+app.add_event_handler("shutdown", extents_client.stop)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,7 @@
 """Base clients."""
 import abc
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Type, Union
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Type, Union
 
 import attr
 from stac_pydantic import ItemCollection
@@ -140,6 +140,48 @@ class BaseBulkTransactionsClient(abc.ABC):
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def bulk_item_upsert(
+        self,
+        items: schemas.BulkItems,
+        chunk_size: Optional[int] = None,
+        collection_id: Optional[str] = None,
+        **kwargs,
+    ) -> schemas.BulkItemsResult:
+        """Bulk creation or replacement of items.
+
+        Args:
+            items: list of items.
+            chunk_size: number of items processed at a time.
+            collection_id: collection of the items, defaults to the collection of the request path.
+
+        Returns:
+            Outcome of each item (inserted, updated, unchanged or rejected).
+
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def bulk_item_stream(
+        self,
+        body: AsyncIterator[bytes],
+        chunk_size: Optional[int] = None,
+        collection_id: Optional[str] = None,
+        **kwargs,
+    ) -> schemas.BulkItemsResult:
+        """Bulk creation or replacement of items sent as newline-delimited JSON.
+
+        Args:
+            body: request body, read incrementally.
+            chunk_size: number of items processed at a time.
+            collection_id: collection of the items, items of other collections are rejected.
+
+        Returns:
+            Number of items of each outcome, and the rejected items.
+
+        """
+        raise NotImplementedError
+
 
 @attr.s  # type:ignore
 class BaseCoreClient(abc.ABC):
@@ -205,7 +247,11 @@ class BaseCoreClient(abc.ABC):
         token: Optional[str] = None,
         fields: Optional[List[str]] = None,
         sortby: Optional[str] = None,
-        **kwargs
+        filter: Optional[str] = None,
+        filter_lang: Optional[str] = None,
+        simplify: Optional[float] = None,
+        precision: Optional[int] = None,
+        **kwargs,
     ) -> Dict[str, Any]:
         """Cross catalog search (GET).
 
@@ -217,13 +263,21 @@ class BaseCoreClient(abc.ABC):
         ...
 
     @abc.abstractmethod
-    def get_item(self, id: str, **kwargs) -> schemas.Item:
+    def get_item(
+        self,
+        id: str,
+        simplify: Optional[float] = None,
+        precision: Optional[int] = None,
+        **kwargs,
+    ) -> schemas.Item:
         """Get item by id.
 
         Called with `GET /collections/{collectionId}/items/{itemId}`.
 
         Args:
             id: Id of the item.
+            simplify: geometry simplification tolerance.
+            precision: number of decimal digits of the geometry coordinates.
 
         Returns:
             Item.
@@ -257,7 +311,13 @@ class BaseCoreClient(abc.ABC):
 
     @abc.abstractmethod
     def item_collection(
-        self, id: str, limit: int = 10, token: str = None, **kwargs
+        self,
+        id: str,
+        limit: int = 10,
+        token: str = None,
+        simplify: Optional[float] = None,
+        precision: Optional[int] = None,
+        **kwargs,
     ) -> ItemCollection:
         """Get all items from a specific collection.
 
@@ -267,8 +327,281 @@ class BaseCoreClient(abc.ABC):
             id: id of the collection.
             limit: number of items to return.
             token: pagination token.
+            simplify: geometry simplification tolerance.
+            precision: number of decimal digits of the geometry coordinates.
 
         Returns:
             An ItemCollection.
         """
         ...
+
+
+@attr.s  # type:ignore
+class AsyncBaseCoreClient(abc.ABC):
+    """Defines a pattern for implementing STAC api core endpoints with coroutines.
+
+    Same interface as `BaseCoreClient`, the route factories await the methods of async clients on the event loop
+    instead of running them in the threadpool.
+
+    Attributes:
+        extensions: list of registered api extensions.
+    """
+
+    extensions: List[ApiExtension] = attr.ib(default=attr.Factory(list))
+
+    def extension_is_enabled(self, extension: Type[ApiExtension]) -> bool:
+        """Check if an api extension is enabled."""
+        return any([isinstance(ext, extension) for ext in self.extensions])
+
+    @abc.abstractmethod
+    async def landing_page(self, **kwargs) -> LandingPage:
+        """Landing page (`GET /`)."""
+        ...
+
+    @abc.abstractmethod
+    async def conformance(self, **kwargs) -> ConformanceClasses:
+        """Conformance classes (`GET /conformance`)."""
+        ...
+
+    @abc.abstractmethod
+    async def post_search(
+        self, search_request: schemas.STACSearch, **kwargs
+    ) -> Dict[str, Any]:
+        """Cross catalog search (`POST /search`)."""
+        ...
+
+    @abc.abstractmethod
+    async def get_search(
+        self,
+        collections: Optional[List[str]] = None,
+        ids: Optional[List[str]] = None,
+        bbox: Optional[List[NumType]] = None,
+        datetime: Optional[Union[str, datetime]] = None,
+        limit: Optional[int] = 10,
+        query: Optional[str] = None,
+        token: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        sortby: Optional[str] = None,
+        filter: Optional[str] = None,
+        filter_lang: Optional[str] = None,
+        simplify: Optional[float] = None,
+        precision: Optional[int] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """Cross catalog search (`GET /search`)."""
+        ...
+
+    @abc.abstractmethod
+    async def get_item(
+        self,
+        id: str,
+        simplify: Optional[float] = None,
+        precision: Optional[int] = None,
+        **kwargs,
+    ) -> schemas.Item:
+        """Get item by id (`GET /collections/{collectionId}/items/{itemId}`)."""
+        ...
+
+    @abc.abstractmethod
+    async def all_collections(self, **kwargs) -> List[schemas.Collection]:
+        """Get all available collections (`GET /collections`)."""
+        ...
+
+    @abc.abstractmethod
+    async def get_collection(self, id: str, **kwargs) -> schemas.Collection:
+        """Get collection by id (`GET /collections/{collectionId}`)."""
+        ...
+
+    @abc.abstractmethod
+    async def item_collection(
+        self,
+        id: str,
+        limit: int = 10,
+        token: str = None,
+        simplify: Optional[float] = None,
+        precision: Optional[int] = None,
+        **kwargs,
+    ) -> ItemCollection:
+        """Get all items from a specific collection (`GET /collections/{collectionId}/items`)."""
+        ...
+
+
+@attr.s  # type:ignore
+class BaseAggregationClient(abc.ABC):
+    """Defines a pattern for implementing the aggregation extension."""
+
+    @abc.abstractmethod
+    def aggregate(
+        self, search_request: schemas.AggregationRequest, **kwargs
+    ) -> schemas.AggregationCollection:
+        """Aggregate the items matched by a search.
+
+        Called with `POST /aggregate`.
+
+        Args:
+            search_request: search request parameters and aggregations.
+
+        Returns:
+            The result of each aggregation.
+        """
+        ...
+
+
+@attr.s  # type:ignore
+class BaseDiagnosticsClient(abc.ABC):
+    """Defines a pattern for implementing the diagnostics extension."""
+
+    @abc.abstractmethod
+    def explain_search(
+        self, search_request: schemas.STACSearch, **kwargs
+    ) -> schemas.QueryPlan:
+        """Explain a search.
+
+        Called with `POST /search/explain`.
+
+        Args:
+            search_request: search request parameters.
+
+        Returns:
+            The compiled query and its execution plan.
+        """
+        ...
+
+    @abc.abstractmethod
+    def pool_status(self, **kwargs) -> List[schemas.PoolStatus]:
+        """Database connection pool metrics.
+
+        Called with `GET /diagnostics/pools`.
+
+        Returns:
+            The metrics of each connection pool.
+        """
+        ...
+
+
+@attr.s  # type:ignore
+class BaseExportClient(abc.ABC):
+    """Defines a pattern for implementing the export extension."""
+
+    @abc.abstractmethod
+    def export_collection(self, id: str, **kwargs) -> Iterator[str]:
+        """Export every item of a collection.
+
+        Called with `GET /collections/{collectionId}/export`.
+
+        Args:
+            id: id of the collection.
+
+        Returns:
+            Newline-delimited GeoJSON items.
+        """
+        ...
+
+    @abc.abstractmethod
+    def export_search(
+        self, search_request: schemas.STACSearch, **kwargs
+    ) -> Iterator[str]:
+        """Export every item matched by a search.
+
+        Called with `POST /search/export`.
+
+        Args:
+            search_request: search request parameters.
+
+        Returns:
+            Newline-delimited GeoJSON items.
+        """
+        ...
+
+
+@attr.s  # type:ignore
+class BaseBatchSearchClient(abc.ABC):
+    """Defines a pattern for implementing the batch search extension."""
+
+    @abc.abstractmethod
+    def batch_search(
+        self, search_requests: List[schemas.STACSearch], **kwargs
+    ) -> List[Dict[str, Any]]:
+        """Run several searches at once.
+
+        Called with `POST /search/batch`.
+
+        Args:
+            search_requests: search request parameters of each search.
+
+        Returns:
+            The FeatureCollection of each search, in request order.
+        """
+        ...
+
+    @abc.abstractmethod
+    def get_items(self, items_request: schemas.ItemsByIds, **kwargs) -> Dict[str, Any]:
+        """Get items by id.
+
+        Called with `POST /search/ids`.
+
+        Args:
+            items_request: item ids and output options.
+
+        Returns:
+            A FeatureCollection of the items in request order, listing the ids which were not found.
+        """
+        ...
+
+
+@attr.s  # type:ignore
+class BaseIngestJobsClient(abc.ABC):
+    """Defines a pattern for implementing background ingest jobs."""
+
+    @abc.abstractmethod
+    async def submit_job(
+        self, collection_id: str, body: AsyncIterator[bytes], **kwargs
+    ) -> schemas.IngestJob:
+        """Stage newline-delimited items and queue a job writing them.
+
+        Called with `POST /collections/{collectionId}/bulk_items/jobs`.
+
+        Args:
+            collection_id: id of the collection.
+            body: request body, read incrementally.
+
+        Returns:
+            The queued job.
+        """
+        ...
+
+    @abc.abstractmethod
+    def get_job(self, id: str, **kwargs) -> schemas.IngestJob:
+        """Get the status and progress of a job.
+
+        Called with `GET /jobs/{jobId}`.
+
+        Args:
+            id: id of the job.
+
+        Returns:
+            The job.
+        """
+        ...
+
+    @abc.abstractmethod
+    def cancel_job(self, id: str, **kwargs) -> schemas.IngestJob:
+        """Cancel a job, items which weren't written are dropped.
+
+        Called with `DELETE /jobs/{jobId}`.
+
+        Args:
+            id: id of the job.
+
+        Returns:
+            The cancelled job.
+        """
+        ...
+
+    def resume_jobs(self) -> None:
+        """Resume the jobs left unfinished by a previous run, called on startup."""
+        pass
+
+    def shutdown(self) -> None:
+        """Stop the workers, called on shutdown."""
+        pass
@@ -0,0 +1,155 @@
+"""Search admission control."""
+import json
+import logging
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple, Type
+
+import attr
+from sqlalchemy.orm import Query
+from sqlalchemy.orm import Session as SqlSession
+
+from stac_api import config
+from stac_api.clients.postgres.explain import Explain
+from stac_api.config import ApiSettings
+from stac_api.errors import SearchTooExpensive
+from stac_api.models import database, schemas
+
+if TYPE_CHECKING:
+    from stac_api.clients.postgres.async_session import AsyncConnection
+
+logger = logging.getLogger(__name__)
+
+
+@attr.s
+class AdmissionControl:
+    """Estimate the cost of a search before running it.
+
+    The cost is estimated with `EXPLAIN` (without `ANALYZE`, so the query is only planned):
+    - searches whose first page is estimated to cost more than `max_cost` are rejected with the filters which would
+      make them cheaper.
+    - searches estimated to match more than `max_count_rows` items are downgraded: the exact count of the context
+      extension, which reads every matched row, is skipped.
+    - every query of the search is bounded by `statement_timeout`.
+
+    Attributes:
+        max_cost: maximum estimated cost (postgres cost units) of the first page.
+        max_count_rows: maximum estimated number of matched items to count.
+        statement_timeout: statement timeout (milliseconds).
+        item_table: item ORM model.
+    """
+
+    max_cost: Optional[float] = attr.ib(default=None)
+    max_count_rows: Optional[int] = attr.ib(default=None)
+    statement_timeout: Optional[int] = attr.ib(default=None)
+    item_table: Type[database.Item] = attr.ib(default=database.Item)
+
+    @classmethod
+    def from_settings(
+        cls, settings: ApiSettings, item_table: Type[database.Item] = database.Item
+    ) -> "AdmissionControl":
+        """Create from api settings."""
+        return cls(
+            max_cost=settings.search_max_cost,
+            max_count_rows=settings.search_max_count_rows,
+            statement_timeout=settings.search_statement_timeout,
+            item_table=item_table,
+        )
+
+    @staticmethod
+    def _estimates(plan: Any) -> Tuple[float, int]:
+        """Read the estimated cost and number of rows of a JSON plan."""
+        if isinstance(plan, str):
+            # asyncpg returns json values as text
+            plan = json.loads(plan)
+        plan = plan[0]["Plan"]
+        return plan["Total Cost"], plan["Plan Rows"]
+
+    @classmethod
+    def estimate(cls, session: SqlSession, query: Query) -> Tuple[float, int]:
+        """Estimate the cost and number of rows of a query."""
+        return cls._estimates(session.execute(Explain(query, format="json")).scalar())
+
+    def suggestions(self, search_request: schemas.STACSearch) -> List[str]:
+        """List the filters which would reduce the cost of a search."""
+        suggestions = []
+        if not search_request.collections:
+            suggestions.append("Add a `collections` filter")
+        if not search_request.datetime:
+            suggestions.append("Add a `datetime` range")
+        if not search_request.bbox and not search_request.intersects:
+            suggestions.append("Add a `bbox` or `intersects` filter")
+        elif search_request.intersects:
+            suggestions.append("Use a smaller `intersects` geometry")
+        for sort in search_request.sortby or []:
+            if (
+                self.item_table.get_column(sort.field) is None
+                and sort.field not in config.settings.sortable_queryables
+            ):
+                suggestions.append(
+                    f"Sort by an indexed field instead of `{sort.field}` (ex. `datetime`)"
+                )
+        return suggestions
+
+    def _check_cost(self, cost: float, search_request: schemas.STACSearch) -> None:
+        if cost > self.max_cost:
+            raise SearchTooExpensive(
+                f"Search is estimated to cost {cost:.0f}, which exceeds the budget of {self.max_cost:.0f}",
+                suggestions=self.suggestions(search_request),
+                estimates={"cost": cost, "max_cost": self.max_cost},
+            )
+
+    def _countable(self, rows: int) -> bool:
+        if rows > self.max_count_rows:
+            logger.info(f"Skipping the count of a search matching ~{rows} items")
+            return False
+        return True
+
+    def admit(
+        self, session: SqlSession, query: Query, search_request: schemas.STACSearch
+    ) -> bool:
+        """Check the budget of a search.
+
+        Returns:
+            True if the exact count of the matched items may be computed.
+
+        Raises:
+            SearchTooExpensive: the first page is estimated to exceed the cost budget.
+        """
+        if self.statement_timeout:
+            # Scoped to the transaction of the request
+            session.execute(
+                f"SET LOCAL statement_timeout = {int(self.statement_timeout)}"
+            )
+
+        if self.max_cost is not None:
+            (cost, _) = self.estimate(session, query.limit(search_request.limit + 1))
+            self._check_cost(cost, search_request)
+
+        if self.max_count_rows is not None:
+            (_, rows) = self.estimate(session, query.order_by(None))
+            return self._countable(rows)
+        return True
+
+    async def admit_async(
+        self,
+        conn: "AsyncConnection",
+        query: Query,
+        search_request: schemas.STACSearch,
+    ) -> bool:
+        """Check the budget of a search run on an asyncpg connection (see `admit`)."""
+        if self.statement_timeout:
+            await conn.execute(
+                f"SET LOCAL statement_timeout = {int(self.statement_timeout)}"
+            )
+
+        if self.max_cost is not None:
+            plan = await conn.scalar(
+                Explain(query.limit(search_request.limit + 1), format="json")
+            )
+            (cost, _) = self._estimates(plan)
+            self._check_cost(cost, search_request)
+
+        if self.max_count_rows is not None:
+            plan = await conn.scalar(Explain(query.order_by(None), format="json"))
+            (_, rows) = self._estimates(plan)
+            return self._countable(rows)
+        return True
@@ -0,0 +1,91 @@
+"""aggregation extension client."""
+import logging
+from typing import Any, List
+
+import attr
+from sqlalchemy import func
+
+from stac_api.clients.base import BaseAggregationClient
+from stac_api.clients.postgres.core import CoreCrudClient
+from stac_api.clients.postgres.spatial import grid_bucket
+from stac_api.models import schemas
+
+logger = logging.getLogger(__name__)
+
+
+@attr.s
+class AggregationClient(CoreCrudClient, BaseAggregationClient):
+    """Aggregation extension specific operations.
+
+    Each aggregation is a single `GROUP BY` query over the items matched by the search, so the cost is independent
+    of the number of pages the caller would otherwise have to read.
+    """
+
+    def _group_key(self, aggregation: schemas.Aggregation) -> Any:
+        """Get the grouping expression of a bucket aggregation."""
+        if aggregation.type == schemas.AggregationType.collection:
+            return self.item_table.collection_id
+        elif aggregation.type == schemas.AggregationType.datetime:
+            return func.date_trunc(aggregation.interval.value, self.item_table.datetime)
+        elif aggregation.type == schemas.AggregationType.grid:
+            return grid_bucket(self.item_table, aggregation.precision)
+        column = self.item_table.get_column(aggregation.field)
+        if column is not None:
+            return column
+        # Group by the text value so values of any json type can be bucketed
+        return self.item_table.properties[aggregation.field.value].astext
+
+    def _buckets(
+        self, query, aggregation: schemas.Aggregation
+    ) -> List[schemas.AggregationBucket]:
+        key = self._group_key(aggregation).label("key")
+        count = func.count().label("count")
+        query = query.with_entities(key, count).group_by(key)
+        if aggregation.type == schemas.AggregationType.datetime:
+            # Histograms are returned in chronological order
+            query = query.order_by(key)
+        else:
+            query = query.filter(key.isnot(None)).order_by(count.desc(), key)
+        return [
+            schemas.AggregationBucket(
+                key=row.key.isoformat()
+                if aggregation.type == schemas.AggregationType.datetime
+                else row.key,
+                count=row.count,
+            )
+            for row in query.limit(aggregation.limit)
+        ]
+
+    def _stats(
+        self, query, aggregation: schemas.Aggregation
+    ) -> schemas.AggregationStats:
+        field = self.item_table.get_field(aggregation.field)
+        row = query.with_entities(
+            func.count(field).label("count"),
+            func.min(field).label("min"),
+            func.max(field).label("max"),
+            func.avg(field).label("avg"),
+            func.sum(field).label("sum"),
+        ).one()
+        return schemas.AggregationStats(**row._asdict())
+
+    def aggregate(
+        self, search_request: schemas.AggregationRequest, **kwargs
+    ) -> schemas.AggregationCollection:
+        """Aggregate the items matched by a search."""
+        with self.session.reader.context_session() as session:
+            query = self._filter_search(session.query(self.item_table), search_request)
+            matched = query.with_entities(func.count()).scalar()
+
+            results = []
+            for aggregation in search_request.aggregations:
+                result = schemas.AggregationResult(
+                    name=aggregation.name, type=aggregation.type
+                )
+                if aggregation.type == schemas.AggregationType.stats:
+                    result.stats = self._stats(query, aggregation)
+                else:
+                    result.buckets = self._buckets(query, aggregation)
+                results.append(result)
+
+        return schemas.AggregationCollection(matched=matched, aggregations=results)
@@ -0,0 +1,190 @@
+"""Asynchronous item crud client."""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
+import attr
+from sqlalchemy import func
+from sqlalchemy.orm import Query
+from stac_pydantic import ItemCollection
+from stac_pydantic.api import ConformanceClasses, LandingPage
+
+from stac_api import config
+from stac_api.api.extensions import ContextExtension
+from stac_api.clients.base import AsyncBaseCoreClient
+from stac_api.clients.postgres.admission import AdmissionControl
+from stac_api.clients.postgres.async_session import AsyncSession
+from stac_api.clients.postgres.core import CoreCrudClient
+from stac_api.clients.postgres.keyset import Bookmark, make_page, page_query
+from stac_api.clients.postgres.spatial import geometry_output
+from stac_api.errors import NotFoundError
+from stac_api.models import schemas
+
+logger = logging.getLogger(__name__)
+
+NumType = Union[float, int]
+
+
+@attr.s
+class AsyncCoreCrudClient(CoreCrudClient, AsyncBaseCoreClient):
+    """Client for core endpoints defined by stac, running queries with asyncpg.
+
+    Queries and responses are built by `CoreCrudClient`, only their execution differs: each request awaits its
+    queries on the event loop (see `stac_api.clients.postgres.async_session`), so a worker holds as many in-flight
+    requests as the connection pool allows instead of one per thread of the threadpool.  Reads are not routed across
+    replicas.
+    """
+
+    session: AsyncSession = attr.ib(default=attr.Factory(AsyncSession.create_from_env))
+
+    async def landing_page(self, **kwargs) -> LandingPage:
+        """Landing page."""
+        collections = await self.all_collections(request=kwargs["request"])
+        return self._landing_page(collections, **kwargs)
+
+    async def conformance(self, **kwargs) -> ConformanceClasses:
+        """Conformance classes."""
+        return super().conformance(**kwargs)
+
+    async def all_collections(self, **kwargs) -> List[schemas.Collection]:
+        """Read all collections from the database."""
+        async with self.session.reader.context_session() as conn:
+            rows = await conn.load(self.collection_table, Query(self.collection_table))
+        response = []
+        for (collection,) in rows:
+            collection.base_url = CoreCrudClient._get_base_url(kwargs["request"])
+            response.append(schemas.Collection.from_orm(collection))
+        return response
+
+    async def get_collection(self, id: str, **kwargs) -> schemas.Collection:
+        """Get collection by id."""
+        async with self.session.reader.context_session() as conn:
+            rows = await conn.load(
+                self.collection_table,
+                Query(self.collection_table)
+                .filter(self.collection_table.id == id)
+                .limit(1),
+            )
+        if not rows:
+            raise NotFoundError(f"{self.collection_table.__name__} {id} not found")
+        collection = rows[0][0]
+        collection.base_url = CoreCrudClient._get_base_url(kwargs["request"])
+        return schemas.Collection.from_orm(collection)
+
+    async def item_collection(
+        self,
+        id: str,
+        limit: int = 10,
+        token: str = None,
+        simplify: Optional[float] = None,
+        precision: Optional[int] = None,
+        **kwargs,
+    ) -> ItemCollection:
+        """Read an item collection from the database."""
+        bookmark = Bookmark.decode(token) if token else None
+        query = self._item_collection_query(None, id, simplify, precision)
+        async with self.session.reader.context_session() as conn:
+            count = None
+            if self.extension_is_enabled(ContextExtension):
+                count = await conn.scalar(
+                    query.statement.with_only_columns([func.count()])
+                )
+            rows = await conn.load(
+                self.item_table,
+                page_query(query, self._sort_keys(), per_page=limit, bookmark=bookmark),
+            )
+        page = make_page(rows, per_page=limit, bookmark=bookmark)
+        return self._item_collection_response(page, count, id, limit, **kwargs)
+
+    async def get_item(
+        self,
+        id: str,
+        simplify: Optional[float] = None,
+        precision: Optional[int] = None,
+        **kwargs,
+    ) -> schemas.Item:
+        """Get item by id."""
+        query = (
+            Query(self.item_table)
+            .options(*geometry_output(self.item_table, simplify, precision))
+            .filter(self.item_table.id == id)
+            .limit(1)
+        )
+        async with self.session.reader.context_session() as conn:
+            rows = await conn.load(self.item_table, query)
+        if not rows:
+            raise NotFoundError(f"{self.item_table.__name__} {id} not found")
+        item = rows[0][0]
+        item.base_url = CoreCrudClient._get_base_url(kwargs["request"])
+        return schemas.Item.from_orm(item)
+
+    async def get_search(
+        self,
+        collections: Optional[List[str]] = None,
+        ids: Optional[List[str]] = None,
+        bbox: Optional[List[NumType]] = None,
+        datetime: Optional[Union[str, datetime]] = None,
+        limit: Optional[int] = 10,
+        query: Optional[str] = None,
+        token: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        sortby: Optional[str] = None,
+        filter: Optional[str] = None,
+        filter_lang: Optional[str] = None,
+        simplify: Optional[float] = None,
+        precision: Optional[int] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """GET search catalog."""
+        search_request = self._get_search_request(
+            collections=collections,
+            ids=ids,
+            bbox=bbox,
+            datetime=datetime,
+            limit=limit,
+            query=query,
+            token=token,
+            fields=fields,
+            sortby=sortby,
+            filter=filter,
+            filter_lang=filter_lang,
+            simplify=simplify,
+            precision=precision,
+        )
+        resp = await self.post_search(search_request, request=kwargs["request"])
+        return self._get_search_response(resp, **kwargs)
+
+    async def post_search(
+        self, search_request: schemas.STACSearch, **kwargs
+    ) -> Dict[str, Any]:
+        """POST search catalog."""
+        bookmark = (
+            Bookmark.decode(search_request.token) if search_request.token else None
+        )
+        query = self._search_query(None, search_request)
+        admission = AdmissionControl.from_settings(
+            config.settings, item_table=self.item_table
+        )
+        async with self.session.reader.context_session() as conn:
+            countable = await admission.admit_async(conn, query, search_request)
+
+            count = None
+            if self.extension_is_enabled(ContextExtension):
+                if search_request.ids:
+                    count = len(search_request.ids)
+                elif countable:
+                    count = await conn.scalar(
+                        query.statement.with_only_columns([func.count()]).order_by(None)
+                    )
+
+            rows = await conn.load(
+                self.item_table,
+                page_query(
+                    query,
+                    self._sort_keys(search_request.sortby, search_request.ids),
+                    per_page=search_request.limit,
+                    bookmark=bookmark,
+                ),
+            )
+        page = make_page(rows, per_page=search_request.limit, bookmark=bookmark)
+        return self._search_response(page, count, search_request, **kwargs)
@@ -0,0 +1,284 @@
+"""Asynchronous database sessions (asyncpg).
+
+Queries are built with SQLAlchemy exactly as the synchronous clients build them, compiled for postgres and executed by
+asyncpg, so requests await the database on the event loop instead of holding a thread of the threadpool.  Bind and
+result processing is done by the SQLAlchemy types of the statement, so rows are converted as they would be by the ORM.
+
+Requires the async extra (`pip install .[async]`).
+"""
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, List, Optional, Sequence, Tuple, Type
+
+import attr
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql.base import PGDialect
+from sqlalchemy.orm import Query
+
+from stac_api import errors
+from stac_api.clients.postgres.session import PoolOptions
+from stac_api.models import database
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncpgDialect(PGDialect):
+    """Postgres dialect of the statements executed with asyncpg.
+
+    JSON values are serialized and parsed by SQLAlchemy (asyncpg exchanges them as text), numeric values are decoded
+    by asyncpg.
+    """
+
+    driver = "asyncpg"
+    default_paramstyle = "pyformat"
+    supports_native_decimal = True
+
+
+DIALECT = AsyncpgDialect()
+
+
+def _adapt(value: Any, type_name: str) -> Any:
+    """Adapt a parameter to the type inferred by postgres.
+
+    asyncpg encodes parameters with the binary codec of their type instead of letting the server cast text values, so
+    timestamps compared with strings (ex. search datetimes) are parsed, and `timestamp without time zone` parameters
+    must be naive.
+    """
+    if type_name not in ("timestamp", "timestamptz"):
+        return value
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return value
+    if type_name == "timestamp" and isinstance(value, datetime) and value.tzinfo:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+@attr.s
+class CompiledStatement:
+    """Statement compiled for asyncpg.
+
+    Attributes:
+        sql: SQL with numbered (`$1`) placeholders.
+        args: processed bind parameters, in placeholder order.
+        columns: name and result processor of each column of the result.
+    """
+
+    sql: str = attr.ib()
+    args: List[Any] = attr.ib(factory=list)
+    columns: List[Tuple[str, Optional[Callable]]] = attr.ib(factory=list)
+
+    @classmethod
+    def compile(cls, statement: Any) -> "CompiledStatement":
+        """Compile a statement, ORM queries are compiled to their select statement."""
+        if isinstance(statement, Query):
+            statement = statement.statement
+        if isinstance(statement, str):
+            return cls(sql=statement)
+        compiled = statement.compile(dialect=DIALECT)
+        params = compiled.construct_params()
+        processors = compiled._bind_processors
+
+        names = list(params)
+        args = []
+        for name in names:
+            value = params[name]
+            if name in processors:
+                value = processors[name](value)
+            args.append(value)
+
+        return cls(
+            sql=compiled.string % {name: f"${i}" for (i, name) in enumerate(names, 1)},
+            args=args,
+            columns=[
+                (name, type_._cached_result_processor(DIALECT, None))
+                for (_, name, _, type_) in compiled._result_columns
+            ],
+        )
+
+    def process(self, record: Sequence[Any]) -> Tuple:
+        """Convert a row with the result processors of its columns."""
+        return tuple(
+            processor(value) if processor else value
+            for ((_, processor), value) in zip(self.columns, record)
+        )
+
+
+def load_instances(
+    model: Type[database.BaseModel], names: Sequence[str], rows: Sequence[Tuple]
+) -> List[Tuple]:
+    """Create (transient) ORM instances from the rows of a query of a model.
+
+    Columns named after an attribute of the model (mapped columns and query expressions labelled after their
+    attribute) populate the instance, the other columns (ex. keyset sort keys) follow it in each row.
+
+    Returns:
+        A tuple `(instance, *other columns)` for each row.
+    """
+    mapper = sa.inspect(model)
+    attributes = {
+        column.name: prop.key for prop in mapper.column_attrs for column in prop.columns
+    }
+    positions = [(i, attributes.get(name, name)) for (i, name) in enumerate(names)]
+    fields = [(i, key) for (i, key) in positions if key in mapper.attrs]
+    others = [i for (i, key) in positions if key not in mapper.attrs]
+    return [
+        (model(**{key: row[i] for (i, key) in fields}), *[row[i] for i in others])
+        for row in rows
+    ]
+
+
+@attr.s
+class AsyncConnection:
+    """Connection of an asynchronous session, executes SQLAlchemy statements with asyncpg.
+
+    Attributes:
+        connection: asyncpg connection.
+    """
+
+    connection: Any = attr.ib()
+
+    async def _run(self, statement: Any) -> Tuple[CompiledStatement, List[Any]]:
+        compiled = CompiledStatement.compile(statement)
+        if not compiled.args:
+            return compiled, await self.connection.fetch(compiled.sql)
+        prepared = await self.connection.prepare(compiled.sql)
+        args = [
+            _adapt(value, param.name)
+            for (value, param) in zip(compiled.args, prepared.get_parameters())
+        ]
+        return compiled, await prepared.fetch(*args)
+
+    async def execute(self, statement: Any) -> None:
+        """Execute a statement (or raw SQL), discarding its result."""
+        await self._run(statement)
+
+    async def fetch(self, statement: Any) -> List[Tuple]:
+        """Execute a statement and read its processed rows."""
+        compiled, records = await self._run(statement)
+        return [compiled.process(record) for record in records]
+
+    async def scalar(self, statement: Any) -> Any:
+        """Execute a statement and read the first column of its first row."""
+        rows = await self.fetch(statement)
+        return rows[0][0] if rows else None
+
+    async def load(self, model: Type[database.BaseModel], query: Query) -> List[Tuple]:
+        """Execute an ORM query of a model and create its instances (see `load_instances`)."""
+        compiled, records = await self._run(query)
+        return load_instances(
+            model,
+            [name for (name, _) in compiled.columns],
+            [compiled.process(record) for record in records],
+        )
+
+
+@attr.s
+class AsyncSessionMaker:
+    """Manage an asyncpg connection pool, the asynchronous counterpart of `FastAPISessionMaker`.
+
+    The pool is created by the first session.  `PoolOptions.size` connections are kept open and up to
+    `PoolOptions.max_overflow` more are opened under load, idle connections are closed after `PoolOptions.recycle`
+    seconds.
+
+    Attributes:
+        database_uri: connection string.
+        pool: connection pool options.
+    """
+
+    database_uri: str = attr.ib()
+    pool: PoolOptions = attr.ib(factory=PoolOptions)
+
+    def __attrs_post_init__(self):
+        """Post init handler."""
+        self._pool = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def get_pool(self):
+        """Get the connection pool, creating it on first use."""
+        if self._pool is None:
+            import asyncpg
+
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                if self._pool is None:
+                    self._pool = await asyncpg.create_pool(
+                        self.database_uri,
+                        min_size=self.pool.size,
+                        max_size=self.pool.size + max(self.pool.max_overflow, 0),
+                        max_inactive_connection_lifetime=max(self.pool.recycle, 0),
+                    )
+        return self._pool
+
+    async def close(self) -> None:
+        """Close the connections of the pool."""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    @asynccontextmanager
+    async def context_session(self) -> AsyncIterator[AsyncConnection]:
+        """Open a transaction on a pooled connection, translating database errors as `FastAPISessionMaker` does."""
+        import asyncpg
+
+        pool = await self.get_pool()
+        try:
+            async with pool.acquire(timeout=self.pool.timeout) as connection:
+                async with connection.transaction():
+                    yield AsyncConnection(connection)
+        except asyncio.TimeoutError as e:
+            raise errors.PoolExhausted(
+                "no database connection is available, try again later"
+            ) from e
+        except asyncpg.UniqueViolationError as e:
+            raise errors.ConflictError("resource already exists") from e
+        except asyncpg.ForeignKeyViolationError as e:
+            raise errors.ForeignKeyError("collection does not exist") from e
+        except asyncpg.QueryCanceledError as e:
+            raise errors.SearchTooExpensive(
+                "query exceeded the statement timeout, add filters to reduce the number of matched items"
+            ) from e
+        except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError) as e:
+            logger.error(e, exc_info=True)
+            raise errors.DatabaseError("unhandled database error")
+
+
+@attr.s
+class AsyncSession:
+    """Asynchronous database session management.
+
+    Attributes:
+        reader_conn_string: reader connection string.
+        writer_conn_string: writer connection string.
+        reader_pool: connection pool options of the reader.
+        writer_pool: connection pool options of the writer.
+    """
+
+    reader_conn_string: str = attr.ib()
+    writer_conn_string: str = attr.ib()
+    reader_pool: PoolOptions = attr.ib(factory=PoolOptions)
+    writer_pool: PoolOptions = attr.ib(factory=PoolOptions)
+
+    @classmethod
+    def create_from_env(cls):
+        """Create from environment."""
+        return cls(
+            reader_conn_string=os.environ["READER_CONN_STRING"],
+            writer_conn_string=os.environ["WRITER_CONN_STRING"],
+        )
+
+    def __attrs_post_init__(self):
+        """Post init handler."""
+        self.reader = AsyncSessionMaker(self.reader_conn_string, pool=self.reader_pool)
+        self.writer = AsyncSessionMaker(self.writer_conn_string, pool=self.writer_pool)
+
+    async def close(self) -> None:
+        """Close the connection pools (ex. on application shutdown)."""
+        await self.reader.close()
+        await self.writer.close()
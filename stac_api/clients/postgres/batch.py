@@ -0,0 +1,184 @@
+"""Batch search extension client."""
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import attr
+import sqlalchemy as sa
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from stac_api import config
+from stac_api.api.extensions import ContextExtension, FieldsExtension
+from stac_api.clients.base import BaseBatchSearchClient
+from stac_api.clients.postgres.admission import AdmissionControl
+from stac_api.clients.postgres.async_session import load_instances
+from stac_api.clients.postgres.core import CoreCrudClient
+from stac_api.clients.postgres.keyset import Bookmark, make_page, page_query
+from stac_api.clients.postgres.spatial import geometry_output
+from stac_api.errors import InvalidQueryParameter
+from stac_api.models import schemas
+
+logger = logging.getLogger(__name__)
+
+
+def _union_key(search_request: schemas.STACSearch) -> Tuple:
+    """Get the key of a search, searches with the same key select the same columns.
+
+    Pages of searches with the same key can be read by a single `UNION ALL`.
+    """
+    sort_fields = tuple(sort.field for sort in search_request.sortby or [])
+    if not sort_fields and search_request.ids:
+        # Searches by ids are sorted by id only (see `CoreCrudClient._sort_keys`)
+        sort_fields = ("id",)
+    geometry_output = (
+        search_request.simplify is not None or search_request.precision is not None
+    )
+    return sort_fields, geometry_output
+
+
+@attr.s
+class BatchSearchClient(CoreCrudClient, BaseBatchSearchClient):
+    """Batch search extension specific operations.
+
+    Every search of a batch runs in one transaction on one reader connection.  The pages of searches selecting the
+    same columns (same sort fields and geometry output, see `_union_key`) are read by a single `UNION ALL` of their
+    paginated queries, each tagged with its position in the batch, and the counts of the context extension are read by
+    a single `SELECT` of scalar subqueries, so a batch usually costs two round trips instead of two per search.
+    Admission control (see `stac_api.clients.postgres.admission`) is applied to each search.
+
+    Items are read by id with a single `id = ANY(...)` query, without the sorting and pagination of searches.
+    """
+
+    def batch_search(
+        self, search_requests: List[schemas.STACSearch], **kwargs
+    ) -> List[Dict[str, Any]]:
+        """Run several searches at once, returning their FeatureCollections in request order."""
+        max_size = config.settings.search_batch_max_size
+        if len(search_requests) > max_size:
+            raise InvalidQueryParameter(
+                f"A batch holds at most {max_size} searches, got {len(search_requests)}"
+            )
+
+        with self.session.reader.context_session() as session:
+            admission = AdmissionControl.from_settings(
+                config.settings, item_table=self.item_table
+            )
+            queries = []
+            bookmarks: List[Optional[Bookmark]] = []
+            count_queries = {}
+            for (i, search_request) in enumerate(search_requests):
+                query = self._search_query(session, search_request)
+                countable = admission.admit(session, query, search_request)
+                if (
+                    self.extension_is_enabled(ContextExtension)
+                    and countable
+                    and not search_request.ids
+                ):
+                    count_queries[i] = (
+                        query.statement.with_only_columns([func.count()])
+                        .order_by(None)
+                        .label(f"count_{i}")
+                    )
+                queries.append(query)
+                bookmarks.append(
+                    Bookmark.decode(search_request.token)
+                    if search_request.token
+                    else None
+                )
+
+            counts: Dict[int, int] = {}
+            if count_queries:
+                row = session.execute(sa.select(list(count_queries.values()))).first()
+                counts = dict(zip(count_queries, row))
+
+            groups: Dict[Tuple, List[int]] = {}
+            for (i, search_request) in enumerate(search_requests):
+                groups.setdefault(_union_key(search_request), []).append(i)
+
+            rows: Dict[int, List[Tuple]] = {i: [] for i in range(len(search_requests))}
+            for positions in groups.values():
+                statements = [
+                    page_query(
+                        queries[i],
+                        self._sort_keys(
+                            search_requests[i].sortby, search_requests[i].ids
+                        ),
+                        per_page=search_requests[i].limit,
+                        bookmark=bookmarks[i],
+                    )
+                    .add_columns(sa.literal_column(str(i), sa.Integer).label("_batch"))
+                    .statement
+                    for i in positions
+                ]
+                statement = (
+                    statements[0] if len(statements) == 1 else sa.union_all(*statements)
+                )
+                result = session.execute(statement)
+                # The `_batch` column closes each row, after the sort keys read by `make_page`
+                for row in load_instances(self.item_table, result.keys(), result):
+                    rows[row[-1]].append(row[:-1])
+            logger.debug(
+                f"Ran a batch of {len(search_requests)} searches in {len(groups)} queries"
+            )
+
+        responses = []
+        for (i, search_request) in enumerate(search_requests):
+            page = make_page(
+                rows[i], per_page=search_request.limit, bookmark=bookmarks[i]
+            )
+            count = counts.get(i)
+            if self.extension_is_enabled(ContextExtension) and search_request.ids:
+                count = len(search_request.ids)
+            responses.append(
+                self._search_response(page, count, search_request, **kwargs)
+            )
+        return responses
+
+    def get_items(self, items_request: schemas.ItemsByIds, **kwargs) -> Dict[str, Any]:
+        """Get items by id, in request order, reporting missing ids instead of failing."""
+        # Duplicated ids are returned once
+        ids = list(dict.fromkeys(items_request.ids))
+        max_ids = config.settings.items_by_ids_max_size
+        if len(ids) > max_ids:
+            raise InvalidQueryParameter(
+                f"At most {max_ids} items may be requested at once, got {len(ids)}"
+            )
+
+        with self.session.reader.context_session() as session:
+            items = (
+                session.query(self.item_table)
+                .options(
+                    *geometry_output(
+                        self.item_table,
+                        items_request.simplify,
+                        items_request.precision,
+                    )
+                )
+                .filter(
+                    # A single array parameter, the statement doesn't grow with the number of ids
+                    self.item_table.id
+                    == sa.any_(sa.bindparam("ids", ids, type_=ARRAY(sa.VARCHAR)))
+                )
+                .all()
+            )
+            by_id = {item.id: item for item in items}
+
+            filter_kwargs = {}
+            if self.extension_is_enabled(FieldsExtension):
+                filter_kwargs = items_request.field.filter_fields
+
+            base_url = CoreCrudClient._get_base_url(kwargs["request"])
+            features = []
+            for id in ids:
+                if id not in by_id:
+                    continue
+                item = by_id[id]
+                item.base_url = base_url
+                features.append(schemas.Item.from_orm(item).to_dict(**filter_kwargs))
+
+        return {
+            "type": "FeatureCollection",
+            "features": features,
+            "missing": [id for id in ids if id not in by_id],
+            "links": [],
+        }
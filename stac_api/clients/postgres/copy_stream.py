@@ -0,0 +1,134 @@
+"""Bulk loading with `COPY ... FROM STDIN`.
+
+Rows are encoded in the text format of `COPY` and streamed to the server as they are produced, so loading a batch is
+a single statement and a single round trip, instead of one `INSERT` per row (psycopg2 `executemany`).  Values are
+encoded after the type of their column:
+    - JSONB values are serialized to JSON.
+    - arrays are written as array literals (`{1.0,"a b",NULL}`).
+    - geometries (GeoJSON, as bound to `GeojsonGeometry`) are written as hex EWKB, which postgis parses without
+      calling `ST_GeomFromGeoJSON`.
+"""
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import geoalchemy2 as ga
+import sqlalchemy as sa
+from shapely import wkb
+from shapely.geometry import shape
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import Connection
+
+NULL = "\\N"
+
+# Characters with a meaning in the text format, backslash first
+_ESCAPES = [("\\", "\\\\"), ("\t", "\\t"), ("\n", "\\n"), ("\r", "\\r")]
+
+
+def escape(value: str) -> str:
+    """Escape a value for the text format of `COPY`."""
+    for (char, escaped) in _ESCAPES:
+        if char in value:
+            value = value.replace(char, escaped)
+    return value
+
+
+def _array_element(value: Any) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, (list, tuple)):
+        return array_literal(value)
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{value}"'
+
+
+def array_literal(values: Iterable[Any]) -> str:
+    """Write a postgres array literal, elements other than numbers are quoted."""
+    return "{" + ",".join(_array_element(value) for value in values) + "}"
+
+
+def geometry_ewkb(value: Any, srid: int) -> str:
+    """Write a GeoJSON geometry (string or mapping) as hex EWKB."""
+    if isinstance(value, str):
+        value = json.loads(value)
+    return wkb.dumps(shape(value), hex=True, srid=srid)
+
+
+def encode(value: Any, column: sa.Column) -> str:
+    """Encode the value of a column in the text format of `COPY`."""
+    if value is None:
+        return NULL
+    if isinstance(column.type, ga.Geometry):
+        return geometry_ewkb(value, column.type.srid)
+    if isinstance(column.type, JSONB):
+        return escape(json.dumps(value))
+    if isinstance(column.type, sa.ARRAY):
+        return escape(array_literal(value))
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return escape(str(value))
+
+
+def copy_lines(rows: Iterable[Dict], columns: List[sa.Column]) -> Iterator[str]:
+    """Encode rows (keyed by column name) as the lines of a `COPY`, missing columns are NULL."""
+    for row in rows:
+        yield "\t".join(
+            encode(row.get(column.name), column) for column in columns
+        ) + "\n"
+
+
+class LineReader:
+    """File-like object reading lines from an iterator, as `cursor.copy_expert` reads its input.
+
+    Lines are only produced when the driver asks for more input, so rows are encoded while the previous ones are sent.
+    """
+
+    def __init__(self, lines: Iterable[str]):
+        """Create the reader."""
+        self._lines = iter(lines)
+        self._buffer = ""
+
+    def read(self, size: Optional[int] = -1) -> str:
+        """Read up to `size` characters (everything if negative)."""
+        while size is None or size < 0 or len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += line
+        if size is None or size < 0:
+            (data, self._buffer) = (self._buffer, "")
+        else:
+            (data, self._buffer) = (self._buffer[:size], self._buffer[size:])
+        return data
+
+
+def copy_rows(conn: Connection, table: sa.Table, rows: Iterable[Dict]) -> int:
+    """Load rows into a table with a single `COPY`.
+
+    Args:
+        conn: connection, the rows are loaded in its transaction.
+        table: target table.
+        rows: rows keyed by column name, keys which aren't columns of the table are ignored.
+
+    Returns:
+        The number of loaded rows.
+    """
+    preparer = conn.dialect.identifier_preparer
+    columns = list(table.columns)
+    statement = (
+        f"COPY {preparer.format_table(table)} "
+        f"({', '.join(preparer.format_column(column) for column in columns)}) "
+        "FROM STDIN"
+    )
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(statement, LineReader(copy_lines(rows, columns)))
+        return cursor.rowcount
+    finally:
+        cursor.close()
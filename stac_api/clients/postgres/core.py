@@ -6,22 +6,28 @@ from typing import Any, Dict, List, Optional, Type, Union
 from urllib.parse import urlencode, urljoin
 
 import attr
-import geoalchemy2 as ga
 import sqlalchemy as sa
-from sqlakeyset import get_page
 from sqlalchemy import func
+from sqlalchemy.orm import Query
 from sqlalchemy.orm import Session as SqlSession
 from stac_pydantic import ItemCollection
 from stac_pydantic.api import ConformanceClasses, LandingPage
 from stac_pydantic.api.extensions.paging import PaginationLink
+from stac_pydantic.api.extensions.sort import SortExtension as SortBy
 from stac_pydantic.shared import Link, MimeTypes, Relations
 
+from stac_api import config
 from stac_api.api.extensions import ContextExtension, FieldsExtension
 from stac_api.clients.base import BaseCoreClient
+from stac_api.clients.postgres.admission import AdmissionControl
+from stac_api.clients.postgres.filter import FilterCompiler
+from stac_api.clients.postgres.keyset import Bookmark, Page, get_page
+from stac_api.clients.postgres.query import compile_query
 from stac_api.clients.postgres.session import Session
+from stac_api.clients.postgres.spatial import geometry_output, intersects
 from stac_api.clients.postgres.tokens import PaginationTokenClient
-from stac_api.errors import NotFoundError
-from stac_api.models import database, schemas
+from stac_api.errors import InvalidQueryParameter, NotFoundError
+from stac_api.models import cql2, database, schemas
 from stac_api.models.links import CollectionLinks
 from stac_api.config import ApiSettings
 
@@ -59,6 +65,13 @@ class CoreCrudClient(PaginationTokenClient, BaseCoreClient):
 
     def landing_page(self, **kwargs) -> LandingPage:
         """Landing page."""
+        collections = self.all_collections(request=kwargs["request"])
+        return self._landing_page(collections, **kwargs)
+
+    def _landing_page(
+        self, collections: List[schemas.Collection], **kwargs
+    ) -> LandingPage:
+        """Create the landing page, with a link to each collection."""
         landing_page = LandingPage(
             title="Arturo STAC API",
             description="Arturo raster datastore",
@@ -88,7 +101,6 @@ class CoreCrudClient(PaginationTokenClient, BaseCoreClient):
                 ),
             ],
         )
-        collections = self.all_collections(request=kwargs["request"])
         for coll in collections:
             coll_link = CollectionLinks(
                 collection_id=coll.id, base_url=CoreCrudClient._get_base_url(kwargs["request"])
@@ -126,77 +138,109 @@ class CoreCrudClient(PaginationTokenClient, BaseCoreClient):
             return schemas.Collection.from_orm(collection)
 
     def item_collection(
-        self, id: str, limit: int = 10, token: str = None, **kwargs
+        self,
+        id: str,
+        limit: int = 10,
+        token: str = None,
+        simplify: Optional[float] = None,
+        precision: Optional[int] = None,
+        **kwargs,
     ) -> ItemCollection:
         """Read an item collection from the database."""
         with self.session.reader.context_session() as session:
-            collection_children = (
-                session.query(self.item_table)
-                .join(self.collection_table)
-                .filter(self.collection_table.id == id)
-                .order_by(self.item_table.datetime.desc(), self.item_table.id)
+            collection_children = self._item_collection_query(
+                session, id, simplify, precision
             )
             count = None
             if self.extension_is_enabled(ContextExtension):
                 count_query = collection_children.statement.with_only_columns(
                     [func.count()]
-                ).order_by(None)
+                )
                 count = collection_children.session.execute(count_query).scalar()
-            token = self.get_token(token) if token else token
-            page = get_page(collection_children, per_page=limit, page=(token or False))
-            # Create dynamic attributes for each page
-            page.next = (
-                self.insert_token(keyset=page.paging.bookmark_next)
-                if page.paging.has_next
-                else None
-            )
-            page.previous = (
-                self.insert_token(keyset=page.paging.bookmark_previous)
-                if page.paging.has_previous
-                else None
+            page = get_page(
+                collection_children,
+                self._sort_keys(),
+                per_page=limit,
+                bookmark=Bookmark.decode(token) if token else None,
             )
+            return self._item_collection_response(page, count, id, limit, **kwargs)
 
-            links = []
-            base_url = CoreCrudClient._get_base_url(kwargs["request"])
-            if page.next:
-                links.append(
-                    PaginationLink(
-                        rel=Relations.next,
-                        type="application/geo+json",
-                        href=f"{base_url}collections/{id}/items?token={page.next}&limit={limit}",
-                        method="GET",
-                    )
+    def _item_collection_query(
+        self,
+        session: Optional[SqlSession],
+        id: str,
+        simplify: Optional[float] = None,
+        precision: Optional[int] = None,
+    ) -> Query:
+        """Build the item query of a collection, the session may be omitted for queries executed without the ORM."""
+        return (
+            Query(self.item_table, session=session)
+            .options(*geometry_output(self.item_table, simplify, precision))
+            .filter(self.item_table.collection_id == id)
+        )
+
+    def _item_collection_response(
+        self, page: Page, count: Optional[int], id: str, limit: int, **kwargs
+    ) -> ItemCollection:
+        """Create the item collection of a page of the items of a collection."""
+        # Bookmarks are used as pagination tokens
+        page.next = page.next.encode() if page.next else None
+        page.previous = page.previous.encode() if page.previous else None
+
+        links = []
+        base_url = CoreCrudClient._get_base_url(kwargs["request"])
+        if page.next:
+            links.append(
+                PaginationLink(
+                    rel=Relations.next,
+                    type="application/geo+json",
+                    href=f"{base_url}collections/{id}/items?token={page.next}&limit={limit}",
+                    method="GET",
                 )
-            if page.previous:
-                links.append(
-                    PaginationLink(
-                        rel=Relations.previous,
-                        type="application/geo+json",
-                        href=f"{base_url}collections/{id}/items?token={page.previous}&limit={limit}",
-                        method="GET",
-                    )
+            )
+        if page.previous:
+            links.append(
+                PaginationLink(
+                    rel=Relations.previous,
+                    type="application/geo+json",
+                    href=f"{base_url}collections/{id}/items?token={page.previous}&limit={limit}",
+                    method="GET",
                 )
+            )
 
-            response_features = []
-            for item in page:
-                item.base_url = CoreCrudClient._get_base_url(kwargs["request"])
-                response_features.append(schemas.Item.from_orm(item))
+        response_features = []
+        for item in page:
+            item.base_url = CoreCrudClient._get_base_url(kwargs["request"])
+            response_features.append(schemas.Item.from_orm(item))
 
-            context_obj = None
-            if self.extension_is_enabled(ContextExtension):
-                context_obj = {"returned": len(page), "limit": limit, "matched": count}
+        context_obj = None
+        if self.extension_is_enabled(ContextExtension):
+            context_obj = {"returned": len(page), "limit": limit, "matched": count}
 
-            return ItemCollection(
-                type="FeatureCollection",
-                context=context_obj,
-                features=response_features,
-                links=links,
-            )
+        return ItemCollection(
+            type="FeatureCollection",
+            context=context_obj,
+            features=response_features,
+            links=links,
+        )
 
-    def get_item(self, id: str, **kwargs) -> schemas.Item:
+    def get_item(
+        self,
+        id: str,
+        simplify: Optional[float] = None,
+        precision: Optional[int] = None,
+        **kwargs,
+    ) -> schemas.Item:
         """Get item by id."""
         with self.session.reader.context_session() as session:
-            item = self._lookup_id(id, self.item_table, session)
+            item = (
+                session.query(self.item_table)
+                .options(*geometry_output(self.item_table, simplify, precision))
+                .filter(self.item_table.id == id)
+                .first()
+            )
+            if not item:
+                raise NotFoundError(f"{self.item_table.__name__} {id} not found")
             item.base_url = CoreCrudClient._get_base_url(kwargs["request"])
             return schemas.Item.from_orm(item)
 
@@ -211,9 +255,48 @@ class CoreCrudClient(PaginationTokenClient, BaseCoreClient):
         token: Optional[str] = None,
         fields: Optional[List[str]] = None,
         sortby: Optional[str] = None,
+        filter: Optional[str] = None,
+        filter_lang: Optional[str] = None,
+        simplify: Optional[float] = None,
+        precision: Optional[int] = None,
         **kwargs,
     ) -> Dict[str, Any]:
         """GET search catalog."""
+        search_request = self._get_search_request(
+            collections=collections,
+            ids=ids,
+            bbox=bbox,
+            datetime=datetime,
+            limit=limit,
+            query=query,
+            token=token,
+            fields=fields,
+            sortby=sortby,
+            filter=filter,
+            filter_lang=filter_lang,
+            simplify=simplify,
+            precision=precision,
+        )
+        resp = self.post_search(search_request, request=kwargs["request"])
+        return self._get_search_response(resp, **kwargs)
+
+    def _get_search_request(
+        self,
+        collections: Optional[List[str]] = None,
+        ids: Optional[List[str]] = None,
+        bbox: Optional[List[NumType]] = None,
+        datetime: Optional[Union[str, datetime]] = None,
+        limit: Optional[int] = 10,
+        query: Optional[str] = None,
+        token: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        sortby: Optional[str] = None,
+        filter: Optional[str] = None,
+        filter_lang: Optional[str] = None,
+        simplify: Optional[float] = None,
+        precision: Optional[int] = None,
+    ) -> schemas.STACSearch:
+        """Convert the query parameters of a GET search to a search request."""
         # Parse request parameters
         base_args = {
             "collections": collections,
@@ -223,6 +306,19 @@ class CoreCrudClient(PaginationTokenClient, BaseCoreClient):
             "token": token,
             "query": json.loads(query) if query else query,
         }
+        if filter:
+            # cql2-json filters are passed as encoded json (cql2-text is the default for GET requests)
+            if filter_lang == cql2.FilterLang.cql2_json:
+                try:
+                    filter = json.loads(filter)
+                except ValueError as e:
+                    raise InvalidQueryParameter(f"Invalid cql2-json filter: {e}")
+            base_args["filter"] = filter
+            base_args["filter-lang"] = filter_lang or cql2.FilterLang.cql2_text
+        if simplify is not None:
+            base_args["simplify"] = simplify
+        if precision is not None:
+            base_args["precision"] = precision
         if datetime:
             base_args["datetime"] = datetime
         if sortby:
@@ -249,11 +345,10 @@ class CoreCrudClient(PaginationTokenClient, BaseCoreClient):
                     includes.add(field)
             base_args["fields"] = {"include": includes, "exclude": excludes}
 
-        # Do the request
-        search_request = schemas.STACSearch(**base_args)
-        resp = self.post_search(search_request, request=kwargs["request"])
+        return schemas.STACSearch(**base_args)
 
-        # Pagination
+    def _get_search_response(self, resp: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        """Convert the pagination links of a POST search response to GET links."""
         page_links = []
         for link in resp["links"]:
             if link.rel == Relations.next or link.rel == Relations.previous:
@@ -270,153 +365,184 @@ class CoreCrudClient(PaginationTokenClient, BaseCoreClient):
         resp["links"] = page_links
         return resp
 
-    def post_search(
-        self, search_request: schemas.STACSearch, **kwargs
-    ) -> Dict[str, Any]:
-        """POST search catalog."""
-        with self.session.reader.context_session() as session:
-            token = (
-                self.get_token(search_request.token) if search_request.token else False
+    def _filter_search(self, query, search_request: schemas.STACSearch):
+        """Apply the filters of a search request to a query of the item table."""
+        # Filter by collection on the item table so the planner can prune partitions
+        if search_request.collections:
+            query = query.filter(
+                self.item_table.collection_id.in_(search_request.collections)
             )
-            query = session.query(self.item_table)
 
-            # Filter by collection
-            count = None
-            if search_request.collections:
-                query = query.join(self.collection_table).filter(
-                    sa.or_(
-                        *[
-                            self.collection_table.id == col_id
-                            for col_id in search_request.collections
-                        ]
-                    )
-                )
-
-            # Sort
-            if search_request.sortby:
-                sort_fields = [
-                    getattr(
-                        self.item_table.get_field(sort.field), sort.direction.value
-                    )()
-                    for sort in search_request.sortby
-                ]
-                sort_fields.append(self.item_table.id)
-                query = query.order_by(*sort_fields)
-            else:
-                # Default sort is date
-                query = query.order_by(
-                    self.item_table.datetime.desc(), self.item_table.id
-                )
+        # Ignore other parameters if ID is present
+        if search_request.ids:
+            return query.filter(
+                sa.or_(*[self.item_table.id == i for i in search_request.ids])
+            )
 
-            # Ignore other parameters if ID is present
-            if search_request.ids:
-                id_filter = sa.or_(
-                    *[self.item_table.id == i for i in search_request.ids]
+        # Spatial query
+        poly = search_request.polygon()
+        if poly:
+            query = query.filter(intersects(self.item_table, poly))
+
+        # Temporal query
+        if search_request.datetime:
+            # Two tailed query (between)
+            if ".." not in search_request.datetime:
+                query = query.filter(
+                    self.item_table.datetime.between(*search_request.datetime)
                 )
-                items = query.filter(id_filter).order_by(self.item_table.id)
-                page = get_page(items, per_page=search_request.limit, page=token)
-                if self.extension_is_enabled(ContextExtension):
-                    count = len(search_request.ids)
-                page.next = (
-                    self.insert_token(keyset=page.paging.bookmark_next)
-                    if page.paging.has_next
-                    else None
+            # All items after the start date
+            if search_request.datetime[0] != "..":
+                query = query.filter(
+                    self.item_table.datetime >= search_request.datetime[0]
                 )
-                page.previous = (
-                    self.insert_token(keyset=page.paging.bookmark_previous)
-                    if page.paging.has_previous
-                    else None
+            # All items before the end date
+            if search_request.datetime[1] != "..":
+                query = query.filter(
+                    self.item_table.datetime <= search_request.datetime[1]
                 )
 
-            else:
-                # Spatial query
-                poly = search_request.polygon()
-                if poly:
-                    filter_geom = ga.shape.from_shape(poly, srid=4326)
+        # Query fields
+        if search_request.query:
+            for (field_name, expr) in search_request.query.items():
+                for (op, value) in expr.items():
                     query = query.filter(
-                        ga.func.ST_Intersects(self.item_table.geometry, filter_geom)
+                        compile_query(self.item_table, field_name, op, value)
                     )
 
-                # Temporal query
-                if search_request.datetime:
-                    # Two tailed query (between)
-                    if ".." not in search_request.datetime:
-                        query = query.filter(
-                            self.item_table.datetime.between(*search_request.datetime)
-                        )
-                    # All items after the start date
-                    if search_request.datetime[0] != "..":
-                        query = query.filter(
-                            self.item_table.datetime >= search_request.datetime[0]
-                        )
-                    # All items before the end date
-                    if search_request.datetime[1] != "..":
-                        query = query.filter(
-                            self.item_table.datetime <= search_request.datetime[1]
-                        )
-
-                # Query fields
-                if search_request.query:
-                    for (field_name, expr) in search_request.query.items():
-                        field = self.item_table.get_field(field_name)
-                        for (op, value) in expr.items():
-                            query = query.filter(op.operator(field, value))
-
-                if self.extension_is_enabled(ContextExtension):
+        # Filter extension
+        if search_request.filter:
+            try:
+                expression = cql2.parse(
+                    search_request.filter, search_request.filter_lang
+                )
+            except cql2.CQL2ParseError as e:
+                raise InvalidQueryParameter(f"Invalid filter: {e}")
+            compiler = FilterCompiler(
+                item_table=self.item_table,
+                strict=config.settings.filter_strict_mode,
+            )
+            query = query.filter(compiler.compile(expression))
+
+        return query
+
+    def _sort_keys(
+        self, sortby: Optional[List[SortBy]] = None, ids: Optional[List[str]] = None
+    ) -> List[Any]:
+        """Get the ORDER BY clauses of a search, ties are broken on id so sort keys are unique (see `keyset`)."""
+        if not sortby and ids:
+            # Searches by ids are sorted by id, served by the primary key
+            return [self.item_table.id]
+        if not sortby:
+            # Default sort is date, served by the `(datetime, id)` index
+            return [self.item_table.datetime.desc(), self.item_table.id.desc()]
+        sort_fields = [
+            getattr(self.item_table.get_field(sort.field), sort.direction.value)()
+            for sort in sortby
+        ]
+        # Break ties on id in the direction of the last sort key, so `(field, id)` indexes are scanned in a
+        # single direction
+        sort_fields.append(getattr(self.item_table.id, sortby[-1].direction.value)())
+        return sort_fields
+
+    def _search_query(
+        self, session: Optional[SqlSession], search_request: schemas.STACSearch
+    ) -> Query:
+        """Build the (filtered and sorted) item query of a search request.
+
+        The session may be omitted for queries executed without the ORM (see `AsyncCoreCrudClient`).
+        """
+        query = Query(self.item_table, session=session).options(
+            *geometry_output(
+                self.item_table, search_request.simplify, search_request.precision
+            )
+        )
+        query = self._filter_search(query, search_request)
+        return query.order_by(
+            *self._sort_keys(search_request.sortby, search_request.ids)
+        )
+
+    def post_search(
+        self, search_request: schemas.STACSearch, **kwargs
+    ) -> Dict[str, Any]:
+        """POST search catalog."""
+        with self.session.reader.context_session() as session:
+            bookmark = (
+                Bookmark.decode(search_request.token) if search_request.token else None
+            )
+            query = self._search_query(session, search_request)
+            admission = AdmissionControl.from_settings(
+                config.settings, item_table=self.item_table
+            )
+            countable = admission.admit(session, query, search_request)
+
+            count = None
+            if self.extension_is_enabled(ContextExtension):
+                if search_request.ids:
+                    count = len(search_request.ids)
+                elif countable:
                     count_query = query.statement.with_only_columns(
                         [func.count()]
                     ).order_by(None)
                     count = query.session.execute(count_query).scalar()
-                page = get_page(query, per_page=search_request.limit, page=token)
-                # Create dynamic attributes for each page
-                page.next = (
-                    self.insert_token(keyset=page.paging.bookmark_next)
-                    if page.paging.has_next
-                    else None
-                )
-                page.previous = (
-                    self.insert_token(keyset=page.paging.bookmark_previous)
-                    if page.paging.has_previous
-                    else None
-                )
 
-            links = []
-            if page.next:
-                links.append(
-                    PaginationLink(
-                        rel=Relations.next,
-                        type="application/geo+json",
-                        href=f"{CoreCrudClient._get_base_url(kwargs['request'])}/search",
-                        method="POST",
-                        body={"token": page.next},
-                        merge=True,
-                    )
+            page = get_page(
+                query,
+                self._sort_keys(search_request.sortby, search_request.ids),
+                per_page=search_request.limit,
+                bookmark=bookmark,
+            )
+            return self._search_response(page, count, search_request, **kwargs)
+
+    def _search_response(
+        self,
+        page: Page,
+        count: Optional[int],
+        search_request: schemas.STACSearch,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """Create the FeatureCollection of a page of search results."""
+        # Bookmarks are used as pagination tokens
+        page.next = page.next.encode() if page.next else None
+        page.previous = page.previous.encode() if page.previous else None
+
+        links = []
+        if page.next:
+            links.append(
+                PaginationLink(
+                    rel=Relations.next,
+                    type="application/geo+json",
+                    href=f"{CoreCrudClient._get_base_url(kwargs['request'])}/search",
+                    method="POST",
+                    body={"token": page.next},
+                    merge=True,
                 )
-            if page.previous:
-                links.append(
-                    PaginationLink(
-                        rel=Relations.previous,
-                        type="application/geo+json",
-                        href=f"{CoreCrudClient._get_base_url(kwargs['request'])}/search",
-                        method="POST",
-                        body={"token": page.previous},
-                        merge=True,
-                    )
+            )
+        if page.previous:
+            links.append(
+                PaginationLink(
+                    rel=Relations.previous,
+                    type="application/geo+json",
+                    href=f"{CoreCrudClient._get_base_url(kwargs['request'])}/search",
+                    method="POST",
+                    body={"token": page.previous},
+                    merge=True,
                 )
+            )
 
-            response_features = []
-            filter_kwargs = {}
-            if self.extension_is_enabled(FieldsExtension):
-                filter_kwargs = search_request.field.filter_fields
-
-            xvals = []
-            yvals = []
-            for item in page:
-                item.base_url = CoreCrudClient._get_base_url(kwargs["request"])
-                item_model = schemas.Item.from_orm(item)
-                xvals += [item_model.bbox[0], item_model.bbox[2]]
-                yvals += [item_model.bbox[1], item_model.bbox[3]]
-                response_features.append(item_model.to_dict(**filter_kwargs))
+        response_features = []
+        filter_kwargs = {}
+        if self.extension_is_enabled(FieldsExtension):
+            filter_kwargs = search_request.field.filter_fields
+
+        xvals = []
+        yvals = []
+        for item in page:
+            item.base_url = CoreCrudClient._get_base_url(kwargs["request"])
+            item_model = schemas.Item.from_orm(item)
+            xvals += [item_model.bbox[0], item_model.bbox[2]]
+            yvals += [item_model.bbox[1], item_model.bbox[3]]
+            response_features.append(item_model.to_dict(**filter_kwargs))
 
         try:
             bbox = (min(xvals), min(yvals), max(xvals), max(yvals))
@@ -0,0 +1,57 @@
+"""diagnostics extension client."""
+import logging
+from datetime import datetime
+from typing import Any, List
+
+import attr
+
+from stac_api.clients.base import BaseDiagnosticsClient
+from stac_api.clients.postgres.core import CoreCrudClient
+from stac_api.clients.postgres.explain import Explain
+from stac_api.models import schemas
+
+logger = logging.getLogger(__name__)
+
+
+def _jsonable(value: Any) -> Any:
+    """Convert a bound parameter to a JSON value, geometries are rendered as hex encoded WKB."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for (k, v) in value.items()}
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+
+@attr.s
+class DiagnosticsClient(CoreCrudClient, BaseDiagnosticsClient):
+    """Diagnostics extension specific operations."""
+
+    def explain_search(
+        self, search_request: schemas.STACSearch, **kwargs
+    ) -> schemas.QueryPlan:
+        """Explain the first page of a search.
+
+        The query is built exactly as `post_search` builds it, then executed with `EXPLAIN (ANALYZE, BUFFERS)`.
+        """
+        with self.session.reader.context_session() as session:
+            # Pagination reads one extra row to know if there is a next page
+            query = self._search_query(session, search_request).limit(
+                search_request.limit + 1
+            )
+            compiled = query.statement.compile(dialect=session.bind.dialect)
+            plan = session.execute(Explain(query, analyze=True, format="json")).scalar()
+            return schemas.QueryPlan(
+                sql=str(compiled),
+                parameters={k: _jsonable(v) for (k, v) in compiled.params.items()},
+                plan=plan,
+            )
+
+    def pool_status(self, **kwargs) -> List[schemas.PoolStatus]:
+        """Metrics of the connection pools of the writer and readers."""
+        return [schemas.PoolStatus(**status) for status in self.session.pool_status()]
@@ -0,0 +1,31 @@
+"""EXPLAIN construct."""
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN a statement.
+
+    Compiles to `EXPLAIN (<options>) <statement>` with the bind parameters of the statement, so the plan reflects the
+    query exactly as it is executed by the API.
+    https://github.com/sqlalchemy/sqlalchemy/wiki/Query-Plan-SQL-construct
+    """
+
+    def __init__(self, statement, analyze: bool = False, format: str = "text"):
+        """Create the construct from a select statement or ORM query."""
+        self.statement = getattr(statement, "statement", statement)
+        self.analyze = analyze
+        self.format = format
+
+    @property
+    def options(self) -> str:
+        """EXPLAIN options."""
+        options = [f"FORMAT {self.format.upper()}"]
+        if self.analyze:
+            options = ["ANALYZE", "BUFFERS"] + options
+        return ", ".join(options)
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    return f"EXPLAIN ({element.options}) {compiler.process(element.statement, **kw)}"
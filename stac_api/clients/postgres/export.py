@@ -0,0 +1,83 @@
+"""export extension client."""
+import logging
+from typing import Callable, Dict, Iterator
+
+import attr
+from sqlalchemy.orm import Query
+from sqlalchemy.orm import Session as SqlSession
+
+from stac_api import config
+from stac_api.api.extensions import FieldsExtension
+from stac_api.clients.base import BaseExportClient
+from stac_api.clients.postgres.core import CoreCrudClient
+from stac_api.models import schemas
+
+logger = logging.getLogger(__name__)
+
+
+@attr.s
+class ExportClient(CoreCrudClient, BaseExportClient):
+    """Export extension specific operations.
+
+    Exports read every matched item from a single server-side cursor (a psycopg2 named cursor, enabled by
+    `yield_per`), fetching `ApiSettings.export_batch_size` rows per round trip.  Unlike paginated reads there are no
+    pagination tokens, keyset predicates or counts, and memory use is bounded by the batch size.  Rows are returned
+    in storage order unless the search is sorted.
+
+    Validation (ex. the collection exists, the filter parses) happens before the first line is sent, so errors are
+    still returned with a 4xx status code.
+    """
+
+    def _stream(
+        self,
+        build_query: Callable[[SqlSession], Query],
+        base_url: str,
+        filter_kwargs: Dict,
+    ) -> Iterator[str]:
+        """Stream the items of a query as newline-delimited GeoJSON."""
+        with self.session.reader.context_session() as session:
+            query = build_query(session).yield_per(config.settings.export_batch_size)
+            exported = 0
+            for item in query:
+                item.base_url = base_url
+                yield schemas.Item.from_orm(item).to_json(**filter_kwargs) + "\n"
+                # Don't keep exported items in the identity map
+                session.expunge(item)
+                exported += 1
+            logger.info(f"Exported {exported} items")
+
+    def export_collection(self, id: str, **kwargs) -> Iterator[str]:
+        """Export every item of a collection."""
+        with self.session.reader.context_session() as session:
+            self._lookup_id(id, self.collection_table, session)
+
+        def build_query(session: SqlSession) -> Query:
+            return session.query(self.item_table).filter(
+                self.item_table.collection_id == id
+            )
+
+        return self._stream(
+            build_query, CoreCrudClient._get_base_url(kwargs["request"]), {}
+        )
+
+    def export_search(
+        self, search_request: schemas.STACSearch, **kwargs
+    ) -> Iterator[str]:
+        """Export every item matched by a search, the limit and pagination token are ignored."""
+        with self.session.reader.context_session() as session:
+            # Compile the search up front so invalid searches are rejected before streaming
+            self._search_query(session, search_request)
+
+        def build_query(session: SqlSession) -> Query:
+            query = self._search_query(session, search_request)
+            if not search_request.sortby:
+                # Unsorted exports don't pay for the default sort
+                query = query.order_by(None)
+            return query
+
+        filter_kwargs = {}
+        if self.extension_is_enabled(FieldsExtension):
+            filter_kwargs = search_request.field.filter_fields
+        return self._stream(
+            build_query, CoreCrudClient._get_base_url(kwargs["request"]), filter_kwargs
+        )
@@ -0,0 +1,326 @@
+"""Collection extents and summaries client."""
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import attr
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Connection
+from starlette.concurrency import run_in_threadpool
+
+from stac_api import config
+from stac_api.clients.postgres.session import Session
+from stac_api.models import schemas
+
+logger = logging.getLogger(__name__)
+
+EXTENTS = "data.collection_extents"
+DELTAS = "data.collection_extent_deltas"
+SUMMARY_QUERYABLES = "data.summary_queryables"
+TIMESTAMP = """'YYYY-MM-DD"T"HH24:MI:SS"Z"'"""
+
+
+def summary_columns(fields: Iterable[str]) -> Dict[str, Tuple[str, str]]:
+    """Get the column prefix and SQL type of each summarized field, only numeric queryables have a range."""
+    columns = {}
+    for field in sorted(fields):
+        field_type = schemas.QueryableTypes.get(field)
+        if not issubclass(field_type, (sa.Numeric, sa.Integer)):
+            raise ValueError(f"Field {field} is not numeric, it can't be summarized")
+        columns[field] = (
+            field.replace(":", "_").replace("-", "_"),
+            field_type().compile(dialect=postgresql.dialect()),
+        )
+    return columns
+
+
+def _expression(field: str, field_type: str, table: str) -> str:
+    """Value of a field in a table of items, the expression must match `Item.get_field`."""
+    indexed_fields = config.settings.indexed_fields if config.settings else set()
+    if field in indexed_fields:
+        return f"{table}.{field.split(':')[-1]}"
+    return f"CAST({table}.properties ->> '{field}' AS {field_type})"
+
+
+def _aggregates(
+    columns: Dict[str, Tuple[str, str]], table: str, source: Optional[str] = None
+) -> str:
+    """Select the aggregates of a set of items, bounds are compared as by the delete trigger (`ST_Extent` rounds them outwards)."""
+    summaries = "".join(
+        f", min({_expression(field, field_type, table)}), max({_expression(field, field_type, table)})"
+        for (field, (_, field_type)) in columns.items()
+    )
+    return (
+        f"SELECT {table}.collection_id, min(ST_XMin({table}.geometry)), min(ST_YMin({table}.geometry)), "
+        f"max(ST_XMax({table}.geometry)), max(ST_YMax({table}.geometry)), "
+        f"min({table}.datetime), max({table}.datetime){summaries} "
+        f"FROM {source or table}"
+    )
+
+
+def _names(columns: Dict[str, Tuple[str, str]]) -> str:
+    """Column list of the aggregates, summary columns are added in any order by `install`."""
+    names = "".join(f", {column}_min, {column}_max" for (column, _) in columns.values())
+    return (
+        f"(collection_id, xmin, ymin, xmax, ymax, start_datetime, end_datetime{names})"
+    )
+
+
+def _functions(columns: Dict[str, Tuple[str, str]]) -> List[str]:
+    """Definitions of the functions maintaining the aggregates of the summarized fields."""
+    summaries = " || ".join(
+        [
+            f"CASE WHEN e.{column}_min IS NULL THEN '{{}}'::jsonb ELSE jsonb_build_object('{field}', "
+            f"jsonb_build_object('min', e.{column}_min, 'max', e.{column}_max)) END"
+            for (field, (column, _)) in columns.items()
+        ]
+        or ["'{}'::jsonb"]
+    )
+    publish = f"""
+        CREATE OR REPLACE FUNCTION data.publish_collection_extents(ids VARCHAR[]) RETURNS void AS $$
+        UPDATE data.collections c SET
+            extent = jsonb_build_object(
+                'spatial', jsonb_build_object('bbox', jsonb_build_array(jsonb_build_array(e.xmin, e.ymin, e.xmax, e.ymax))),
+                'temporal', jsonb_build_object('interval', jsonb_build_array(jsonb_build_array(
+                    to_char(e.start_datetime, {TIMESTAMP}), to_char(e.end_datetime, {TIMESTAMP})
+                )))
+            ),
+            summaries = COALESCE(c.summaries, '{{}}'::jsonb) || {summaries}
+        FROM {EXTENTS} e
+        WHERE e.collection_id = c.id AND c.id = ANY(ids)
+        $$ LANGUAGE sql
+    """
+    refresh = f"""
+        CREATE OR REPLACE FUNCTION data.refresh_collection_extent(collection VARCHAR) RETURNS void AS $$
+        BEGIN
+            DELETE FROM {EXTENTS} WHERE collection_id = collection;
+            INSERT INTO {EXTENTS} {_names(columns)}
+                {_aggregates(columns, "items", "data.items AS items")} WHERE items.collection_id = collection
+                GROUP BY items.collection_id;
+            PERFORM data.publish_collection_extents(ARRAY[collection]);
+        END
+        $$ LANGUAGE plpgsql
+    """
+
+    # Writers only append to the queue, so concurrent writes to a collection don't wait on each other
+    widen = f"""
+        CREATE OR REPLACE FUNCTION data.widen_collection_extents() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO {DELTAS} {_names(columns)}
+                {_aggregates(columns, "new_items")} GROUP BY new_items.collection_id;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """
+    # Deleted rows which lie on (or beyond) a merged bound queue a recomputation of their collection
+    on_bound = "".join(
+        f" OR {_expression(field, field_type, 'old_items')} <= e.{column}_min"
+        f" OR {_expression(field, field_type, 'old_items')} >= e.{column}_max"
+        for (field, (column, field_type)) in columns.items()
+    )
+    shrink = f"""
+        CREATE OR REPLACE FUNCTION data.shrink_collection_extents() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO {DELTAS} (collection_id, recompute)
+            SELECT DISTINCT old_items.collection_id, true
+            FROM old_items LEFT JOIN {EXTENTS} e USING (collection_id)
+            WHERE e.collection_id IS NULL
+                OR ST_XMin(old_items.geometry) <= e.xmin OR ST_YMin(old_items.geometry) <= e.ymin
+                OR ST_XMax(old_items.geometry) >= e.xmax OR ST_YMax(old_items.geometry) >= e.ymax
+                OR old_items.datetime <= e.start_datetime OR old_items.datetime >= e.end_datetime{on_bound};
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """
+
+    merged = "".join(
+        f", min({column}_min), max({column}_max)" for (column, _) in columns.values()
+    )
+    widened = "".join(
+        f", {column}_min = LEAST(e.{column}_min, excluded.{column}_min), "
+        f"{column}_max = GREATEST(e.{column}_max, excluded.{column}_max)"
+        for (column, _) in columns.values()
+    )
+    merge = f"""
+        CREATE OR REPLACE FUNCTION data.merge_collection_extents() RETURNS integer AS $$
+        DECLARE
+            widened VARCHAR[];
+            recomputed VARCHAR[];
+            collection VARCHAR;
+        BEGIN
+            -- Deltas queued while another merge runs are left to the next merge
+            IF NOT pg_try_advisory_xact_lock(hashtext('merge_collection_extents')) THEN
+                RETURN 0;
+            END IF;
+            WITH deltas AS (
+                DELETE FROM {DELTAS} RETURNING *
+            ), recompute AS (
+                SELECT DISTINCT collection_id FROM deltas WHERE recompute
+            ), upserted AS (
+                INSERT INTO {EXTENTS} AS e {_names(columns)}
+                SELECT collection_id, min(xmin), min(ymin), max(xmax), max(ymax),
+                    min(start_datetime), max(end_datetime){merged}
+                FROM deltas
+                WHERE collection_id NOT IN (SELECT collection_id FROM recompute)
+                GROUP BY collection_id
+                ON CONFLICT (collection_id) DO UPDATE SET
+                    xmin = LEAST(e.xmin, excluded.xmin),
+                    ymin = LEAST(e.ymin, excluded.ymin),
+                    xmax = GREATEST(e.xmax, excluded.xmax),
+                    ymax = GREATEST(e.ymax, excluded.ymax),
+                    start_datetime = LEAST(e.start_datetime, excluded.start_datetime),
+                    end_datetime = GREATEST(e.end_datetime, excluded.end_datetime){widened}
+                RETURNING collection_id
+            )
+            SELECT ARRAY(SELECT collection_id FROM upserted), ARRAY(SELECT collection_id FROM recompute)
+            INTO widened, recomputed;
+            PERFORM data.publish_collection_extents(widened);
+            FOREACH collection IN ARRAY recomputed LOOP
+                PERFORM data.refresh_collection_extent(collection);
+            END LOOP;
+            RETURN cardinality(widened) + cardinality(recomputed);
+        END
+        $$ LANGUAGE plpgsql
+    """
+    return [publish, refresh, widen, shrink, merge]
+
+
+def install(conn: Connection, fields: Iterable[str]) -> None:
+    """Maintain the range summaries of `fields`, and recompute the aggregates of every collection.
+
+    Columns of the aggregates are added and dropped to match the fields, the summaries of fields which are no longer
+    maintained are removed from the collections, and the functions are recreated (ex. after a summarized field was
+    promoted, see `ApiSettings.indexed_fields`).  Item writes are blocked until the transaction commits, and every
+    item is scanned.
+    """
+    columns = summary_columns(fields)
+    # Writers queue their aggregates before they commit, so none is left with the previous columns
+    conn.execute(f"LOCK TABLE {DELTAS} IN EXCLUSIVE MODE")
+    installed = {
+        row.field for row in conn.execute(f"SELECT field FROM {SUMMARY_QUERYABLES}")
+    }
+    for field in installed - set(columns):
+        column = field.replace(":", "_").replace("-", "_")
+        for table in (EXTENTS, DELTAS):
+            conn.execute(
+                f"ALTER TABLE {table} DROP COLUMN IF EXISTS {column}_min, DROP COLUMN IF EXISTS {column}_max"
+            )
+        conn.execute(
+            sa.text(
+                "UPDATE data.collections SET summaries = summaries - :field "
+                "WHERE summaries ? :field"
+            ),
+            field=field,
+        )
+        conn.execute(
+            sa.text(f"DELETE FROM {SUMMARY_QUERYABLES} WHERE field = :field"),
+            field=field,
+        )
+    for (field, (column, field_type)) in columns.items():
+        if field in installed:
+            continue
+        for table in (EXTENTS, DELTAS):
+            conn.execute(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column}_min {field_type}, "
+                f"ADD COLUMN IF NOT EXISTS {column}_max {field_type}"
+            )
+        conn.execute(
+            sa.text(f"INSERT INTO {SUMMARY_QUERYABLES} (field) VALUES (:field)"),
+            field=field,
+        )
+
+    for function in _functions(columns):
+        conn.execute(function)
+
+    conn.execute(f"DELETE FROM {DELTAS}")
+    conn.execute(f"DELETE FROM {EXTENTS}")
+    conn.execute(
+        f"INSERT INTO {EXTENTS} {_names(columns)} {_aggregates(columns, 'items', 'data.items AS items')} "
+        "GROUP BY items.collection_id"
+    )
+    conn.execute(
+        f"SELECT data.publish_collection_extents(array_agg(collection_id)) FROM {EXTENTS}"
+    )
+
+
+@attr.s
+class CollectionExtentsClient:
+    """Collection extents and summaries.
+
+    Item writes don't update the collections: statement-level triggers on `data.items` queue the aggregates of the
+    written rows in `data.collection_extent_deltas` (see the `add collection extents` migration), an insert-only table,
+    so concurrent ingests into one collection never wait on each other nor rewrite its row.  `merge` folds the queue
+    into `data.collection_extents` and publishes the aggregates to the `extent` and `summaries` of the collection rows,
+    it is run every `collection_extents_merge_interval` seconds by each API process (one merge runs at a time), so
+    collections lag behind their items by about that interval.  Without an interval, merges must be scheduled
+    externally (`SELECT data.merge_collection_extents()`).
+
+    The summarized fields are set by `ApiSettings.summary_queryables`, and installed in the database by `refresh` (see
+    `scripts/refresh_collection_summaries.py`), processes warn on startup when the two differ.
+
+    Attributes:
+        session: database session.
+    """
+
+    session: Session = attr.ib(default=attr.Factory(Session.create_from_env))
+    _task: Optional[asyncio.Task] = attr.ib(default=None, init=False)
+
+    def __attrs_post_init__(self):
+        """Create sqlalchemy engine."""
+        self.engine = self.session.writer.cached_engine
+
+    def merge(self) -> int:
+        """Merge the queued aggregates, returns the number of updated collections."""
+        with self.engine.begin() as conn:
+            return conn.execute(
+                sa.select([sa.func.data.merge_collection_extents()])
+            ).scalar()
+
+    def installed_fields(self) -> Set[str]:
+        """Fields whose range summaries are maintained by the database."""
+        with self.engine.connect() as conn:
+            return {
+                row.field
+                for row in conn.execute(f"SELECT field FROM {SUMMARY_QUERYABLES}")
+            }
+
+    def refresh(self, fields: Iterable[str]) -> None:
+        """Maintain the range summaries of `fields` and recompute every collection (see `install`)."""
+        with self.engine.begin() as conn:
+            install(conn, fields)
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                count = await run_in_threadpool(self.merge)
+            except Exception:
+                logger.exception("Could not merge the collection extents")
+                continue
+            if count:
+                logger.debug(f"Merged the extents of {count} collections")
+
+    async def start(self) -> None:
+        """Start merging periodically, called on startup."""
+        fields = set(config.settings.summary_queryables)
+        installed = await run_in_threadpool(self.installed_fields)
+        if installed != fields:
+            logger.warning(
+                f"Collections summarize {sorted(installed)} instead of {sorted(fields)}, "
+                "run scripts/refresh_collection_summaries.py"
+            )
+        interval = config.settings.collection_extents_merge_interval
+        if interval is not None:
+            self._task = asyncio.ensure_future(self._run(interval))
+
+    async def stop(self) -> None:
+        """Stop merging, called on shutdown, the queue is kept for the next merge."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
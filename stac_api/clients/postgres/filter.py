@@ -0,0 +1,310 @@
+"""Filter extension (CQL2) compiler."""
+from datetime import datetime
+from typing import Any, Optional, Tuple, Type
+
+import attr
+import geoalchemy2 as ga
+import sqlalchemy as sa
+from shapely.geometry import shape
+from sqlalchemy.sql.elements import ColumnElement
+
+from stac_api import config
+from stac_api.clients.postgres.query import compile_query
+from stac_api.clients.postgres.spatial import intersects
+from stac_api.errors import InvalidQueryParameter
+from stac_api.models import database
+from stac_api.models.cql2 import (
+    Expression,
+    Geometry,
+    Interval,
+    Node,
+    Property,
+    Timestamp,
+)
+from stac_api.models.schemas import Operator, Queryables
+
+# A compiled predicate and whether it can be served by an index
+Predicate = Tuple[ColumnElement, bool]
+
+COMPARISON_OPERATORS = {
+    "=": Operator.eq,
+    "<>": Operator.ne,
+    "<": Operator.lt,
+    "<=": Operator.le,
+    ">": Operator.gt,
+    ">=": Operator.ge,
+}
+
+# Comparison operators with their operands swapped (ex. `10 > eo:cloud_cover`)
+REVERSED_OPERATORS = {
+    "=": "=",
+    "<>": "<>",
+    "<": ">",
+    "<=": ">=",
+    ">": "<",
+    ">=": "<=",
+}
+
+SPATIAL_FUNCTIONS = {
+    "s_intersects": "ST_Intersects",
+    "s_equals": "ST_Equals",
+    "s_disjoint": "ST_Disjoint",
+    "s_touches": "ST_Touches",
+    "s_within": "ST_Within",
+    "s_overlaps": "ST_Overlaps",
+    "s_crosses": "ST_Crosses",
+    "s_contains": "ST_Contains",
+}
+
+# Core fields which are stored as indexed columns
+CORE_COLUMNS = {
+    "id": "id",
+    "collection": "collection_id",
+    "datetime": "datetime",
+    "geometry": "geometry",
+}
+
+
+@attr.s
+class FilterCompiler:
+    """Compile a CQL2 expression (see `stac_api.models.cql2`) to a SQL predicate.
+
+    Comparisons on queryables are compiled by the query extension compiler (`compile_query`) so both extensions use
+    the same indexes.  The compiler also tracks whether each predicate can be served by an index: a conjunction is
+    indexed if any of its terms is (the other terms are checked against the candidate rows), a disjunction only if all of
+    its terms are (bitmap OR) and negations never are.  In strict mode filters which can't be served by an index are
+    rejected instead of falling back to a sequential scan.
+
+    Attributes:
+        item_table: item ORM model.
+        strict: reject filters which can't be served by an index.
+    """
+
+    item_table: Type[database.Item] = attr.ib(default=database.Item)
+    strict: bool = attr.ib(default=False)
+
+    def compile(self, node: Node) -> ColumnElement:
+        """Compile a filter expression."""
+        clause, indexed = self._compile(node)
+        if self.strict and not indexed:
+            raise InvalidQueryParameter(
+                "Filter can't be served by an index, add a predicate on an indexed field "
+                "(id, collection, datetime, geometry, equality on a property or a pattern on a text queryable)"
+            )
+        return clause
+
+    def _compile(self, node: Node) -> Predicate:
+        if isinstance(node, bool):
+            return (sa.true() if node else sa.false()), not node
+        if not isinstance(node, Expression):
+            raise InvalidQueryParameter(f"Expected a predicate, got {node}")
+
+        if node.op in ("and", "or"):
+            predicates = [self._compile(arg) for arg in node.args]
+            if node.op == "and":
+                return (
+                    sa.and_(*[p[0] for p in predicates]),
+                    any(p[1] for p in predicates),
+                )
+            return sa.or_(*[p[0] for p in predicates]), all(p[1] for p in predicates)
+        elif node.op == "not":
+            return sa.not_(self._compile(self._arg(node, 0))[0]), False
+        elif node.op in COMPARISON_OPERATORS:
+            prop, value = self._operands(node)
+            if isinstance(node.args[0], Property):
+                return self._compare(prop, node.op, value)
+            return self._compare(prop, REVERSED_OPERATORS[node.op], value)
+        elif node.op == "between":
+            prop = self._property(self._arg(node, 0))
+            low = self._compare(prop, ">=", self._literal(self._arg(node, 1)))
+            high = self._compare(prop, "<=", self._literal(self._arg(node, 2)))
+            return sa.and_(low[0], high[0]), low[1] and high[1]
+        elif node.op == "in":
+            return self._in(self._property(self._arg(node, 0)), self._arg(node, 1))
+        elif node.op == "like":
+            return self._like(
+                self._property(self._arg(node, 0)), self._literal(self._arg(node, 1))
+            )
+        elif node.op == "isnull":
+            return self._is_null(self._property(self._arg(node, 0)))
+        elif node.op in SPATIAL_FUNCTIONS:
+            return self._spatial(node)
+        elif node.op.startswith("t_"):
+            return self._temporal(node)
+        raise InvalidQueryParameter(f"Unsupported filter operator: {node.op}")
+
+    @staticmethod
+    def _arg(node: Expression, index: int) -> Any:
+        try:
+            return node.args[index]
+        except IndexError:
+            raise InvalidQueryParameter(
+                f"Operator {node.op} expects at least {index + 1} arguments"
+            )
+
+    def _operands(self, node: Expression) -> Tuple[Any, Any]:
+        """Get the (property, literal) operands of a binary operator."""
+        lhs, rhs = self._arg(node, 0), self._arg(node, 1)
+        if isinstance(rhs, Property) and not isinstance(lhs, Property):
+            lhs, rhs = rhs, lhs
+        return self._property(lhs), self._literal(rhs)
+
+    def _property(self, node: Any) -> Any:
+        """Resolve a property to a core column, a queryable or the name of an untyped JSONB property."""
+        if not isinstance(node, Property):
+            raise InvalidQueryParameter(f"Expected a property, got {node}")
+        name = node.name
+        if name.startswith("properties."):
+            name = name[len("properties.") :]
+        if name in CORE_COLUMNS:
+            return getattr(self.item_table, CORE_COLUMNS[name])
+        try:
+            return Queryables(name)
+        except ValueError:
+            return name
+
+    @staticmethod
+    def _literal(node: Any) -> Any:
+        if isinstance(node, Timestamp):
+            return node.value
+        if isinstance(node, (Expression, Property, Interval, Geometry)):
+            raise InvalidQueryParameter(f"Expected a literal, got {node}")
+        return node
+
+    def _is_column(self, prop: Any) -> bool:
+        if isinstance(prop, (Queryables, str)):
+            return False
+        return True
+
+    def _compare(self, prop: Any, op: str, value: Any) -> Predicate:
+        operator = COMPARISON_OPERATORS[op]
+        if self._is_column(prop):
+            return operator.operator(prop, value), operator != Operator.ne
+        if isinstance(prop, Queryables):
+            indexed = operator == Operator.eq or (
+                self.item_table.get_column(prop) is not None and operator != Operator.ne
+            )
+            return compile_query(self.item_table, prop, operator, value), indexed
+
+        # Untyped JSONB property
+        contains = self.item_table.properties.contains({prop: value})
+        if operator == Operator.eq:
+            return contains, True
+        elif operator == Operator.ne:
+            return sa.and_(self.item_table.properties.has_key(prop), ~contains), False
+        field = self.item_table.properties[prop].astext
+        if isinstance(value, bool):
+            field = field.cast(sa.Boolean)
+        elif isinstance(value, (int, float)):
+            field = field.cast(sa.Float)
+        elif isinstance(value, datetime):
+            field = field.cast(sa.TIMESTAMP)
+        return operator.operator(field, value), False
+
+    def _in(self, prop: Any, values: Any) -> Predicate:
+        if not isinstance(values, list):
+            raise InvalidQueryParameter(f"Operator in expects a list, got {values}")
+        values = [self._literal(v) for v in values]
+        if self._is_column(prop):
+            return prop.in_(values), True
+        if isinstance(prop, Queryables):
+            return compile_query(self.item_table, prop, Operator.in_, values), True
+        return (
+            sa.or_(*[self.item_table.properties.contains({prop: v}) for v in values]),
+            True,
+        )
+
+    def _like(self, prop: Any, pattern: Any) -> Predicate:
+        if not isinstance(pattern, str):
+            raise InvalidQueryParameter(
+                f"Operator like expects a string, got {pattern}"
+            )
+        if self._is_column(prop):
+            return sa.cast(prop, sa.Text).like(pattern), False
+        name = prop.value if isinstance(prop, Queryables) else prop
+        column = (
+            self.item_table.get_column(name) if isinstance(prop, Queryables) else None
+        )
+        if column is None:
+            column = self.item_table.properties[name].astext
+        # Patterns on text queryables are served by the trigram and `text_pattern_ops` indexes
+        return column.like(pattern), name in config.settings.text_queryables
+
+    def _is_null(self, prop: Any) -> Predicate:
+        if self._is_column(prop):
+            return prop.is_(None), True
+        if isinstance(prop, Queryables):
+            column = self.item_table.get_column(prop)
+            if column is not None:
+                return column.is_(None), True
+            prop = prop.value
+        return sa.not_(self.item_table.properties.has_key(prop)), False
+
+    def _spatial(self, node: Expression) -> Predicate:
+        lhs, rhs = self._arg(node, 0), self._arg(node, 1)
+        if isinstance(lhs, Geometry) and isinstance(rhs, Property):
+            # Swap the operands of symmetric operators, and the function of within/contains
+            lhs, rhs = rhs, lhs
+            node = Expression(
+                {"s_within": "s_contains", "s_contains": "s_within"}.get(
+                    node.op, node.op
+                ),
+                [lhs, rhs],
+            )
+        if self._property(lhs) is not self.item_table.geometry:
+            raise InvalidQueryParameter(
+                f"Spatial operators are only supported by the geometry field, got {lhs}"
+            )
+        if not isinstance(rhs, Geometry):
+            raise InvalidQueryParameter(f"Expected a geometry, got {rhs}")
+        if node.op == "s_intersects":
+            return intersects(self.item_table, shape(rhs.geojson)), True
+        geom = ga.shape.from_shape(shape(rhs.geojson), srid=4326)
+        func = getattr(ga.func, SPATIAL_FUNCTIONS[node.op])
+        # Every spatial predicate except disjoint implies a bounding box overlap, which is served by the GiST index
+        return func(self.item_table.geometry, geom), node.op != "s_disjoint"
+
+    def _temporal(self, node: Expression) -> Predicate:
+        lhs, rhs = self._arg(node, 0), self._arg(node, 1)
+        if isinstance(lhs, (Timestamp, Interval)):
+            lhs, rhs = rhs, lhs
+        if self._property(lhs) is not self.item_table.datetime:
+            raise InvalidQueryParameter(
+                f"Temporal operators are only supported by the datetime field, got {lhs}"
+            )
+        start, end = self._bounds(rhs)
+        field = self.item_table.datetime
+
+        # Items are instants, so each operator reduces to a range comparison
+        if node.op == "t_before":
+            clause = field < start if start else sa.false()
+        elif node.op == "t_after":
+            clause = field > end if end else sa.false()
+        elif node.op == "t_equals":
+            # An instant only equals another instant, open intervals can't be compared
+            if start is None or end is None:
+                raise InvalidQueryParameter(
+                    f"Operator t_equals expects a timestamp or a closed interval, got {rhs}"
+                )
+            clause = field == start if start == end else sa.false()
+        elif node.op in ("t_intersects", "t_during", "t_disjoint"):
+            strict = node.op == "t_during"
+            clauses = []
+            if start:
+                clauses.append(field > start if strict else field >= start)
+            if end:
+                clauses.append(field < end if strict else field <= end)
+            clause = sa.and_(*clauses) if clauses else sa.true()
+            if node.op == "t_disjoint":
+                return sa.not_(clause), False
+        else:
+            raise InvalidQueryParameter(f"Unsupported filter operator: {node.op}")
+        return clause, True
+
+    @staticmethod
+    def _bounds(node: Any) -> Tuple[Optional[datetime], Optional[datetime]]:
+        if isinstance(node, Timestamp):
+            return node.value, node.value
+        if isinstance(node, Interval):
+            return node.start, node.end
+        raise InvalidQueryParameter(f"Expected a timestamp or interval, got {node}")
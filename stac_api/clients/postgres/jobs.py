@@ -0,0 +1,454 @@
+"""Background ingest jobs client."""
+import json
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import attr
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+from starlette.concurrency import run_in_threadpool
+
+from stac_api import config
+from stac_api.clients.base import BaseIngestJobsClient
+from stac_api.clients.postgres.copy_stream import copy_rows
+from stac_api.clients.postgres.session import Session
+from stac_api.clients.postgres.transactions import (
+    BulkTransactionsClient,
+    ndjson_chunks,
+)
+from stac_api.errors import ConflictError, NotFoundError
+from stac_api.models import database, schemas
+
+logger = logging.getLogger(__name__)
+
+JOBS = database.IngestJob.__table__
+STAGED_ITEMS = database.IngestJobItem.__table__
+# Jobs which workers may run
+RUNNABLE = [
+    schemas.IngestJobStatus.queued.value,
+    schemas.IngestJobStatus.running.value,
+]
+UNFINISHED = [schemas.IngestJobStatus.staging.value, *RUNNABLE]
+
+
+def _lock_key(id: str) -> sa.sql.ColumnElement:
+    return sa.func.hashtext(f"ingest_job:{id}")
+
+
+def _rejected(number: int, reason: Any, id: Optional[str] = None) -> Dict:
+    """Rejected item, as listed by `IngestJob.errors`."""
+    return schemas.BulkItemStatus(
+        id=id,
+        status=schemas.BulkItemStatusType.rejected,
+        reason=f"line {number}: {reason}",
+    ).dict(exclude_none=True)
+
+
+@attr.s
+class IngestJobsClient(BaseIngestJobsClient):
+    """Background ingest jobs.
+
+    Submitting a job stages the lines of the request body in `data.ingest_job_items` (one `COPY` per
+    `ingest_job_chunk_size` lines, lines which aren't JSON objects are rejected right away), queues the job and returns
+    without writing any item.  Jobs are run by an in-process pool of `ingest_job_workers` threads: staged items are
+    upserted chunk by chunk (see `BulkTransactionsClient.bulk_item_upsert`), and the counts of each chunk are recorded
+    and its staged items deleted in one transaction, so `GET /jobs/{jobId}` reports the progress of the job.
+
+    A failed attempt (ex. the database is unavailable) leaves the items which weren't written staged, and the job is
+    run again after `ingest_job_retry_delay` seconds, doubled on each attempt.  The job fails after
+    `ingest_job_max_attempts` attempts, its staged items are kept until it is cancelled (see `cancel_job`).  Staged
+    items are only dropped once written, or when the job is cancelled or its body couldn't be read to the end.
+
+    Jobs are kept in the database, so any API process reports on any job.  A job being staged or run holds an advisory
+    lock on a dedicated connection.  Jobs left unfinished by a stopped or failed process are resumed on startup (see
+    `resume_jobs`) by whichever process takes their lock, the chunk which was being written may be written again,
+    which upserts leave unchanged.  Jobs whose staging was interrupted are failed.
+
+    Attributes:
+        session: database session.
+        bulk_transactions: writes the items of the jobs.
+    """
+
+    session: Session = attr.ib(default=attr.Factory(Session.create_from_env))
+    bulk_transactions: BulkTransactionsClient = attr.ib(
+        default=attr.Factory(
+            lambda self: BulkTransactionsClient(session=self.session), takes_self=True
+        )
+    )
+    _executor: Optional[ThreadPoolExecutor] = attr.ib(default=None, init=False)
+    _stopping: threading.Event = attr.ib(factory=threading.Event, init=False)
+
+    def __attrs_post_init__(self):
+        """Create sqlalchemy engine."""
+        self.engine = self.session.writer.cached_engine
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Worker pool, created on first use so it is sized after the injected settings."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=config.settings.ingest_job_workers,
+                thread_name_prefix="ingest-job",
+            )
+        return self._executor
+
+    def _lock(self, id: str) -> Optional[Connection]:
+        """Take the advisory lock of a job, returns the connection holding it (None if another process holds it)."""
+        conn = self.engine.connect()
+        try:
+            if conn.execute(
+                sa.select([sa.func.pg_try_advisory_lock(_lock_key(id))])
+            ).scalar():
+                return conn
+        except Exception:
+            conn.close()
+            raise
+        conn.close()
+        return None
+
+    def _unlock(self, conn: Connection, id: str) -> None:
+        try:
+            conn.execute(sa.select([sa.func.pg_advisory_unlock(_lock_key(id))]))
+        finally:
+            conn.close()
+
+    def _create(self, id: str, collection_id: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(
+                JOBS.insert().values(
+                    id=id,
+                    collection_id=collection_id,
+                    status=schemas.IngestJobStatus.staging.value,
+                )
+            )
+
+    def _record(
+        self,
+        conn: Connection,
+        id: str,
+        counts: Dict[str, int],
+        errors: List[Dict],
+    ) -> None:
+        """Add to the counts of a job, only the first `ingest_job_max_errors` rejected items are listed."""
+        params: Dict[str, Any] = {"id": id, **counts}
+        assignments = [f"{key} = {key} + :{key}" for key in counts]
+        if errors:
+            assignments.append(
+                "errors = (SELECT COALESCE(jsonb_agg(e ORDER BY n), '[]') FROM ("
+                "SELECT e, n FROM jsonb_array_elements(errors || CAST(:errors AS JSONB)) "
+                "WITH ORDINALITY AS t(e, n) ORDER BY n LIMIT :max_errors) AS s)"
+            )
+            params["errors"] = json.dumps(errors)
+            params["max_errors"] = config.settings.ingest_job_max_errors
+        conn.execute(
+            sa.text(
+                f"UPDATE {JOBS.fullname} SET {', '.join(assignments)} WHERE id = :id"
+            ),
+            **params,
+        )
+
+    def _stage(self, id: str, chunk: List[Tuple[int, Any]]) -> None:
+        """Stage a chunk of the request body, rejecting the lines which aren't items."""
+        rows = []
+        errors = []
+        for (number, value) in chunk:
+            if isinstance(value, dict):
+                rows.append({"job_id": id, "line": number, "item": value})
+                continue
+            errors.append(
+                _rejected(
+                    number, value if isinstance(value, ValueError) else "not an object"
+                )
+            )
+        with self.engine.begin() as conn:
+            if rows:
+                copy_rows(conn, STAGED_ITEMS, rows)
+            self._record(
+                conn,
+                id,
+                {
+                    "total": len(chunk),
+                    "processed": len(errors),
+                    "rejected": len(errors),
+                },
+                errors,
+            )
+
+    def _queue(self, id: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(
+                JOBS.update()
+                .where(JOBS.c.id == id)
+                .values(status=schemas.IngestJobStatus.queued.value)
+            )
+
+    def _finish(
+        self,
+        id: str,
+        status: schemas.IngestJobStatus,
+        error: Optional[str] = None,
+        drop_staged: bool = True,
+    ) -> None:
+        """Mark an unfinished job (staging, queued or running) as finished, dropping its staged items unless told otherwise."""
+        with self.engine.begin() as conn:
+            finished = conn.execute(
+                JOBS.update()
+                .where(sa.and_(JOBS.c.id == id, JOBS.c.status.in_(UNFINISHED)))
+                .values(status=status.value, finished=sa.func.now(), error=error)
+            ).rowcount
+            if finished and drop_staged:
+                conn.execute(STAGED_ITEMS.delete().where(STAGED_ITEMS.c.job_id == id))
+        if finished:
+            logger.info(f"Ingest job {id} {status.value}")
+
+    def _requeue(self, id: str, error: str) -> None:
+        """Queue a running job again after a failed attempt, its staged items are kept."""
+        with self.engine.begin() as conn:
+            conn.execute(
+                JOBS.update()
+                .where(
+                    sa.and_(
+                        JOBS.c.id == id,
+                        JOBS.c.status == schemas.IngestJobStatus.running.value,
+                    )
+                )
+                .values(status=schemas.IngestJobStatus.queued.value, error=error)
+            )
+
+    async def submit_job(
+        self, collection_id: str, body: AsyncIterator[bytes], **kwargs
+    ) -> schemas.IngestJob:
+        """Stage newline-delimited items and queue a job writing them.
+
+        Lines are staged as they are received, so memory use is bounded by the chunk size.  The job fails if the body
+        can't be read to the end (ex. the client disconnects), and none of its items are written.
+        """
+        id = str(uuid.uuid4())
+        # Locked before it is created, so `resume_jobs` never fails a job which is being staged
+        lock = await run_in_threadpool(self._lock, id)
+        try:
+            await run_in_threadpool(self._create, id, collection_id)
+            try:
+                async for chunk in ndjson_chunks(
+                    body, config.settings.ingest_job_chunk_size
+                ):
+                    await run_in_threadpool(self._stage, id, chunk)
+            except Exception as e:
+                await run_in_threadpool(
+                    self._finish, id, schemas.IngestJobStatus.failed, f"staging: {e}"
+                )
+                raise
+            await run_in_threadpool(self._queue, id)
+        finally:
+            await run_in_threadpool(self._unlock, lock, id)
+
+        self.executor.submit(self.run_job, id)
+        return await run_in_threadpool(self.get_job, id)
+
+    def run_job(self, id: str) -> None:
+        """Run a job, unless another worker holds it or it is already finished.
+
+        Failed attempts are retried with exponential backoff, the job fails after `ingest_job_max_attempts` attempts.
+        """
+        max_attempts = config.settings.ingest_job_max_attempts
+        for attempt in range(1, max_attempts + 1):
+            if self._stopping.is_set():
+                return
+            try:
+                lock = self._lock(id)
+                if lock is None:
+                    return
+                try:
+                    self._run(id)
+                    return
+                finally:
+                    self._unlock(lock, id)
+            except Exception as e:
+                logger.exception(
+                    f"Ingest job {id} failed (attempt {attempt} of {max_attempts})"
+                )
+                error = str(e)
+
+            try:
+                if attempt == max_attempts:
+                    self._finish(
+                        id, schemas.IngestJobStatus.failed, error, drop_staged=False
+                    )
+                    return
+                self._requeue(id, error)
+            except Exception:
+                logger.exception(f"Could not record the failure of ingest job {id}")
+                return
+            # Interrupted by shutdown, the job is resumed on the next startup
+            if self._stopping.wait(
+                config.settings.ingest_job_retry_delay * 2 ** (attempt - 1)
+            ):
+                return
+
+    def _run(self, id: str) -> None:
+        with self.engine.begin() as conn:
+            job = conn.execute(
+                sa.select([JOBS.c.status, JOBS.c.collection_id]).where(JOBS.c.id == id)
+            ).first()
+            if job is None or job.status not in RUNNABLE:
+                return
+            conn.execute(
+                JOBS.update()
+                .where(JOBS.c.id == id)
+                .values(
+                    status=schemas.IngestJobStatus.running.value,
+                    started=sa.func.coalesce(JOBS.c.started, sa.func.now()),
+                )
+            )
+
+        last_line = 0
+        while not self._stopping.is_set():
+            with self.engine.connect() as conn:
+                status = conn.execute(
+                    sa.select([JOBS.c.status]).where(JOBS.c.id == id)
+                ).scalar()
+                if status != schemas.IngestJobStatus.running.value:
+                    logger.info(f"Ingest job {id} {status}, stopping")
+                    return
+                rows = conn.execute(
+                    sa.select([STAGED_ITEMS.c.line, STAGED_ITEMS.c.item])
+                    .where(
+                        sa.and_(
+                            STAGED_ITEMS.c.job_id == id,
+                            STAGED_ITEMS.c.line > last_line,
+                        )
+                    )
+                    .order_by(STAGED_ITEMS.c.line)
+                    .limit(config.settings.ingest_job_chunk_size)
+                ).fetchall()
+            if not rows:
+                self._finish(id, schemas.IngestJobStatus.succeeded)
+                return
+
+            result = self.bulk_transactions.bulk_item_upsert(
+                schemas.BulkItems(items=[row.item for row in rows]),
+                collection_id=job.collection_id,
+            )
+            errors = [
+                _rejected(row.line, status.reason, status.id)
+                for (row, status) in zip(rows, result.items)
+                if status.status == schemas.BulkItemStatusType.rejected
+            ]
+            last_line = rows[-1].line
+            with self.engine.begin() as conn:
+                self._record(
+                    conn,
+                    id,
+                    {
+                        "processed": len(rows),
+                        "inserted": result.inserted,
+                        "updated": result.updated,
+                        "unchanged": result.unchanged,
+                        "rejected": result.rejected,
+                    },
+                    errors,
+                )
+                conn.execute(
+                    STAGED_ITEMS.delete().where(
+                        sa.and_(
+                            STAGED_ITEMS.c.job_id == id,
+                            STAGED_ITEMS.c.line <= last_line,
+                        )
+                    )
+                )
+        logger.info(f"Ingest job {id} interrupted, it is resumed on the next startup")
+
+    def get_job(self, id: str, **kwargs) -> schemas.IngestJob:
+        """Get the status and progress of a job."""
+        # Read from the writer, replicas may lag behind the progress of the job
+        with self.session.writer.context_session() as session:
+            job = session.query(database.IngestJob).get(id)
+            if job is None:
+                raise NotFoundError(f"Ingest job {id} not found")
+            return schemas.IngestJob(
+                id=job.id,
+                collection=job.collection_id,
+                status=job.status,
+                created=job.created,
+                started=job.started,
+                finished=job.finished,
+                total=job.total,
+                processed=job.processed,
+                inserted=job.inserted,
+                updated=job.updated,
+                unchanged=job.unchanged,
+                rejected=job.rejected,
+                errors=job.errors,
+                error=job.error,
+            )
+
+    def cancel_job(self, id: str, **kwargs) -> schemas.IngestJob:
+        """Cancel a queued, running or failed job, items which weren't written are dropped.
+
+        A running job stops after its current chunk.
+        """
+        with self.engine.begin() as conn:
+            status = conn.execute(
+                sa.select([JOBS.c.status]).where(JOBS.c.id == id).with_for_update()
+            ).scalar()
+            if status is None:
+                raise NotFoundError(f"Ingest job {id} not found")
+            if status in (
+                schemas.IngestJobStatus.staging.value,
+                schemas.IngestJobStatus.succeeded.value,
+            ):
+                raise ConflictError(f"Ingest job {id} is {status}")
+            if status != schemas.IngestJobStatus.cancelled.value:
+                conn.execute(
+                    JOBS.update()
+                    .where(JOBS.c.id == id)
+                    .values(
+                        status=schemas.IngestJobStatus.cancelled.value,
+                        finished=sa.func.now(),
+                    )
+                )
+                conn.execute(STAGED_ITEMS.delete().where(STAGED_ITEMS.c.job_id == id))
+                logger.info(f"Ingest job {id} cancelled")
+        return self.get_job(id)
+
+    def resume_jobs(self) -> None:
+        """Queue the unfinished jobs, called on startup.
+
+        Jobs which are run by another process are skipped by the workers (see `run_job`).  Jobs which are still staging
+        but aren't locked lost the request staging their body, they are failed.
+        """
+        with self.engine.connect() as conn:
+            jobs = conn.execute(
+                sa.select([JOBS.c.id, JOBS.c.status])
+                .where(JOBS.c.status.in_(UNFINISHED))
+                .order_by(JOBS.c.created)
+            ).fetchall()
+        ids = []
+        for (id, status) in jobs:
+            if status != schemas.IngestJobStatus.staging.value:
+                ids.append(id)
+                continue
+            lock = self._lock(id)
+            if lock is None:
+                continue
+            try:
+                self._finish(id, schemas.IngestJobStatus.failed, "staging: interrupted")
+            finally:
+                self._unlock(lock, id)
+        for id in ids:
+            self.executor.submit(self.run_job, id)
+        if ids:
+            logger.info(f"Resuming {len(ids)} ingest jobs")
+
+    def shutdown(self) -> None:
+        """Stop the workers when the application stops, off the event loop (see `IngestJobsExtension`).
+
+        Running jobs stop after their current chunk, jobs waiting to be retried stop right away, both are resumed by
+        the next startup.
+        """
+        self._stopping.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
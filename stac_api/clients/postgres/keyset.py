@@ -0,0 +1,350 @@
+"""Keyset pagination.
+
+Pages are read with a predicate on the sort keys of the last row of the previous page (the bookmark) instead of an
+offset, so reading a page costs the same wherever it is in the result set.  Consecutive sort keys with the same
+direction are compared as a row value (ex. `(datetime, id) < (:d, :i)`), which postgres serves with a single range
+scan of a multicolumn index.  Mixed directions are supported by expanding the comparison for each change of direction.
+
+Sort keys follow the default null ordering of postgres (nulls sort last in ascending order and first in descending
+order), so items which are missing a sorted field are paginated like any other item.
+
+Bookmarks are encoded in a compact binary format (see `Bookmark.encode`), which is small enough to be used as the
+pagination token itself.
+"""
+import struct
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+import attr
+import sqlalchemy as sa
+from sqlalchemy.orm import Query
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import ColumnElement
+
+from stac_api.errors import InvalidQueryParameter
+
+# Bookmark format version, stored in the header byte with the direction flag
+FORMAT_VERSION = 1
+EPOCH = datetime(1970, 1, 1)
+
+# Value tags
+_NULL = b"n"
+_TRUE = b"t"
+_FALSE = b"f"
+_INT = b"i"
+_FLOAT = b"d"
+_STR = b"s"
+_DATETIME = b"T"
+
+
+def _encode_varint(value: int) -> bytes:
+    """Encode an integer as a zigzag varint (small magnitudes take a single byte)."""
+    value = value << 1 if value >= 0 else (-value << 1) - 1
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _decode_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            break
+    value = (result >> 1) ^ -(result & 1)
+    return value, pos
+
+
+def _encode_value(value: Any) -> bytes:
+    if value is None:
+        return _NULL
+    if isinstance(value, bool):
+        return _TRUE if value else _FALSE
+    if isinstance(value, int):
+        return _INT + _encode_varint(value)
+    if isinstance(value, float):
+        return _FLOAT + struct.pack(">d", value)
+    if isinstance(value, str):
+        encoded = value.encode()
+        return _STR + _encode_varint(len(encoded)) + encoded
+    if isinstance(value, datetime):
+        if value.tzinfo:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return _DATETIME + _encode_varint((value - EPOCH) // timedelta(microseconds=1))
+    raise TypeError(f"Unsupported sort key value: {value!r}")
+
+
+def _decode_value(data: bytes, pos: int) -> Tuple[Any, int]:
+    tag = data[pos : pos + 1]
+    pos += 1
+    if tag == _NULL:
+        return None, pos
+    if tag in (_TRUE, _FALSE):
+        return tag == _TRUE, pos
+    if tag == _INT:
+        return _decode_varint(data, pos)
+    if tag == _FLOAT:
+        return struct.unpack_from(">d", data, pos)[0], pos + 8
+    if tag == _STR:
+        length, pos = _decode_varint(data, pos)
+        if pos + length > len(data):
+            raise ValueError("truncated string")
+        return data[pos : pos + length].decode(), pos + length
+    if tag == _DATETIME:
+        micros, pos = _decode_varint(data, pos)
+        return EPOCH + timedelta(microseconds=micros), pos
+    raise ValueError(f"unknown tag {tag!r}")
+
+
+@attr.s(frozen=True)
+class Bookmark:
+    """Position in a sorted result set.
+
+    Attributes:
+        values: sort key values of the row the page starts after (or before, when paginating backwards).
+        backwards: whether the bookmark points to the previous page.
+    """
+
+    values: Tuple = attr.ib(converter=tuple)
+    backwards: bool = attr.ib(default=False)
+
+    def encode(self) -> str:
+        """Encode the bookmark as a URL safe token.
+
+        The token is a header byte (format version and direction) followed by each value as a one byte type tag and
+        a compact payload (varints for integers, strings and timestamps), base64 encoded without padding.
+        """
+        data = bytes([FORMAT_VERSION << 1 | self.backwards])
+        data += b"".join(_encode_value(value) for value in self.values)
+        return urlsafe_b64encode(data).rstrip(b"=").decode()
+
+    @classmethod
+    def decode(cls, token: str) -> "Bookmark":
+        """Decode a token created by `Bookmark.encode`."""
+        try:
+            data = urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            if not data or data[0] >> 1 != FORMAT_VERSION:
+                raise ValueError("unknown format")
+            values = []
+            pos = 1
+            while pos < len(data):
+                value, pos = _decode_value(data, pos)
+                values.append(value)
+        except (ValueError, TypeError, IndexError, struct.error, UnicodeDecodeError):
+            raise InvalidQueryParameter(f"Invalid pagination token: {token}")
+        return cls(values=values, backwards=bool(data[0] & 1))
+
+
+@attr.s
+class Page:
+    """Page of a sorted result set.
+
+    Attributes:
+        items: rows of the page, in the order of the query.
+        next: bookmark of the next page, None on the last page.
+        previous: bookmark of the previous page, None on the first page.
+    """
+
+    items: List[Any] = attr.ib()
+    next: Optional[Bookmark] = attr.ib(default=None)
+    previous: Optional[Bookmark] = attr.ib(default=None)
+
+    def __iter__(self) -> Iterator[Any]:
+        """Iterate over the rows of the page."""
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        """Count the rows in the page."""
+        return len(self.items)
+
+
+@attr.s(frozen=True)
+class SortKey:
+    """Sort key of a query.
+
+    Attributes:
+        expression: sorted column or expression.
+        descending: sort direction.
+    """
+
+    expression: ColumnElement = attr.ib()
+    descending: bool = attr.ib(default=False)
+
+    @classmethod
+    def from_clause(cls, clause: ColumnElement) -> "SortKey":
+        """Create from an ORDER BY clause (ex. `Item.datetime.desc()`), undecorated clauses are ascending."""
+        if hasattr(clause, "__clause_element__"):
+            clause = clause.__clause_element__()
+        modifier = getattr(clause, "modifier", None)
+        if modifier in (operators.asc_op, operators.desc_op):
+            return cls(clause.element, modifier is operators.desc_op)
+        return cls(clause)
+
+    @property
+    def nullable(self) -> bool:
+        """Whether the key may be null, expressions other than columns are assumed to be nullable."""
+        return getattr(self.expression, "nullable", True)
+
+    def order_by(self, backwards: bool = False) -> ColumnElement:
+        """ORDER BY clause of the key, reversed when paginating backwards."""
+        if self.descending != backwards:
+            return self.expression.desc()
+        return self.expression.asc()
+
+
+def _bind(key: SortKey, value: Any) -> ColumnElement:
+    return sa.literal(value, type_=key.expression.type)
+
+
+def _row(keys: Sequence[SortKey], values: Sequence[Any]) -> Tuple[Any, Any]:
+    """Left and right hand sides of a (row value) comparison."""
+    if len(keys) == 1:
+        return keys[0].expression, _bind(keys[0], values[0])
+    return (
+        sa.tuple_(*[key.expression for key in keys]),
+        sa.tuple_(*[_bind(key, value) for (key, value) in zip(keys, values)]),
+    )
+
+
+def keyset_predicate(
+    keys: Sequence[SortKey], values: Sequence[Any], backwards: bool = False
+) -> ColumnElement:
+    """Predicate matching the rows which sort strictly after a bookmark (before when paginating backwards).
+
+    The lexicographic comparison is split into runs of keys which can be compared as a single row value: keys with
+    the same direction and a non null bookmark value, where only the first key of the run may be nullable (a null in
+    any other position would make the whole row comparison null).  Each run contributes a clause requiring the
+    previous runs to be equal:
+        `(a, b) < (:a, :b) OR ((a, b) = (:a, :b) AND c > :c)`
+    Mixed directions also get a redundant bound on the first key (ex. `a <= :a`) which the planner can use as an
+    index condition.
+    """
+    if len(keys) != len(values):
+        raise InvalidQueryParameter("Pagination token does not match the sort order")
+
+    clauses = []
+    equal: List[ColumnElement] = []
+    start = 0
+    while start < len(keys):
+        key = keys[start]
+        descending = key.descending != backwards
+        if values[start] is None:
+            # Nulls sort last in ascending order, only non null rows may follow in descending order
+            if descending:
+                clauses.append(sa.and_(*equal, key.expression.isnot(None)))
+            equal.append(key.expression.is_(None))
+            start += 1
+            continue
+
+        end = start + 1
+        while (
+            end < len(keys)
+            and keys[end].descending == key.descending
+            and not keys[end].nullable
+            and values[end] is not None
+        ):
+            end += 1
+        (lhs, rhs) = _row(keys[start:end], values[start:end])
+        after = lhs < rhs if descending else lhs > rhs
+        if key.nullable and not descending:
+            after = sa.or_(after, key.expression.is_(None))
+        clauses.append(sa.and_(*equal, after))
+        equal.append(lhs == rhs)
+        start = end
+
+    if not clauses:
+        return sa.false()
+    predicate = sa.or_(*clauses) if len(clauses) > 1 else clauses[0]
+
+    first = keys[0]
+    descending = first.descending != backwards
+    if len(clauses) > 1 and values[0] is not None:
+        if descending:
+            predicate = sa.and_(first.expression <= _bind(first, values[0]), predicate)
+        elif not first.nullable:
+            predicate = sa.and_(first.expression >= _bind(first, values[0]), predicate)
+    return predicate
+
+
+def page_query(
+    query: Query,
+    order_by: Sequence[ColumnElement],
+    per_page: int,
+    bookmark: Optional[Bookmark] = None,
+) -> Query:
+    """Build the query reading a page (see `get_page`), for callers which execute it themselves.
+
+    The sort key values are selected after the entity as `_keyset_<i>`, and the query reads one extra row.  Rows are
+    turned into a page by `make_page`.
+    """
+    keys = [SortKey.from_clause(clause) for clause in order_by]
+    backwards = bookmark.backwards if bookmark else False
+
+    query = query.order_by(None).order_by(*[key.order_by(backwards) for key in keys])
+    if bookmark:
+        query = query.filter(keyset_predicate(keys, bookmark.values, backwards))
+    query = query.add_columns(
+        *[key.expression.label(f"_keyset_{i}") for (i, key) in enumerate(keys)]
+    )
+    return query.limit(per_page + 1)
+
+
+def make_page(
+    rows: Sequence[Sequence[Any]], per_page: int, bookmark: Optional[Bookmark] = None
+) -> Page:
+    """Create a page from the rows read by a `page_query`, each row is the entity followed by its sort keys."""
+    backwards = bookmark.backwards if bookmark else False
+    has_more = len(rows) > per_page
+    rows = list(rows[:per_page])
+    if backwards:
+        rows.reverse()
+
+    items = [row[0] for row in rows]
+    if not rows:
+        return Page(items=items)
+    first = Bookmark(values=rows[0][1:], backwards=True)
+    last = Bookmark(values=rows[-1][1:])
+
+    if backwards:
+        # The previous page was entered from the page which follows it
+        return Page(items=items, next=last, previous=first if has_more else None)
+    return Page(
+        items=items,
+        next=last if has_more else None,
+        previous=first if bookmark else None,
+    )
+
+
+def get_page(
+    query: Query,
+    order_by: Sequence[ColumnElement],
+    per_page: int,
+    bookmark: Optional[Bookmark] = None,
+) -> Page:
+    """Read a page of a query.
+
+    The query must not be sorted (the ORDER BY clause is replaced) and the sort keys must be unique, which is usually
+    done by breaking ties on the primary key.  Sort key values are selected alongside each row so bookmarks don't
+    depend on the attributes of the ORM model, and one extra row is read to tell whether another page follows.
+
+    Args:
+        query: ORM query.
+        order_by: ORDER BY clauses.
+        per_page: maximum number of rows in the page.
+        bookmark: bookmark of the page, None for the first page.
+
+    Returns:
+        The page and bookmarks of its neighbours.
+    """
+    rows = page_query(query, order_by, per_page, bookmark).all()
+    return make_page(rows, per_page, bookmark)
@@ -0,0 +1,164 @@
+"""Database monitoring."""
+import json
+import logging
+import random
+import re
+import threading
+import time
+from typing import Any, Dict
+
+import attr
+import sqlalchemy as sa
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN = "EXPLAIN (FORMAT JSON)"
+
+
+@attr.s
+class SlowQueryLog:
+    """Log queries which take longer than a threshold.
+
+    Each record contains the query shape (the parametrized statement, so queries which only differ by their parameters
+    share a shape), the duration and the plan chosen by postgres.  Only a fraction of the slow queries are logged
+    (`sample_rate`), which bounds the cost of planning them a second time.  The plan is obtained without `ANALYZE` so
+    the query isn't executed twice.
+
+    Attributes:
+        threshold: minimum duration (seconds) of a logged query.
+        sample_rate: fraction of the slow queries which are logged.
+        explain: include the query plan in the record.
+    """
+
+    threshold: float = attr.ib()
+    sample_rate: float = attr.ib(default=0.1)
+    explain: bool = attr.ib(default=True)
+
+    def install(self, engine: sa.engine.Engine) -> None:
+        """Listen to the queries executed by an engine."""
+        sa.event.listen(engine, "before_cursor_execute", self._before_execute)
+        sa.event.listen(engine, "after_cursor_execute", self._after_execute)
+        sa.event.listen(engine, "handle_error", self._handle_error)
+
+    @staticmethod
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @staticmethod
+    def _handle_error(context):
+        # Failed statements don't reach `after_cursor_execute`, their start time must not be read by the next one
+        conn = context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_start"].pop()
+        if duration < self.threshold or random.random() >= self.sample_rate:
+            return
+        record = {
+            "duration_ms": round(duration * 1000, 3),
+            "query": re.sub(r"\s+", " ", statement).strip(),
+        }
+        if (
+            self.explain
+            and not executemany
+            and record["query"].upper().startswith("SELECT")
+        ):
+            record["plan"] = self._plan(cursor, statement, parameters)
+        logger.warning(f"Slow query: {json.dumps(record, default=str)}")
+
+    @staticmethod
+    def _plan(cursor, statement, parameters):
+        """Plan a query on the connection which ran it.
+
+        Within a transaction the plan is obtained in a savepoint, so a failure doesn't abort the transaction of the
+        request.
+        """
+        dbapi_conn = cursor.connection
+        savepoint = not dbapi_conn.autocommit
+        with dbapi_conn.cursor() as explain_cursor:
+            if savepoint:
+                explain_cursor.execute("SAVEPOINT slow_query_plan")
+            try:
+                explain_cursor.execute(f"{EXPLAIN} {statement}", parameters)
+                plan = explain_cursor.fetchone()[0]
+            except Exception as e:
+                logger.debug(f"Failed to explain slow query: {e}")
+                if savepoint:
+                    explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_plan")
+                return None
+            if savepoint:
+                explain_cursor.execute("RELEASE SAVEPOINT slow_query_plan")
+            return plan
+
+
+@attr.s
+class PoolMetrics:
+    """Connection pool metrics.
+
+    Wait times cover the whole checkout, including opening a new connection when the pool overflows.
+
+    Attributes:
+        checkouts: number of connections checked out.
+        timeouts: number of checkouts which timed out waiting for a connection.
+        wait_time: total time (seconds) spent waiting for a connection.
+        max_wait_time: longest wait (seconds) for a connection.
+    """
+
+    checkouts: int = attr.ib(default=0)
+    timeouts: int = attr.ib(default=0)
+    wait_time: float = attr.ib(default=0.0)
+    max_wait_time: float = attr.ib(default=0.0)
+    lock: threading.Lock = attr.ib(factory=threading.Lock, repr=False)
+
+    def record(self, wait_time: float, timed_out: bool = False) -> None:
+        """Record a checkout."""
+        with self.lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """Queue pool which records the time spent waiting for a connection (see `PoolMetrics`)."""
+
+    def __init__(self, *args, **kwargs):
+        """Create the pool."""
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except sa.exc.TimeoutError:
+            self.metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - start)
+        return conn
+
+    def recreate(self):
+        """Recreate the pool (ex. when the engine is disposed), metrics are kept."""
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the current state of the pool."""
+        metrics = self.metrics
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            "checkouts": metrics.checkouts,
+            "timeouts": metrics.timeouts,
+            "wait_time_avg_ms": round(
+                1000 * metrics.wait_time / max(metrics.checkouts + metrics.timeouts, 1),
+                3,
+            ),
+            "wait_time_max_ms": round(1000 * metrics.max_wait_time, 3),
+        }
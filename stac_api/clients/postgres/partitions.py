@@ -0,0 +1,209 @@
+"""Item table partitioning."""
+import hashlib
+import logging
+import re
+from datetime import datetime
+from typing import Iterable, List, Optional, Set, Type, Union
+
+import attr
+import psycopg2
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session as SqlSession
+
+from stac_api.models import database
+
+logger = logging.getLogger(__name__)
+
+# `pg_partitioned_table.partstrat` of each partitioning strategy
+COLLECTION = "l"
+DATETIME = "r"
+
+DEFAULT_PARTITION = "items_default"
+# Ids of the items of a partitioned table, which keeps them unique (see the `add item ids` migration)
+ITEM_IDS = "item_ids"
+
+
+def collection_partition(collection_id: str) -> str:
+    """Name of the partition holding the items of a collection.
+
+    Collection ids are arbitrary strings, the name is a readable slug suffixed by a hash to keep it unique and
+    within the 63 character limit of postgres identifiers.
+    """
+    slug = re.sub(r"[^a-z0-9]+", "_", collection_id.lower()).strip("_")[:40]
+    digest = hashlib.md5(collection_id.encode()).hexdigest()[:8]
+    return f"items_{slug}_{digest}"
+
+
+def month_start(value: datetime) -> datetime:
+    """Start of the month of a datetime."""
+    return datetime(value.year, value.month, 1)
+
+
+def next_month(value: datetime) -> datetime:
+    """Start of the month following a datetime."""
+    if value.month == 12:
+        return datetime(value.year + 1, 1, 1)
+    return datetime(value.year, value.month + 1, 1)
+
+
+def datetime_partition(value: datetime) -> str:
+    """Name of the partition holding the items of a month."""
+    return f"items_{value:%Y%m}"
+
+
+@attr.s
+class PartitionManager:
+    """Manage the partitions of the item table.
+
+    `data.items` may be list partitioned by `collection_id` (one partition per collection) or range partitioned by
+    `datetime` (one partition per month), see the `partition items` alembic migration.  The strategy is read from the
+    database catalog so the application can't disagree with the schema.  Rows which don't belong to any partition are
+    stored in the default partition.  Item ids are kept unique across partitions by `data.item_ids`, writing an id
+    which is used by another collection (or datetime) raises a unique violation.
+
+    Creating a partition locks the whole item table (`ACCESS EXCLUSIVE`), so partitions are created in their own short
+    transaction before the write which requires them, never in the transaction of the write: a partition left empty
+    by a write which is rolled back is harmless.  The lock is awaited for at most `lock_timeout`, so a partition
+    creation queued behind a long transaction fails instead of blocking every reader and writer queued behind it.
+    Writers creating the same partition concurrently both succeed.
+
+    Attributes:
+        item_table: item ORM model.
+        lock_timeout: maximum time partition creations wait for the lock of the item table.
+    """
+
+    item_table: Type[database.Item] = attr.ib(default=database.Item)
+    lock_timeout: str = attr.ib(default="5s")
+    _strategy: Optional[str] = attr.ib(default=None, init=False)
+    _months: Set[datetime] = attr.ib(factory=set, init=False)
+
+    def _quote(
+        self, conn: Union[Engine, Connection, SqlSession], identifier: str
+    ) -> str:
+        dialect = conn.bind.dialect if isinstance(conn, SqlSession) else conn.dialect
+        return dialect.identifier_preparer.quote(identifier)
+
+    def _qualified(self, conn: Union[Engine, Connection, SqlSession], name: str) -> str:
+        schema = self.item_table.__table__.schema
+        return f"{self._quote(conn, schema)}.{self._quote(conn, name)}"
+
+    def _create_partition(
+        self, engine: Engine, name: str, bounds: str, **params
+    ) -> None:
+        """Create a partition in its own transaction, a partition created concurrently by another writer is kept."""
+        try:
+            with engine.begin() as conn:
+                conn.execute(f"SET LOCAL lock_timeout = '{self.lock_timeout}'")
+                conn.execute(
+                    sa.text(
+                        f"CREATE TABLE IF NOT EXISTS {self._qualified(conn, name)} "
+                        f"PARTITION OF {self._qualified(conn, self.item_table.__table__.name)} "
+                        f"{bounds}"
+                    ),
+                    params,
+                )
+        except sa.exc.DBAPIError as e:
+            # `IF NOT EXISTS` doesn't see a partition which isn't committed yet, the second writer fails on the catalog
+            if not isinstance(
+                e.orig,
+                (psycopg2.errors.DuplicateTable, psycopg2.errors.UniqueViolation),
+            ):
+                raise
+            logger.info(f"Partition {name} was created by another writer")
+
+    def strategy(self, conn: Union[Engine, Connection, SqlSession]) -> str:
+        """Partitioning strategy of the item table, an empty string if it isn't partitioned."""
+        if self._strategy is None:
+            table = self.item_table.__table__
+            self._strategy = (
+                conn.execute(
+                    sa.text(
+                        "SELECT p.partstrat FROM pg_partitioned_table p "
+                        "JOIN pg_class c ON c.oid = p.partrelid "
+                        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                        "WHERE n.nspname = :schema AND c.relname = :name"
+                    ),
+                    {"schema": table.schema, "name": table.name},
+                ).scalar()
+                or ""
+            )
+        return self._strategy
+
+    def partitions(self, conn: Union[Engine, Connection, SqlSession]) -> List[str]:
+        """Names of the partitions of the item table, empty if it isn't partitioned."""
+        return [
+            row[0]
+            for row in conn.execute(
+                sa.text(
+                    "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                    "WHERE i.inhparent = CAST(:parent AS regclass) ORDER BY c.relname"
+                ),
+                {"parent": self._qualified(conn, self.item_table.__table__.name)},
+            )
+        ]
+
+    def primary_key(self, conn: Union[Connection, SqlSession]) -> List[str]:
+        """Columns of the primary key of the item table, which includes the partition key of partitioned tables."""
+        return {COLLECTION: ["id", "collection_id"], DATETIME: ["id", "datetime"]}.get(
+            self.strategy(conn), ["id"]
+        )
+
+    def create_collection_partition(self, engine: Engine, collection_id: str) -> None:
+        """Create the partition of a collection (collection partitioning only)."""
+        if self.strategy(engine) != COLLECTION:
+            return
+        self._create_partition(
+            engine,
+            collection_partition(collection_id),
+            "FOR VALUES IN (:collection_id)",
+            collection_id=collection_id,
+        )
+
+    def drop_collection_partition(
+        self, conn: Union[Connection, SqlSession], collection_id: str
+    ) -> bool:
+        """Drop the partition of a collection and all of its items (collection partitioning only).
+
+        Returns:
+            True if the items were dropped with the partition.
+        """
+        if self.strategy(conn) != COLLECTION:
+            return False
+        partition = self._qualified(conn, collection_partition(collection_id))
+        # Dropping the partition doesn't fire the triggers which unregister the ids of deleted items
+        conn.execute(
+            sa.text(
+                f"DELETE FROM {self._qualified(conn, ITEM_IDS)} WHERE id IN ("
+                f"SELECT id FROM {self._qualified(conn, self.item_table.__table__.name)} "
+                "WHERE collection_id = :collection_id)"
+            ).bindparams(collection_id=collection_id)
+        )
+        conn.execute(f"DROP TABLE IF EXISTS {partition}")
+        return True
+
+    def create_datetime_partitions(
+        self, engine: Engine, values: Iterable[datetime]
+    ) -> None:
+        """Create the monthly partitions covering a list of datetimes (datetime partitioning only).
+
+        The datetimes are only read when the table is partitioned by datetime.
+        """
+        if self.strategy(engine) != DATETIME:
+            return
+        months = {month_start(value) for value in values} - self._months
+        if not months:
+            return
+        existing = set(self.partitions(engine))
+        for start in sorted(months):
+            name = datetime_partition(start)
+            if name not in existing:
+                self._create_partition(
+                    engine,
+                    name,
+                    "FOR VALUES FROM (:start) TO (:end)",
+                    start=start,
+                    end=next_month(start),
+                )
+            # Committed, the month can be cached
+            self._months.add(start)
@@ -0,0 +1,214 @@
+"""Field promotion client."""
+import hashlib
+import logging
+import time
+from typing import Type
+
+import attr
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+
+from stac_api.clients.postgres.partitions import PartitionManager
+from stac_api.clients.postgres.session import Session
+from stac_api.models import database
+
+logger = logging.getLogger(__name__)
+
+
+def _index_name(table_name: str, column_name: str) -> str:
+    """Name of the index of a column, suffixed by a hash when it exceeds the 63 character limit of postgres."""
+    name = f"ix_{table_name}_{column_name}"
+    if len(name) <= 63:
+        return name
+    return f"{name[:54]}_{hashlib.md5(name.encode()).hexdigest()[:8]}"
+
+
+@attr.s
+class FieldPromotionClient:
+    """Promote item properties to indexed columns without taking the table offline.
+
+    Promotion is done in three steps, each of which is idempotent so an interrupted promotion may simply be re-run:
+        1. Add a nullable column (a catalog-only change which doesn't rewrite the table).
+        2. Build the column index with `CREATE INDEX CONCURRENTLY`, partition by partition when the table is
+           partitioned (see `create_index`).
+        3. Backfill the column from `properties`, walking the primary key in small batches.  Each batch is committed in
+           its own transaction so row locks are only held briefly, and the client sleeps between batches to bound the
+           load on the writer.  Values are copied, not moved, so processes which don't have the field in their
+           `ApiSettings.indexed_fields` yet keep reading and filtering it from `properties`.
+
+    Once a field is promoted it should be added to `ApiSettings.indexed_fields`, which switches the write, query and
+    serialization paths over to the new column.  Rows written between the end of the backfill and the settings
+    change still only store the field in `properties`; re-running `backfill` copies them over.  Once every process
+    runs with the new settings, `strip_properties` removes the copies left in `properties`.
+
+    Attributes:
+        session: database session.
+        item_table: item ORM model.
+        batch_size: number of rows updated per transaction.
+        throttle: seconds to sleep between batches.
+        lock_timeout: maximum time DDL statements wait for a table lock before failing.
+    """
+
+    session: Session = attr.ib(default=attr.Factory(Session.create_from_env))
+    item_table: Type[database.Item] = attr.ib(default=database.Item)
+    batch_size: int = attr.ib(default=1000)
+    throttle: float = attr.ib(default=0.1)
+    lock_timeout: str = attr.ib(default="5s")
+
+    def __attrs_post_init__(self):
+        """Create sqlalchemy engine."""
+        self.engine = self.session.writer.cached_engine
+
+    def _column(self, field: str) -> sa.Column:
+        """Get the column a field is promoted to, mapping it if required."""
+        self.item_table.promote_fields([field])
+        return self.item_table.__table__.c[field.split(":")[-1]]
+
+    def _quote(self, identifier: str) -> str:
+        return self.engine.dialect.identifier_preparer.quote(identifier)
+
+    def _table_name(self) -> str:
+        table = self.item_table.__table__
+        return f"{self._quote(table.schema)}.{self._quote(table.name)}"
+
+    def add_column(self, field: str) -> None:
+        """Add a nullable column for the field."""
+        column = self._column(field)
+        column_type = column.type.compile(dialect=self.engine.dialect)
+        with self.engine.begin() as conn:
+            conn.execute(f"SET LOCAL lock_timeout = '{self.lock_timeout}'")
+            conn.execute(
+                f"ALTER TABLE {self._table_name()} "
+                f"ADD COLUMN IF NOT EXISTS {self._quote(column.name)} {column_type}"
+            )
+
+    def _create_index_concurrently(
+        self, conn: Connection, table_name: str, index_name: str, column: sa.Column
+    ) -> None:
+        """Build an index without blocking writes, an invalid index left by a failed build is dropped and rebuilt."""
+        schema = self.item_table.__table__.schema
+        is_valid = conn.execute(
+            sa.text(
+                "SELECT i.indisvalid FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid "
+                "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                "WHERE n.nspname = :schema AND c.relname = :name"
+            ),
+            schema=schema,
+            name=index_name,
+        ).scalar()
+        if is_valid is False:
+            conn.execute(
+                f"DROP INDEX CONCURRENTLY IF EXISTS "
+                f"{self._quote(schema)}.{self._quote(index_name)}"
+            )
+        conn.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {self._quote(index_name)} "
+            f"ON {self._quote(schema)}.{self._quote(table_name)} ({self._quote(column.name)})"
+        )
+
+    def create_index(self, field: str) -> None:
+        """Build the column index without blocking writes.
+
+        Concurrent builds aren't supported on partitioned tables: the index of the table is created without being built
+        (`ON ONLY`, which is invalid until it covers every partition), then the index of each partition is built
+        concurrently and attached to it.  Partitions created later are indexed when they are created.
+        """
+        column = self._column(field)
+        table = self.item_table.__table__
+        index_name = _index_name(table.name, column.name)
+        partitions = PartitionManager(item_table=self.item_table)
+        # Concurrent index builds can't run inside a transaction block
+        with self.engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as conn:
+            if not partitions.strategy(conn):
+                self._create_index_concurrently(conn, table.name, index_name, column)
+                return
+
+            conn.execute(f"SET lock_timeout = '{self.lock_timeout}'")
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self._quote(index_name)} "
+                f"ON ONLY {self._table_name()} ({self._quote(column.name)})"
+            )
+            conn.execute("RESET lock_timeout")
+            for partition in partitions.partitions(conn):
+                partition_index = _index_name(partition, column.name)
+                self._create_index_concurrently(
+                    conn, partition, partition_index, column
+                )
+                # A no-op when the index is already attached
+                conn.execute(
+                    f"ALTER INDEX {self._quote(table.schema)}.{self._quote(index_name)} "
+                    f"ATTACH PARTITION {self._quote(table.schema)}.{self._quote(partition_index)}"
+                )
+
+    def _batches(self, field: str, update: sa.sql.Update) -> int:
+        """Run an update (bound to a list of `ids`) over the table in throttled batches of the primary key."""
+        table = self.item_table.__table__
+        select_ids = (
+            sa.select([table.c.id])
+            .where(table.c.id > sa.bindparam("last_id"))
+            .order_by(table.c.id)
+            .limit(self.batch_size)
+        )
+
+        updated = 0
+        last_id = ""
+        while True:
+            with self.engine.begin() as conn:
+                ids = [row.id for row in conn.execute(select_ids, last_id=last_id)]
+                if not ids:
+                    break
+                updated += conn.execute(update, ids=ids).rowcount
+            last_id = ids[-1]
+            logger.info(f"Updated {updated} rows of {field} (last id: {last_id})")
+            time.sleep(self.throttle)
+        return updated
+
+    def backfill(self, field: str) -> int:
+        """Copy the field from `properties` to its column in throttled batches.
+
+        Returns:
+            The number of rows which were updated.
+        """
+        column = self._column(field)
+        table = self.item_table.__table__
+        value = table.c.properties[field].astext.cast(column.type)
+        update = (
+            table.update()
+            .where(table.c.id.in_(sa.bindparam("ids", expanding=True)))
+            .where(table.c.properties.has_key(field))
+            .where(column.is_distinct_from(value))
+            .values({column.name: value})
+        )
+        return self._batches(field, update)
+
+    def strip_properties(self, field: str) -> int:
+        """Remove the field from `properties` where it was copied to its column, in throttled batches.
+
+        Only run once the field is in the `ApiSettings.indexed_fields` of every process.
+
+        Returns:
+            The number of rows which were updated.
+        """
+        column = self._column(field)
+        table = self.item_table.__table__
+        update = (
+            table.update()
+            .where(table.c.id.in_(sa.bindparam("ids", expanding=True)))
+            .where(table.c.properties.has_key(field))
+            .where(column.isnot(None))
+            .values({"properties": table.c.properties.op("-")(field)})
+        )
+        return self._batches(field, update)
+
+    def promote(self, field: str) -> int:
+        """Promote a field to an indexed column and backfill existing rows.
+
+        Returns:
+            The number of rows which were backfilled.
+        """
+        self.add_column(field)
+        self.create_index(field)
+        return self.backfill(field)
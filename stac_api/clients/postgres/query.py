@@ -0,0 +1,122 @@
+"""Query extension compiler."""
+from typing import Any, Dict, Type
+
+import sqlalchemy as sa
+from sqlalchemy.sql.elements import ColumnElement
+
+from stac_api import config
+from stac_api.errors import InvalidQueryParameter
+from stac_api.models import database
+from stac_api.models.schemas import Operator, Queryables, QueryableTypes
+
+# Python types used to coerce values before they are embedded in JSONB containment predicates, `@>` compares types
+# strictly so `{"gsd": "15"}` would not match `{"gsd": 15}`
+PYTHON_TYPES: Dict[Any, Type] = {sa.String: str, sa.Integer: int, sa.Float: float}
+
+
+def coerce_value(field_name: Queryables, value: Any) -> Any:
+    """Coerce a query value to the type of the queryable field."""
+    try:
+        python_type = PYTHON_TYPES[QueryableTypes.get(field_name)]
+    except (KeyError, ValueError):
+        # Untyped queryable, use the value as-is
+        return value
+    # `int` truncates floats, `10.5` must not match `10`
+    if python_type is int and isinstance(value, float) and not value.is_integer():
+        raise InvalidQueryParameter(
+            f"Invalid value for {field_name.value}: {value} ({python_type.__name__} expected)"
+        )
+    try:
+        return python_type(value)
+    except (TypeError, ValueError):
+        raise InvalidQueryParameter(
+            f"Invalid value for {field_name.value}: {value} ({python_type.__name__} expected)"
+        )
+
+
+def contains(
+    item_table: Type[database.Item], field_name: Queryables, value: Any
+) -> ColumnElement:
+    """Create a JSONB containment predicate (`properties @> '{"field": value}'`).
+
+    Containment predicates are served by the `jsonb_path_ops` GIN index on `properties`.
+    """
+    return item_table.properties.contains(
+        {field_name.value: coerce_value(field_name, value)}
+    )
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards, postgres uses backslash as the default escape character."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def pattern_match(
+    item_table: Type[database.Item], field_name: Queryables, op: Operator, value: Any
+) -> ColumnElement:
+    """Create a LIKE predicate for a string operator.
+
+    The predicate compares the text value of the field (`properties ->> field`) so it matches the expression indexes
+    created for text queryables: prefix matches (`startsWith`) are served by a `text_pattern_ops` btree index, infix
+    and suffix matches (`contains`, `endsWith`) by a `pg_trgm` GIN index.  The pattern is built client side so the
+    planner always sees a constant pattern.
+    """
+    if field_name.value not in config.settings.text_queryables:
+        raise InvalidQueryParameter(
+            f"Operator `{op.value}` is not supported by {field_name.value}, "
+            f"text queryables are: {', '.join(sorted(config.settings.text_queryables))}"
+        )
+    if not isinstance(value, (str, int)) or isinstance(value, bool):
+        raise InvalidQueryParameter(
+            f"Operator `{op.value}` expects a string, got {value}"
+        )
+
+    column = item_table.get_column(field_name)
+    if column is None:
+        column = item_table.properties[field_name.value].astext
+    elif not isinstance(column.type, sa.String):
+        column = sa.cast(column, sa.Text)
+
+    value = escape_like(str(value))
+    if op == Operator.startsWith:
+        return column.like(f"{value}%")
+    elif op == Operator.endsWith:
+        return column.like(f"%{value}")
+    return column.like(f"%{value}%")
+
+
+def compile_query(
+    item_table: Type[database.Item], field_name: Queryables, op: Operator, value: Any
+) -> ColumnElement:
+    """Compile a query extension expression (ex. `{"eo:cloud_cover": {"lt": 10}}`) to a SQL predicate.
+
+    Equality and membership filters on fields stored in the properties JSONB field are compiled to containment
+    predicates so they can use the GIN index, string operators are compiled to LIKE predicates (see `pattern_match`).
+    All other filters compare against the column, or the typed JSONB field (see `Item.get_field`).
+    """
+    if op == Operator.in_ and not isinstance(value, list):
+        raise InvalidQueryParameter(f"Operator `in` expects a list, got {value}")
+
+    if op == Operator.in_ and not value:
+        return sa.false()
+
+    if op in (Operator.startsWith, Operator.endsWith, Operator.contains):
+        return pattern_match(item_table, field_name, op, value)
+
+    if item_table.get_column(field_name) is None:
+        if op == Operator.eq:
+            return contains(item_table, field_name, value)
+        elif op == Operator.ne:
+            # Preserve the semantics of the typed comparison, items without the field are not matched
+            return sa.and_(
+                item_table.properties.has_key(field_name.value),
+                sa.not_(contains(item_table, field_name, value)),
+            )
+        elif op == Operator.in_:
+            # Each containment predicate is a bitmap index scan, combined with BitmapOr
+            return sa.or_(*[contains(item_table, field_name, v) for v in value])
+
+    field = item_table.get_field(field_name)
+    if op == Operator.in_:
+        return field.in_(value)
+    return op.operator(field, value)
@@ -0,0 +1,237 @@
+"""Read replica routing."""
+import itertools
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Iterator, List, Optional
+
+import attr
+import sqlalchemy as sa
+from sqlalchemy.orm import Session as SqlSession
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from stac_api import errors
+
+if TYPE_CHECKING:
+    from stac_api.clients.postgres.session import FastAPISessionMaker
+
+logger = logging.getLogger(__name__)
+
+ROUND_ROBIN = "round_robin"
+LEAST_CONNECTIONS = "least_connections"
+
+# Replication lag (seconds), a replica which has replayed everything it received is not lagging even if the primary
+# has been idle since the last replayed transaction
+LAG_QUERY = sa.text(
+    "SELECT CASE "
+    "WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+    "END"
+)
+
+
+@attr.s
+class RequestRouting:
+    """Routing state of a request (see `ReadYourWritesMiddleware`).
+
+    Attributes:
+        prefer_writer: route reads to the writer.
+        wrote: whether the request wrote to the database.
+    """
+
+    prefer_writer: bool = attr.ib(default=False)
+    wrote: bool = attr.ib(default=False)
+
+
+# The state object is shared with the threads running sync endpoints, which only see a copy of the context
+_routing: ContextVar[Optional[RequestRouting]] = ContextVar(
+    "request_routing", default=None
+)
+
+
+def record_write() -> None:
+    """Record that the current request wrote to the database."""
+    routing = _routing.get()
+    if routing is not None:
+        routing.wrote = True
+
+
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    """Route the reads of a client to the writer for a short window after it writes.
+
+    Writes recorded during a request (see `record_write`) set a cookie holding the time of the write, reads of requests
+    carrying a recent cookie skip the replicas so the client sees its own writes regardless of replication lag.
+    """
+
+    def __init__(self, app, window: float, cookie_name: str = "stac-last-write"):
+        """Create the middleware.
+
+        Args:
+            app: ASGI application.
+            window: seconds after a write during which reads are routed to the writer.
+            cookie_name: name of the cookie holding the time of the last write.
+        """
+        super().__init__(app)
+        self.window = window
+        self.cookie_name = cookie_name
+
+    async def dispatch(self, request: Request, call_next):
+        """Set the routing state of the request."""
+        routing = RequestRouting()
+        try:
+            last_write = float(request.cookies.get(self.cookie_name, "-inf"))
+        except ValueError:
+            last_write = -math.inf
+        routing.prefer_writer = time.time() - last_write < self.window
+
+        token = _routing.set(routing)
+        try:
+            response = await call_next(request)
+        finally:
+            _routing.reset(token)
+
+        if routing.wrote:
+            response.set_cookie(
+                self.cookie_name,
+                str(time.time()),
+                max_age=math.ceil(self.window),
+                httponly=True,
+            )
+        return response
+
+
+@attr.s
+class Replica:
+    """Read replica and its last known state.
+
+    Attributes:
+        session_maker: replica session maker.
+        healthy: whether the last health check succeeded.
+        lag: replication lag (seconds) measured by the last health check.
+        checked_at: time of the last health check (monotonic clock).
+        in_flight: number of sessions currently open on the replica.
+    """
+
+    session_maker: "FastAPISessionMaker" = attr.ib()
+    healthy: bool = attr.ib(default=True)
+    lag: float = attr.ib(default=0.0)
+    checked_at: float = attr.ib(default=-math.inf)
+    in_flight: int = attr.ib(default=0)
+    lock: threading.Lock = attr.ib(factory=threading.Lock, repr=False)
+
+
+@attr.s
+class ReaderPool:
+    """Route reads across several replicas.
+
+    Exposes the `context_session` interface of `FastAPISessionMaker`, so clients use it as their reader.  Each replica
+    is health checked (connectivity and replication lag) at most once every `check_interval` seconds, by the first
+    request which routes to it after the interval, and replicas which are unhealthy or lag by more than `max_lag`
+    seconds are skipped.  Eligible replicas are picked in turn (`round_robin`) or by the number of sessions open by this
+    process (`least_connections`).  Reads fall back to the writer when no replica is eligible, or when the request
+    prefers the writer (see `ReadYourWritesMiddleware`).
+
+    Attributes:
+        replicas: replica session makers.
+        writer: writer session maker.
+        routing: replica selection strategy.
+        max_lag: maximum replication lag (seconds), lag is not checked if unset.
+        check_interval: seconds between health checks of a replica.
+    """
+
+    replicas: List[Replica] = attr.ib(
+        converter=lambda makers: [
+            m if isinstance(m, Replica) else Replica(session_maker=m) for m in makers
+        ]
+    )
+    writer: "FastAPISessionMaker" = attr.ib()
+    routing: str = attr.ib(default=ROUND_ROBIN)
+    max_lag: Optional[float] = attr.ib(default=None)
+    check_interval: float = attr.ib(default=5.0)
+
+    @routing.validator
+    def _check_routing(self, attribute, value):
+        if value not in (ROUND_ROBIN, LEAST_CONNECTIONS):
+            raise ValueError(f"Unknown reader routing: {value}")
+
+    def __attrs_post_init__(self):
+        """Initialize routing state."""
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def check(self, replica: Replica) -> None:
+        """Check the connectivity and replication lag of a replica."""
+        try:
+            with replica.session_maker.cached_engine.connect() as conn:
+                replica.lag = float(conn.execute(LAG_QUERY).scalar())
+            replica.healthy = True
+        except sa.exc.DBAPIError as e:
+            logger.warning(f"Replica health check failed: {e}")
+            replica.healthy = False
+        replica.checked_at = time.monotonic()
+
+    def _refresh(self, replica: Replica) -> None:
+        if time.monotonic() - replica.checked_at < self.check_interval:
+            return
+        # Only one request checks a replica, others use its last known state
+        if replica.lock.acquire(blocking=False):
+            try:
+                if time.monotonic() - replica.checked_at >= self.check_interval:
+                    self.check(replica)
+            finally:
+                replica.lock.release()
+
+    def eligible(self) -> List[Replica]:
+        """Replicas which may serve reads."""
+        eligible = []
+        for replica in self.replicas:
+            self._refresh(replica)
+            if not replica.healthy:
+                continue
+            if self.max_lag is not None and replica.lag > self.max_lag:
+                continue
+            eligible.append(replica)
+        return eligible
+
+    def choose(self) -> Optional[Replica]:
+        """Pick the replica serving the next read, None if no replica is eligible."""
+        eligible = self.eligible()
+        if not eligible:
+            return None
+        if self.routing == LEAST_CONNECTIONS:
+            return min(eligible, key=lambda replica: replica.in_flight)
+        return eligible[next(self._counter) % len(eligible)]
+
+    @contextmanager
+    def context_session(self) -> Iterator[SqlSession]:
+        """Open a session on a replica (or the writer)."""
+        routing = _routing.get()
+        replica = None
+        if routing is None or not routing.prefer_writer:
+            replica = self.choose()
+            if replica is None:
+                logger.warning("No replica is eligible, reading from the writer")
+        if replica is None:
+            with self.writer.context_session() as session:
+                yield session
+            return
+
+        with self._lock:
+            replica.in_flight += 1
+        try:
+            with replica.session_maker.context_session() as session:
+                yield session
+        except errors.DatabaseError as e:
+            # Take replicas which can't be reached out of rotation until their next health check
+            if isinstance(e.__cause__, sa.exc.OperationalError):
+                replica.healthy = False
+                replica.checked_at = time.monotonic()
+            raise
+        finally:
+            with self._lock:
+                replica.in_flight -= 1
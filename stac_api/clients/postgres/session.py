@@ -2,7 +2,7 @@
 import logging
 import os
 from contextlib import contextmanager
-from typing import Iterator
+from typing import Any, Dict, Iterator, List, Optional, Union
 
 import attr
 import psycopg2
@@ -11,44 +11,182 @@ import sqlalchemy.exc
 from fastapi_utils.session import FastAPISessionMaker as _FastAPISessionMaker
 from sqlalchemy.orm import Session as SqlSession
 
-from stac_api import errors
+from stac_api import config, errors
+from stac_api.clients.postgres.monitoring import InstrumentedQueuePool, SlowQueryLog
+from stac_api.clients.postgres.replicas import ROUND_ROBIN, ReaderPool
 
 logger = logging.getLogger(__name__)
 
 
+@attr.s
+class PoolOptions:
+    """Connection pool options (see https://docs.sqlalchemy.org/en/13/core/pooling.html).
+
+    Attributes:
+        size: number of connections kept open.
+        max_overflow: connections opened on top of `size` under load, they are closed when returned to the pool.
+        timeout: seconds to wait for a connection before giving up.
+        recycle: replace connections older than this many seconds, connections are never recycled if -1.
+        pre_ping: test connections when they are checked out.
+    """
+
+    size: int = attr.ib(default=5)
+    max_overflow: int = attr.ib(default=10)
+    timeout: float = attr.ib(default=30.0)
+    recycle: int = attr.ib(default=-1)
+    pre_ping: bool = attr.ib(default=True)
+
+    @classmethod
+    def from_settings(cls, settings: config.PostgresSettings, role: str):
+        """Create from the pool settings of a role (`reader` or `writer`)."""
+        return cls(
+            size=getattr(settings, f"{role}_pool_size"),
+            max_overflow=getattr(settings, f"{role}_max_overflow"),
+            timeout=getattr(settings, f"{role}_pool_timeout"),
+            recycle=getattr(settings, f"{role}_pool_recycle"),
+            pre_ping=getattr(settings, f"{role}_pool_pre_ping"),
+        )
+
+    def engine_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments of `sqlalchemy.create_engine`."""
+        return {
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": self.size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.timeout,
+            "pool_recycle": self.recycle,
+            "pool_pre_ping": self.pre_ping,
+        }
+
+
 class FastAPISessionMaker(_FastAPISessionMaker):
     """FastAPISessionMaker."""
 
+    def __init__(self, database_uri: str, pool: Optional[PoolOptions] = None):
+        """Create the session maker.
+
+        Args:
+            database_uri: connection string.
+            pool: connection pool options.
+        """
+        super().__init__(database_uri)
+        self.pool = pool or PoolOptions()
+
+    def get_new_engine(self) -> sa.engine.Engine:
+        """Create the engine, installing the slow query log if it is enabled."""
+        engine = sa.create_engine(self.database_uri, **self.pool.engine_kwargs())
+        if config.settings and config.settings.slow_query_threshold is not None:
+            SlowQueryLog(
+                threshold=config.settings.slow_query_threshold,
+                sample_rate=config.settings.slow_query_sample_rate,
+            ).install(engine)
+        return engine
+
     @contextmanager
     def context_session(self) -> Iterator[SqlSession]:
         """Override base method to include exception handling."""
         try:
             yield from self.get_db()
+        except sa.exc.TimeoutError as e:
+            raise errors.PoolExhausted(
+                "no database connection is available, try again later"
+            ) from e
         except sa.exc.StatementError as e:
             if isinstance(e.orig, psycopg2.errors.UniqueViolation):
                 raise errors.ConflictError("resource already exists") from e
             elif isinstance(e.orig, psycopg2.errors.ForeignKeyViolation):
                 raise errors.ForeignKeyError("collection does not exist") from e
+            elif isinstance(e.orig, psycopg2.errors.QueryCanceled):
+                raise errors.SearchTooExpensive(
+                    "query exceeded the statement timeout, add filters to reduce the number of matched items"
+                ) from e
             logger.error(e, exc_info=True)
-            raise errors.DatabaseError("unhandled database error")
+            raise errors.DatabaseError("unhandled database error") from e
+
+    def pool_status(self) -> Dict[str, Any]:
+        """Metrics of the connection pool (see `InstrumentedQueuePool.snapshot`)."""
+        return self.cached_engine.pool.snapshot()
 
 
 @attr.s
 class Session:
-    """Database session management."""
+    """Database session management.
+
+    Reads are routed across replicas (see `stac_api.clients.postgres.replicas.ReaderPool`) when several reader
+    connection strings are given, when replication lag is checked or in read-your-writes mode.
 
-    reader_conn_string: str = attr.ib()
+    Attributes:
+        reader_conn_string: reader connection string, or a list of replica connection strings.
+        writer_conn_string: writer connection string.
+        reader_routing: replica selection strategy (`round_robin` or `least_connections`).
+        max_replica_lag: skip replicas lagging by more than this many seconds.
+        replica_check_interval: seconds between health checks of a replica.
+        read_your_writes: route the reads of clients which recently wrote to the writer (see
+            `stac_api.clients.postgres.replicas.ReadYourWritesMiddleware`).
+        reader_pool: connection pool options of the reader (of each replica).
+        writer_pool: connection pool options of the writer.
+    """
+
+    reader_conn_string: Union[str, List[str]] = attr.ib()
     writer_conn_string: str = attr.ib()
+    reader_routing: str = attr.ib(default=ROUND_ROBIN)
+    max_replica_lag: Optional[float] = attr.ib(default=None)
+    replica_check_interval: float = attr.ib(default=5.0)
+    read_your_writes: bool = attr.ib(default=False)
+    reader_pool: PoolOptions = attr.ib(factory=PoolOptions)
+    writer_pool: PoolOptions = attr.ib(factory=PoolOptions)
 
     @classmethod
     def create_from_env(cls):
-        """Create from environment."""
+        """Create from environment, `READER_CONN_STRING` may hold several whitespace separated connection strings."""
         return cls(
-            reader_conn_string=os.environ["READER_CONN_STRING"],
+            reader_conn_string=os.environ["READER_CONN_STRING"].split(),
             writer_conn_string=os.environ["WRITER_CONN_STRING"],
         )
 
     def __attrs_post_init__(self):
         """Post init handler."""
-        self.reader: FastAPISessionMaker = FastAPISessionMaker(self.reader_conn_string)
-        self.writer: FastAPISessionMaker = FastAPISessionMaker(self.writer_conn_string)
+        self.writer: FastAPISessionMaker = FastAPISessionMaker(
+            self.writer_conn_string, pool=self.writer_pool
+        )
+        conn_strings = self.reader_conn_string
+        if isinstance(conn_strings, str):
+            conn_strings = [conn_strings]
+        if (
+            len(conn_strings) > 1
+            or self.max_replica_lag is not None
+            or self.read_your_writes
+        ):
+            self.reader: Union[FastAPISessionMaker, ReaderPool] = ReaderPool(
+                replicas=[
+                    FastAPISessionMaker(c, pool=self.reader_pool) for c in conn_strings
+                ],
+                writer=self.writer,
+                routing=self.reader_routing,
+                max_lag=self.max_replica_lag,
+                check_interval=self.replica_check_interval,
+            )
+        else:
+            self.reader = FastAPISessionMaker(conn_strings[0], pool=self.reader_pool)
+
+    def pool_status(self) -> List[Dict[str, Any]]:
+        """Metrics of the connection pools of the writer and readers.
+
+        Returns:
+            The pool metrics, with the role (`writer`, `reader`) and host of the database.
+        """
+        makers = [("writer", self.writer)]
+        if isinstance(self.reader, ReaderPool):
+            makers += [
+                ("reader", replica.session_maker) for replica in self.reader.replicas
+            ]
+        else:
+            makers.append(("reader", self.reader))
+        return [
+            {
+                "role": role,
+                "host": maker.cached_engine.url.host,
+                **maker.pool_status(),
+            }
+            for (role, maker) in makers
+        ]
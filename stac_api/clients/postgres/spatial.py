@@ -0,0 +1,130 @@
+"""Spatial query planner."""
+from typing import List, Optional, Type
+
+import geoalchemy2 as ga
+import sqlalchemy as sa
+from shapely.geometry.base import BaseGeometry, BaseMultipartGeometry
+from sqlalchemy.orm.interfaces import MapperOption
+from sqlalchemy.sql.elements import ColumnElement
+
+from stac_api import config
+from stac_api.errors import InvalidQueryParameter
+from stac_api.models import database, geohash
+
+
+def num_vertices(geom: BaseGeometry) -> int:
+    """Count the vertices of a shapely geometry."""
+    if isinstance(geom, BaseMultipartGeometry):
+        return sum(num_vertices(part) for part in geom.geoms)
+    if geom.geom_type == "Polygon":
+        return len(geom.exterior.coords) + sum(
+            len(ring.coords) for ring in geom.interiors
+        )
+    return len(geom.coords)
+
+
+def grid_prefilter(
+    item_table: Type[database.Item], geom: BaseGeometry, margin: float
+) -> Optional[ColumnElement]:
+    """Create a prefilter on the grid cell of items which may intersect a geometry.
+
+    Each covering cell is a prefix match on `grid_cell`, served by its `text_pattern_ops` btree index.
+
+    Returns:
+        The prefilter, None if the geometry is too large to be covered by a few cells.
+    """
+    cells = geohash.prefilter_cells(geom, margin)
+    if not cells:
+        return None
+    return sa.or_(*[item_table.grid_cell.like(f"{cell}%") for cell in cells])
+
+
+def grid_bucket(item_table: Type[database.Item], precision: int) -> ColumnElement:
+    """Create a bucketing key grouping items by the cell of a coarser grid (the prefix of their grid cell)."""
+    if not 1 <= precision <= geohash.MAX_PRECISION:
+        raise InvalidQueryParameter(
+            f"Grid precision must be between 1 and {geohash.MAX_PRECISION}, got {precision}"
+        )
+    return sa.func.substr(item_table.grid_cell, 1, precision)
+
+
+def intersects(
+    item_table: Type[database.Item],
+    geom: BaseGeometry,
+    max_vertices: Optional[int] = None,
+) -> ColumnElement:
+    """Create an intersection predicate between the item geometry and a search geometry.
+
+    Exact intersection tests cost time proportional to the number of vertices of both geometries, and the bounding
+    box of a large geometry (ex. a service territory) is a poor filter so the GiST index returns many candidates which
+    each pay for a test against every vertex.  Geometries with more than `max_vertices` vertices are split with
+    `ST_Subdivide` into parts with few vertices and small bounding boxes:
+
+        geometry && :geom AND EXISTS (
+            SELECT 1 FROM ST_Subdivide(:geom, :max_vertices) AS part
+            WHERE geometry && part AND ST_Intersects(geometry, part)
+        )
+
+    The outer bounding box predicate is served by the GiST index, the semi-join stops at the first intersecting part
+    so each item is returned once.  When `ApiSettings.grid_prefilter_margin` is set the predicate is combined with
+    a prefilter on the grid cell of the items (see `grid_prefilter`).
+    """
+    if max_vertices is None:
+        max_vertices = config.settings.subdivide_max_vertices
+    predicate = _intersects(item_table, geom, max_vertices)
+    if config.settings.grid_prefilter_margin is not None:
+        prefilter = grid_prefilter(
+            item_table, geom, config.settings.grid_prefilter_margin
+        )
+        if prefilter is not None:
+            return sa.and_(prefilter, predicate)
+    return predicate
+
+
+def _intersects(
+    item_table: Type[database.Item], geom: BaseGeometry, max_vertices: int
+) -> ColumnElement:
+    filter_geom = ga.shape.from_shape(geom, srid=4326)
+    if num_vertices(geom) <= max_vertices:
+        return ga.func.ST_Intersects(item_table.geometry, filter_geom)
+
+    part = sa.column("part", ga.Geometry(srid=4326))
+    parts = sa.func.ST_Subdivide(filter_geom, max_vertices).alias("part")
+    subquery = (
+        sa.select([sa.literal(1)])
+        .select_from(parts)
+        .where(
+            sa.and_(
+                item_table.geometry.op("&&")(part),
+                ga.func.ST_Intersects(item_table.geometry, part),
+            )
+        )
+    )
+    return sa.and_(item_table.geometry.op("&&")(filter_geom), sa.exists(subquery))
+
+
+def geometry_output(
+    item_table: Type[database.Item],
+    simplify: Optional[float] = None,
+    precision: Optional[int] = None,
+) -> List[MapperOption]:
+    """Create query options which render simplified and/or quantized item geometries in the database.
+
+    The geometry is simplified with `ST_SimplifyPreserveTopology` (tolerance in degrees) and written as GeoJSON with
+    at most `precision` decimal digits by `ST_AsGeoJSON`, so both the payload read from the database and the work done
+    by the serializer shrink with the requested resolution.  The full resolution geometry column is deferred so it is
+    not read at all.  The GeoJSON is labelled after the `geojson` attribute, so rows read without the ORM (see
+    `stac_api.clients.postgres.async_session`) map back to the model.
+    """
+    if simplify is None and precision is None:
+        return []
+    geom = item_table.geometry
+    if simplify:
+        geom = ga.func.ST_SimplifyPreserveTopology(geom, simplify)
+    geojson = sa.func.ST_AsGeoJSON(
+        geom, precision if precision is not None else 9, type_=sa.Text
+    )
+    return [
+        sa.orm.defer(item_table.geometry),
+        sa.orm.with_expression(item_table.geojson, geojson.label("geojson")),
+    ]
@@ -2,17 +2,75 @@
 
 import json
 import logging
-from typing import Dict, Optional, Type
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Type
 
 import attr
+import geoalchemy2 as ga
+import sqlalchemy as sa
+from shapely.geometry import shape
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session as SqlSession
+from starlette.concurrency import run_in_threadpool
 
+from stac_api import config
 from stac_api.clients.base import BaseBulkTransactionsClient, BaseTransactionsClient
+from stac_api.clients.postgres.copy_stream import copy_rows
+from stac_api.clients.postgres.partitions import PartitionManager
+from stac_api.clients.postgres.replicas import record_write
 from stac_api.clients.postgres.session import Session
-from stac_api.errors import NotFoundError
+from stac_api.errors import InvalidItem, NotFoundError
 from stac_api.models import database, schemas
+from stac_api.models.cql2 import parse_instant
 
 logger = logging.getLogger(__name__)
 
+INSERT = "insert"
+COPY = "copy"
+
+
+async def ndjson_chunks(
+    body: AsyncIterator[bytes], chunk_size: int
+) -> AsyncIterator[List[Tuple[int, Any]]]:
+    """Parse a newline-delimited JSON body as it is received.
+
+    Yields:
+        Chunks of at most `chunk_size` `(line number, value)` pairs, lines which aren't valid JSON are yielded as
+        `ValueError`s so they can be reported with their line number.
+    """
+    chunk: List[Tuple[int, Any]] = []
+    buffer = b""
+    number = 0
+
+    def parse(line: bytes) -> Any:
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            return ValueError(f"invalid JSON ({e})")
+
+    async for data in body:
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            number += 1
+            if line.strip():
+                chunk.append((number, parse(line)))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if buffer.strip():
+        chunk.append((number + 1, parse(buffer)))
+    if chunk:
+        yield chunk
+
+
+def item_datetime(value: Any) -> datetime:
+    """Parse the datetime of an item (RFC 3339, converted to naive UTC), items with a null datetime aren't supported."""
+    if value is None or value == "null":
+        raise ValueError("datetime is required")
+    return parse_instant(value)
+
 
 @attr.s
 class TransactionsClient(BaseTransactionsClient):
@@ -21,11 +79,26 @@ class TransactionsClient(BaseTransactionsClient):
     session: Session = attr.ib(default=attr.Factory(Session.create_from_env))
     collection_table: Type[database.Collection] = attr.ib(default=database.Collection)
     item_table: Type[database.Item] = attr.ib(default=database.Item)
+    partitions: PartitionManager = attr.ib()
+
+    @partitions.default
+    def _partitions_factory(self):
+        return PartitionManager(item_table=self.item_table)
+
+    @contextmanager
+    def _write_session(self) -> Iterator[SqlSession]:
+        """Open a writer session, recording the write for read-your-writes routing once it is committed."""
+        with self.session.writer.context_session() as session:
+            yield session
+        record_write()
 
     def create_item(self, model: schemas.Item, **kwargs) -> schemas.Item:
         """Create item."""
         data = self.item_table.from_schema(model)
-        with self.session.writer.context_session() as session:
+        self.partitions.create_datetime_partitions(
+            self.session.writer.cached_engine, [data.datetime]
+        )
+        with self._write_session() as session:
             session.add(data)
             data.base_url = str(kwargs["request"].base_url)
             return schemas.Item.from_orm(data)
@@ -35,22 +108,28 @@ class TransactionsClient(BaseTransactionsClient):
     ) -> schemas.Collection:
         """Create collection."""
         data = self.collection_table.from_schema(model)
-        with self.session.writer.context_session() as session:
+        self.partitions.create_collection_partition(
+            self.session.writer.cached_engine, data.id
+        )
+        with self._write_session() as session:
             session.add(data)
             data.base_url = str(kwargs["request"].base_url)
             return schemas.Collection.from_orm(data)
 
     def update_item(self, model: schemas.Item, **kwargs) -> schemas.Item:
         """Update item."""
-        with self.session.reader.context_session() as session:
+        # SQLAlchemy orm updates don't seem to like geoalchemy types
+        data = self.item_table.get_database_model(model)
+        data.pop("geometry", None)
+        self.partitions.create_datetime_partitions(
+            self.session.writer.cached_engine, [data["datetime"]]
+        )
+        with self._write_session() as session:
             query = session.query(self.item_table).filter(
                 self.item_table.id == model.id
             )
             if not query.scalar():
                 raise NotFoundError(f"Item {model.id} not found")
-            # SQLAlchemy orm updates don't seem to like geoalchemy types
-            data = self.item_table.get_database_model(model)
-            data.pop("geometry", None)
             query.update(data)
 
             response = self.item_table.from_schema(model)
@@ -62,7 +141,7 @@ class TransactionsClient(BaseTransactionsClient):
         self, model: schemas.Collection, **kwargs
     ) -> schemas.Collection:
         """Update collection."""
-        with self.session.reader.context_session() as session:
+        with self._write_session() as session:
             query = session.query(self.collection_table).filter(
                 self.collection_table.id == model.id
             )
@@ -76,7 +155,7 @@ class TransactionsClient(BaseTransactionsClient):
 
     def delete_item(self, id: str, **kwargs) -> schemas.Item:
         """Delete item."""
-        with self.session.writer.context_session() as session:
+        with self._write_session() as session:
             query = session.query(self.item_table).filter(self.item_table.id == id)
             data = query.first()
             if not data:
@@ -87,13 +166,15 @@ class TransactionsClient(BaseTransactionsClient):
 
     def delete_collection(self, id: str, **kwargs) -> schemas.Collection:
         """Delete collection."""
-        with self.session.writer.context_session() as session:
+        with self._write_session() as session:
             query = session.query(self.collection_table).filter(
                 self.collection_table.id == id
             )
             data = query.first()
             if not data:
                 raise NotFoundError(f"Collection {id} not found")
+            # Dropping the partition of the collection is much cheaper than deleting its items
+            self.partitions.drop_collection_partition(session, id)
             query.delete()
             data.base_url = str(kwargs["request"].base_url)
             return schemas.Collection.from_orm(data)
@@ -101,10 +182,27 @@ class TransactionsClient(BaseTransactionsClient):
 
 @attr.s
 class BulkTransactionsClient(BaseBulkTransactionsClient):
-    """Postgres bulk transactions."""
+    """Postgres bulk transactions.
+
+    Items are loaded with `COPY ... FROM STDIN` (see `stac_api.clients.postgres.copy_stream`), a single statement per
+    chunk, or with a multi-row `INSERT` (`method="insert"`, psycopg2 `executemany`).
+
+    Attributes:
+        session: database session.
+        debug: toggles debug mode.
+        partitions: partition management.
+        method: loading method, `copy` or `insert`.
+    """
 
     session: Session = attr.ib(default=attr.Factory(Session.create_from_env))
     debug: bool = attr.ib(default=False)
+    partitions: PartitionManager = attr.ib(factory=PartitionManager)
+    method: str = attr.ib(default=COPY)
+
+    @method.validator
+    def _check_method(self, attribute, value):
+        if value not in (INSERT, COPY):
+            raise ValueError(f"Unknown bulk insert method: {value}")
 
     def __attrs_post_init__(self):
         """Create sqlalchemy engine."""
@@ -117,9 +215,12 @@ class BulkTransactionsClient(BaseBulkTransactionsClient):
         # TODO: dedup with GetterDict logic (ref #58)
         """
         item = item.dict(exclude_none=True)
+        item["grid_cell"] = database.Item.get_grid_cell(shape(item["geometry"]))
         item["geometry"] = json.dumps(item["geometry"])
         item["collection_id"] = item.pop("collection")
-        item["datetime"] = item["properties"].pop("datetime")
+        for field in config.settings.indexed_fields:
+            item[field.split(":")[-1]] = item["properties"].pop(field, None)
+        item["datetime"] = item_datetime(item["datetime"])
         return item
 
     def bulk_item_insert(
@@ -130,12 +231,261 @@ class BulkTransactionsClient(BaseBulkTransactionsClient):
         https://docs.sqlalchemy.org/en/13/faq/performance.html#i-m-inserting-400-000-rows-with-the-orm-and-it-s-really-slow
         """
         # Use items.items because schemas.Items is a model with an items key
-        processed_items = [self._preprocess_item(item) for item in items.items]
+        processed_items = []
+        for item in items.items:
+            try:
+                processed_items.append(self._preprocess_item(item))
+            except ValueError as e:
+                raise InvalidItem(f"Invalid item {item.id}: {e}") from e
         return_msg = f"Successfully added {len(processed_items)} items."
+        self.partitions.create_datetime_partitions(
+            self.engine, (item["datetime"] for item in processed_items)
+        )
         if chunk_size:
             for chunk in self._chunks(processed_items, chunk_size):
-                self.engine.execute(database.Item.__table__.insert(), chunk)
+                self._load(chunk)
+            record_write()
             return return_msg
 
-        self.engine.execute(database.Item.__table__.insert(), processed_items)
+        self._load(processed_items)
+        record_write()
         return return_msg
+
+    def _load(self, rows: List[Dict]) -> None:
+        """Load preprocessed items in a single transaction."""
+        if self.method == COPY:
+            with self.engine.begin() as conn:
+                copy_rows(conn, database.Item.__table__, rows)
+            return
+        self.engine.execute(database.Item.__table__.insert(), rows)
+
+    def _merge(
+        self, conn: Connection, rows: List[Dict]
+    ) -> Dict[str, schemas.BulkItemStatus]:
+        """Merge preprocessed items into the item table through a staging table.
+
+        Rows are copied to a temporary table, then inserted with `ON CONFLICT DO UPDATE`.  Conflicting rows are only
+        updated when one of their columns differs, so re-sent items are left untouched.  Items whose id is used by an
+        item of another collection are rejected, items never move between collections.  When the table is partitioned
+        the conflict target includes the partition key, so rows of re-sent items whose partition key changed (ex. an
+        item moved to another month) are deleted first and their items are reported as updated.
+
+        Returns:
+            The status (inserted, updated or rejected) of the written items, unchanged items are omitted.
+        """
+        table = database.Item.__table__
+        preparer = conn.dialect.identifier_preparer
+        columns = [preparer.quote(column.name) for column in table.columns]
+        key = [preparer.quote(column) for column in self.partitions.primary_key(conn)]
+        changed = " OR ".join(
+            f"ST_AsEWKB(t.{name}) IS DISTINCT FROM ST_AsEWKB(excluded.{name})"
+            if isinstance(column.type, ga.Geometry)
+            else f"t.{name} IS DISTINCT FROM excluded.{name}"
+            for (name, column) in zip(columns, table.columns)
+            if name not in key
+        )
+
+        conn.execute(
+            f"CREATE TEMPORARY TABLE items_staging (LIKE {preparer.format_table(table)}) "
+            "ON COMMIT DROP"
+        )
+        staging = sa.Table(
+            "items_staging",
+            sa.MetaData(),
+            *[sa.Column(column.name, column.type) for column in table.columns],
+        )
+        copy_rows(conn, staging, rows)
+
+        conflicts = dict(
+            conn.execute(
+                f"DELETE FROM items_staging s USING {preparer.format_table(table)} t "
+                "WHERE t.id = s.id AND t.collection_id IS DISTINCT FROM s.collection_id "
+                "RETURNING s.id, t.collection_id"
+            ).fetchall()
+        )
+        moved = set()
+        partition_key = [name for name in key if name != preparer.quote("id")]
+        if partition_key:
+            moved = {
+                row[0]
+                for row in conn.execute(
+                    f"DELETE FROM {preparer.format_table(table)} t USING items_staging s "
+                    "WHERE t.id = s.id AND ("
+                    + " OR ".join(
+                        f"t.{name} IS DISTINCT FROM s.{name}" for name in partition_key
+                    )
+                    + ") RETURNING t.id"
+                )
+            }
+        existing = {
+            row[0]
+            for row in conn.execute(
+                f"SELECT s.id FROM items_staging s JOIN {preparer.format_table(table)} t "
+                f"USING ({', '.join(key)})"
+            )
+        }
+        written = conn.execute(
+            f"INSERT INTO {preparer.format_table(table)} AS t ({', '.join(columns)}) "
+            f"SELECT {', '.join(columns)} FROM items_staging "
+            f"ON CONFLICT ({', '.join(key)}) DO UPDATE SET "
+            + ", ".join(
+                f"{name} = excluded.{name}" for name in columns if name not in key
+            )
+            # Rows of other collections written since the staged rows were checked are left untouched
+            + f" WHERE t.collection_id = excluded.collection_id AND ({changed}) RETURNING t.id"
+        )
+        statuses = {
+            id: schemas.BulkItemStatus(
+                id=id,
+                status=schemas.BulkItemStatusType.updated
+                if id in existing or id in moved
+                else schemas.BulkItemStatusType.inserted,
+            )
+            for (id,) in written
+        }
+        for (id, collection_id) in conflicts.items():
+            statuses[id] = schemas.BulkItemStatus(
+                id=id,
+                status=schemas.BulkItemStatusType.rejected,
+                reason=f"id is used by an item of collection {collection_id}",
+            )
+        return statuses
+
+    def bulk_item_upsert(
+        self,
+        items: schemas.BulkItems,
+        chunk_size: Optional[int] = None,
+        collection_id: Optional[str] = None,
+        **kwargs,
+    ) -> schemas.BulkItemsResult:
+        """Bulk item creation or replacement.
+
+        Items are validated one by one: invalid items (ex. an unparsable or null datetime), items of another collection
+        than `collection_id` (the collection of the request path by default), items of collections which don't exist,
+        items whose id is used by an item of another collection and all but the last occurrence of an id are rejected
+        without failing the others.  Each chunk is merged in its own transaction (see
+        `_merge`).  Items are matched on their id, including items whose partition key changed when the table is
+        partitioned (ex. an item moved to another month under datetime partitioning replaces its previous row).
+        """
+        if collection_id is None and "request" in kwargs:
+            collection_id = kwargs["request"].path_params.get("collectionId")
+        statuses: List[schemas.BulkItemStatus] = []
+        processed_items: Dict[str, Dict] = {}
+        positions: Dict[str, int] = {}
+        for raw in items.items:
+            id = raw.get("id") if isinstance(raw, dict) else None
+            try:
+                item = self._preprocess_item(schemas.Item.parse_obj(raw))
+                if collection_id is not None and item["collection_id"] != collection_id:
+                    raise ValueError(
+                        f"collection {item['collection_id']} does not match the collection of the request "
+                        f"({collection_id})"
+                    )
+            except ValueError as e:  # includes pydantic validation errors
+                statuses.append(
+                    schemas.BulkItemStatus(
+                        id=id, status=schemas.BulkItemStatusType.rejected, reason=str(e)
+                    )
+                )
+                continue
+            if item["id"] in positions:
+                statuses[
+                    positions[item["id"]]
+                ].status = schemas.BulkItemStatusType.rejected
+                statuses[
+                    positions[item["id"]]
+                ].reason = "superseded by a later item with the same id"
+            positions[item["id"]] = len(statuses)
+            processed_items[item["id"]] = item
+            statuses.append(
+                schemas.BulkItemStatus(
+                    id=item["id"], status=schemas.BulkItemStatusType.unchanged
+                )
+            )
+
+        with self.engine.begin() as conn:
+            collections = {item["collection_id"] for item in processed_items.values()}
+            known = {
+                row[0]
+                for row in conn.execute(
+                    sa.select([database.Collection.id]).where(
+                        database.Collection.id.in_(collections)
+                    )
+                )
+            }
+            for (id, item) in list(processed_items.items()):
+                if item["collection_id"] not in known:
+                    statuses[positions[id]].status = schemas.BulkItemStatusType.rejected
+                    statuses[
+                        positions[id]
+                    ].reason = f"collection {item['collection_id']} does not exist"
+                    del processed_items[id]
+        self.partitions.create_datetime_partitions(
+            self.engine, (item["datetime"] for item in processed_items.values())
+        )
+
+        rows = list(processed_items.values())
+        for chunk in self._chunks(rows, chunk_size or len(rows) or 1):
+            with self.engine.begin() as conn:
+                for (id, status) in self._merge(conn, chunk).items():
+                    statuses[positions[id]] = status
+        record_write()
+
+        result = schemas.BulkItemsResult(items=statuses)
+        for status in statuses:
+            setattr(
+                result, status.status.value, getattr(result, status.status.value) + 1
+            )
+        return result
+
+    async def bulk_item_stream(
+        self,
+        body: AsyncIterator[bytes],
+        chunk_size: Optional[int] = None,
+        collection_id: Optional[str] = None,
+        **kwargs,
+    ) -> schemas.BulkItemsResult:
+        """Bulk item creation or replacement from a newline-delimited JSON body.
+
+        The body is parsed as it is received and upserted (see `bulk_item_upsert`) every `chunk_size` items, so memory
+        use is bounded by the chunk size rather than by the size of the body.  Chunks are written in the threadpool,
+        and the body isn't read while a chunk is written.  Only rejected items are listed in the result, their reason
+        is prefixed by their line number.
+        """
+        chunk_size = chunk_size or config.settings.bulk_stream_chunk_size
+        result = schemas.BulkItemsResult()
+        async for chunk in ndjson_chunks(body, chunk_size):
+            lines = []
+            items = []
+            for (number, value) in chunk:
+                if isinstance(value, dict):
+                    lines.append(number)
+                    items.append(value)
+                    continue
+                reason = value if isinstance(value, ValueError) else "not an object"
+                result.rejected += 1
+                result.items.append(
+                    schemas.BulkItemStatus(
+                        status=schemas.BulkItemStatusType.rejected,
+                        reason=f"line {number}: {reason}",
+                    )
+                )
+            if not items:
+                continue
+
+            written = await run_in_threadpool(
+                self.bulk_item_upsert,
+                schemas.BulkItems(items=items),
+                collection_id=collection_id,
+            )
+            for key in ("inserted", "updated", "unchanged", "rejected"):
+                setattr(result, key, getattr(result, key) + getattr(written, key))
+            for (number, status) in zip(lines, written.items):
+                if status.status == schemas.BulkItemStatusType.rejected:
+                    status.reason = f"line {number}: {status.reason}"
+                    result.items.append(status)
+        logger.info(
+            f"Streamed {result.inserted + result.updated + result.unchanged} items, "
+            f"rejected {result.rejected}"
+        )
+        return result
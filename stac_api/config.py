@@ -1,6 +1,6 @@
 """Application settings."""
 import enum
-from typing import Optional, Set
+from typing import List, Optional, Set
 
 from pydantic import BaseSettings
 
@@ -12,8 +12,11 @@ class ApiExtensions(enum.Enum):
     Ref: https://github.com/radiantearth/stac-api-spec/tree/master/extensions
     """
 
+    aggregation = "aggregation"
     context = "context"
+    diagnostics = "diagnostics"
     fields = "fields"
+    filter = "filter"
     query = "query"
     sort = "sort"
     transaction = "transaction"
@@ -38,7 +41,48 @@ class ApiSettings(BaseSettings):
         forbidden_fields: set of fields defined by STAC but not included in the database.
         indexed_fields:
             set of fields which are usually in `item.properties` but are indexed as distinct columns in
-            the database.
+            the database.  Queryable fields which aren't declared by the item model are promoted to their own columns
+            (see `stac_api.models.database.Item.promote_fields`), existing rows must be backfilled before the field is
+            added (see `scripts/promote_fields.py`).
+        text_queryables:
+            set of queryable fields which support the string operators of the query extension (`startsWith`,
+            `endsWith`, `contains`).  Each of these fields must be backed by `text_pattern_ops` and `pg_trgm` indexes
+            (see alembic migrations).
+        sortable_queryables:
+            set of queryable fields backed by sort indexes on `(field, id)`, built on the expression returned by
+            `stac_api.models.database.Item.get_field` (see alembic migrations).
+        filter_strict_mode: reject CQL2 filters which can't be served by an index.
+        subdivide_max_vertices:
+            search geometries with more vertices are split with `ST_Subdivide` before the intersection test (see
+            `stac_api.clients.postgres.spatial.intersects`).
+        admin_api_key: key required by admin endpoints (`X-API-Key` header), admin endpoints are disabled if unset.
+        slow_query_threshold: log queries slower than this duration (seconds), disabled if unset.
+        slow_query_sample_rate: fraction of the slow queries which are logged.
+        search_max_cost: reject searches whose estimated cost (postgres cost units) exceeds this budget.
+        search_max_count_rows:
+            skip the exact count of the context extension (`matched`) when the estimated number of matched items
+            exceeds this budget.
+        search_statement_timeout: statement timeout (milliseconds) of search queries.
+        export_batch_size: number of rows fetched per round trip by the server-side cursor of exports.
+        bulk_stream_chunk_size: number of items validated and written at a time by streaming bulk ingests.
+        ingest_job_workers: number of background ingest jobs run at once by each API process.
+        ingest_job_chunk_size: number of items staged, and then written, at a time by background ingest jobs.
+        ingest_job_max_errors: number of rejected items listed by a background ingest job (all are counted).
+        ingest_job_max_attempts: number of times a failing background ingest job is run before it fails.
+        ingest_job_retry_delay: seconds before a failed background ingest job is run again, doubled on each attempt.
+        search_batch_max_size: maximum number of searches of a batch search (`POST /search/batch`).
+        items_by_ids_max_size: maximum number of items requested by id at once (`POST /search/ids`).
+        summary_queryables:
+            set of numeric queryable fields whose range (`min`/`max`) is maintained in the summaries of each
+            collection.  Changes are installed in the database by `scripts/refresh_collection_summaries.py`.
+        collection_extents_merge_interval:
+            seconds between merges of the aggregates queued by item writes into the collection extents and summaries
+            (see `stac_api.clients.postgres.extents.CollectionExtentsClient`), merges must be scheduled externally if
+            unset.
+        grid_prefilter_margin:
+            enables the grid cell prefilter of spatial searches (see `stac_api.models.geohash`).  Items are keyed by
+            the cell of their centroid, so the margin (degrees) must be at least the largest distance between the
+            centroid of an item and its footprint, items with larger footprints may be missed.
     """
 
     environment: str
@@ -50,6 +94,60 @@ class ApiSettings(BaseSettings):
     # Fields which are item properties but indexed as distinct fields in the database model
     indexed_fields: Set[str] = {"datetime"}
 
+    # Fields which support pattern matching, backed by prefix and trigram indexes
+    text_queryables: Set[str] = {"aidash:feeder_id", "aidash:segment_id"}
+
+    # Fields which are sorted by an index scan, backed by expression indexes
+    sortable_queryables: Set[str] = {
+        "gsd",
+        "eo:cloud_cover",
+        "aidash:feeder_id",
+        "aidash:segment_id",
+    }
+
+    # Reject filters which would fall back to a sequential scan
+    filter_strict_mode: bool = False
+
+    # Split large search geometries into parts with at most this many vertices
+    subdivide_max_vertices: int = 256
+
+    # Prefilter spatial searches on the grid cell of item centroids (disabled by default)
+    grid_prefilter_margin: Optional[float] = None
+
+    admin_api_key: Optional[str] = None
+
+    # Search admission control (disabled by default, see `stac_api.clients.postgres.admission`)
+    search_max_cost: Optional[float] = None
+    search_max_count_rows: Optional[int] = None
+    search_statement_timeout: Optional[int] = None
+
+    # Rows fetched per round trip when streaming exports
+    export_batch_size: int = 1000
+
+    # Items buffered by streaming bulk ingests (`PUT /collections/{collectionId}/bulk_items/stream`)
+    bulk_stream_chunk_size: int = 1000
+
+    # Background ingest jobs (`POST /collections/{collectionId}/bulk_items/jobs`), run by an in-process worker pool
+    ingest_job_workers: int = 2
+    ingest_job_chunk_size: int = 1000
+    ingest_job_max_errors: int = 1000
+    ingest_job_max_attempts: int = 5
+    ingest_job_retry_delay: float = 1.0
+
+    # Searches run by a single batch search
+    search_batch_max_size: int = 200
+
+    # Items read by a single request of items by id
+    items_by_ids_max_size: int = 5000
+
+    # Collection summaries and extents, maintained from the items
+    summary_queryables: Set[str] = {"gsd", "eo:cloud_cover"}
+    collection_extents_merge_interval: Optional[float] = 5.0
+
+    # Slow query log (disabled by default)
+    slow_query_threshold: Optional[float] = None
+    slow_query_sample_rate: float = 0.1
+
     class Config:
         """model config (https://pydantic-docs.helpmanual.io/usage/model_config/)."""
 
@@ -63,10 +161,28 @@ class PostgresSettings(ApiSettings):
     Attributes:
         postgres_user: postgres username.
         postgres_pass: postgres password.
-        postgres_host_reader: hostname for the reader connection.
+        postgres_host_reader: hostname for the reader connection, or comma separated hostnames of the read replicas.
         postgres_host_writer: hostname for the writer connection.
         postgres_port: database port.
         postgres_dbname: database name.
+        reader_routing: replica selection strategy (`round_robin` or `least_connections`).
+        replica_max_lag: skip replicas lagging by more than this many seconds, lag is not checked if unset.
+        replica_check_interval: seconds between health checks of a replica.
+        read_your_writes_window:
+            route the reads of a client to the writer for this many seconds after it writes, disabled if unset.
+        reader_pool_size: number of connections kept open by the reader pool (by the pool of each replica).
+        reader_max_overflow: connections opened on top of the reader pool size under load.
+        reader_pool_timeout: seconds to wait for a reader connection before failing the request.
+        reader_pool_recycle: replace reader connections older than this many seconds, never if -1.
+        reader_pool_pre_ping: test reader connections when they are checked out.
+        writer_pool_size: number of connections kept open by the writer pool.
+        writer_max_overflow: connections opened on top of the writer pool size under load.
+        writer_pool_timeout: seconds to wait for a writer connection before failing the request.
+        writer_pool_recycle: replace writer connections older than this many seconds, never if -1.
+        writer_pool_pre_ping: test writer connections when they are checked out.
+        async_client:
+            serve the core endpoints with the asyncpg client (`stac_api.clients.postgres.async_core`), which requires
+            the async extra.  Reads are not routed across replicas by the async client.
     """
 
     postgres_user: str
@@ -76,11 +192,40 @@ class PostgresSettings(ApiSettings):
     postgres_port: str
     postgres_dbname: str
 
+    # Read replica routing (see `stac_api.clients.postgres.replicas`)
+    reader_routing: str = "round_robin"
+    replica_max_lag: Optional[float] = None
+    replica_check_interval: float = 5.0
+    read_your_writes_window: Optional[float] = None
+
+    # Connection pools (see `stac_api.clients.postgres.session.PoolOptions`)
+    reader_pool_size: int = 5
+    reader_max_overflow: int = 10
+    reader_pool_timeout: float = 30.0
+    reader_pool_recycle: int = -1
+    reader_pool_pre_ping: bool = True
+    writer_pool_size: int = 5
+    writer_max_overflow: int = 10
+    writer_pool_timeout: float = 30.0
+    writer_pool_recycle: int = -1
+    writer_pool_pre_ping: bool = True
+
+    # Await core endpoints on the event loop (see `stac_api.clients.postgres.async_core`)
+    async_client: bool = False
+
     @property
     def reader_connection_string(self):
         """Create reader psql connection string."""
         return f"postgresql://{self.postgres_user}:{self.postgres_pass}@{self.postgres_host_reader}:{self.postgres_port}/{self.postgres_dbname}"
 
+    @property
+    def reader_connection_strings(self) -> List[str]:
+        """Create a psql connection string for each reader host."""
+        return [
+            f"postgresql://{self.postgres_user}:{self.postgres_pass}@{host.strip()}:{self.postgres_port}/{self.postgres_dbname}"
+            for host in self.postgres_host_reader.split(",")
+        ]
+
     @property
     def writer_connection_string(self):
         """Create writer psql connection string."""
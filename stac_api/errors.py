@@ -1,7 +1,7 @@
 """Error handling."""
 
 import logging
-from typing import Callable, Dict, Type
+from typing import Any, Callable, Dict, List, Optional, Type
 
 from fastapi import FastAPI
 from starlette import status
@@ -41,11 +41,65 @@ class DatabaseError(StacApiError):
     pass
 
 
+class InvalidQueryParameter(StacApiError):
+    """Error for unknown or invalid query parameters."""
+
+    pass
+
+
+class InvalidItem(StacApiError):
+    """Item which can't be written (ex. its datetime can't be parsed)."""
+
+    pass
+
+
+class ForbiddenError(StacApiError):
+    """Missing or invalid credentials."""
+
+    pass
+
+
+class PoolExhausted(StacApiError):
+    """No database connection became available before the pool timeout."""
+
+    pass
+
+
+class SearchTooExpensive(StacApiError):
+    """Search rejected by admission control.
+
+    Attributes:
+        suggestions: filters which would make the search cheaper.
+        estimates: planner estimates which caused the rejection.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        suggestions: Optional[List[str]] = None,
+        estimates: Optional[Dict[str, Any]] = None,
+    ):
+        """Create the error."""
+        super().__init__(message)
+        self.suggestions = suggestions or []
+        self.estimates = estimates or {}
+
+    @property
+    def details(self) -> Dict[str, Any]:
+        """Additional fields of the error response."""
+        return {"suggestions": self.suggestions, "estimates": self.estimates}
+
+
 DEFAULT_STATUS_CODES = {
     NotFoundError: status.HTTP_404_NOT_FOUND,
     ConflictError: status.HTTP_409_CONFLICT,
     ForeignKeyError: status.HTTP_422_UNPROCESSABLE_ENTITY,
     DatabaseError: status.HTTP_424_FAILED_DEPENDENCY,
+    InvalidQueryParameter: status.HTTP_400_BAD_REQUEST,
+    InvalidItem: status.HTTP_400_BAD_REQUEST,
+    ForbiddenError: status.HTTP_403_FORBIDDEN,
+    SearchTooExpensive: status.HTTP_422_UNPROCESSABLE_ENTITY,
+    PoolExhausted: status.HTTP_503_SERVICE_UNAVAILABLE,
     Exception: status.HTTP_500_INTERNAL_SERVER_ERROR,
 }
 
@@ -63,7 +117,10 @@ def exception_handler_factory(status_code: int) -> Callable:
     def handler(request: Request, exc: Exception):
         """I handle exceptions!!."""
         logger.error(exc, exc_info=True)
-        return JSONResponse(content={"detail": str(exc)}, status_code=status_code)
+        content = {"detail": str(exc)}
+        # Errors may carry structured details (ex. `SearchTooExpensive`)
+        content.update(getattr(exc, "details", {}))
+        return JSONResponse(content=content, status_code=status_code)
 
     return handler
 
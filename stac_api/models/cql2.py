@@ -0,0 +1,399 @@
+"""CQL2 filter expressions.
+
+Parses CQL2-JSON and CQL2-text filters into a common abstract syntax tree, which mirrors the structure of CQL2-JSON
+(`{"op": ..., "args": [...]}`).  Operator names are normalized to lower case, so `S_INTERSECTS(...)` and
+`{"op": "s_intersects", ...}` produce the same tree.
+
+https://docs.ogc.org/DRAFTS/21-065.html
+"""
+import re
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import attr
+from shapely import wkt
+from shapely.errors import WKTReadingError
+from shapely.geometry import box, mapping, shape
+
+
+class FilterLang(str, Enum):
+    """Supported filter languages."""
+
+    cql2_json = "cql2-json"
+    cql2_text = "cql2-text"
+
+
+class CQL2ParseError(ValueError):
+    """Invalid filter expression."""
+
+    pass
+
+
+@attr.s(frozen=True)
+class Property:
+    """Reference to an item property (ex. `eo:cloud_cover`) or core field (ex. `datetime`)."""
+
+    name: str = attr.ib()
+
+
+@attr.s(frozen=True)
+class Timestamp:
+    """Instant literal."""
+
+    value: datetime = attr.ib()
+
+
+@attr.s(frozen=True)
+class Interval:
+    """Interval literal, open ends (`..`) are None."""
+
+    start: Optional[datetime] = attr.ib()
+    end: Optional[datetime] = attr.ib()
+
+
+@attr.s(frozen=True)
+class Geometry:
+    """Geometry literal (GeoJSON)."""
+
+    geojson: Dict = attr.ib(hash=False)
+
+
+@attr.s(frozen=True)
+class Expression:
+    """Operator applied to a list of arguments."""
+
+    op: str = attr.ib(converter=str.lower)
+    args: Tuple = attr.ib(converter=tuple)
+
+
+Node = Union[
+    Expression, Property, Timestamp, Interval, Geometry, str, int, float, bool, list
+]
+
+
+# RFC 3339 allows any number of fractional digits, `datetime.fromisoformat` requires 3 or 6
+_FRACTION = re.compile(r"\.(\d+)")
+
+
+def _microseconds(match: re.Match) -> str:
+    return "." + match.group(1)[:6].ljust(6, "0")
+
+
+def parse_instant(value: Union[str, datetime, date]) -> datetime:
+    """Parse a RFC 3339 timestamp or date, timezone aware values are converted to naive UTC."""
+    if isinstance(value, str):
+        try:
+            if "T" in value.upper() or " " in value:
+                value = datetime.fromisoformat(
+                    _FRACTION.sub(_microseconds, value.upper().replace("Z", "+00:00"))
+                )
+            else:
+                value = date.fromisoformat(value)
+        except ValueError:
+            raise CQL2ParseError(f"Invalid timestamp: {value}")
+    elif not isinstance(value, date):
+        raise CQL2ParseError(f"Invalid timestamp: {value}")
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _interval_bound(value: Any) -> Optional[datetime]:
+    if isinstance(value, Timestamp):
+        return value.value
+    if value == "..":
+        return None
+    return parse_instant(value)
+
+
+def _bbox(values: Any) -> Geometry:
+    """Build a polygon from a 2D or 3D bbox, the elevation of 3D bboxes is ignored."""
+    if (
+        not isinstance(values, list)
+        or len(values) not in (4, 6)
+        or not all(
+            isinstance(value, (int, float)) and not isinstance(value, bool)
+            for value in values
+        )
+    ):
+        raise CQL2ParseError(f"Invalid bbox: {values}")
+    if len(values) == 6:
+        values = [values[0], values[1], values[3], values[4]]
+    return Geometry(mapping(box(*values)))
+
+
+def parse_json(obj: Any) -> Node:
+    """Parse a CQL2-JSON expression."""
+    if isinstance(obj, list):
+        return [parse_json(arg) for arg in obj]
+    if not isinstance(obj, dict):
+        return obj
+    if "op" in obj:
+        op, args = obj["op"], obj.get("args", [])
+        if not isinstance(op, str) or not isinstance(args, list):
+            raise CQL2ParseError(f"Invalid expression: {obj}")
+        return Expression(op, [parse_json(arg) for arg in args])
+    if "property" in obj:
+        if not isinstance(obj["property"], str):
+            raise CQL2ParseError(f"Invalid property: {obj}")
+        return Property(obj["property"])
+    if "timestamp" in obj:
+        return Timestamp(parse_instant(obj["timestamp"]))
+    if "date" in obj:
+        return Timestamp(parse_instant(obj["date"]))
+    if "interval" in obj:
+        if not isinstance(obj["interval"], list) or len(obj["interval"]) != 2:
+            raise CQL2ParseError(f"Invalid interval: {obj}")
+        start, end = obj["interval"]
+        return Interval(
+            _interval_bound(parse_json(start)), _interval_bound(parse_json(end))
+        )
+    if "bbox" in obj:
+        return _bbox(obj["bbox"])
+    if "type" in obj and ("coordinates" in obj or "geometries" in obj):
+        try:
+            shape(obj)
+        except Exception:
+            raise CQL2ParseError(f"Invalid geometry: {obj}")
+        return Geometry(obj)
+    raise CQL2ParseError(f"Unsupported expression: {obj}")
+
+
+_TOKENS = re.compile(
+    r"""\s*(?:
+    (?P<number>-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)
+    |(?P<string>'(?:[^']|'')*')
+    |(?P<quoted>"(?:[^"]|"")*")
+    |(?P<operator><>|<=|>=|=|<|>)
+    |(?P<punct>[(),])
+    |(?P<ident>[A-Za-z_][A-Za-z0-9_:.]*)
+    )""",
+    re.VERBOSE,
+)
+
+_WKT_TYPES = {
+    "POINT",
+    "LINESTRING",
+    "POLYGON",
+    "MULTIPOINT",
+    "MULTILINESTRING",
+    "MULTIPOLYGON",
+    "GEOMETRYCOLLECTION",
+}
+
+
+@attr.s(frozen=True)
+class _Token:
+    kind: str = attr.ib()
+    value: str = attr.ib()
+    start: int = attr.ib()
+    end: int = attr.ib()
+
+
+class _TextParser:
+    """Recursive descent parser for CQL2-text.
+
+    Supports logical operators, comparisons, LIKE, BETWEEN, IN, IS NULL and function style predicates (spatial and
+    temporal operators).  Arithmetic expressions are not supported.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens: List[_Token] = []
+        pos = 0
+        text = text.rstrip()
+        while pos < len(text):
+            match = _TOKENS.match(text, pos)
+            if not match or match.end() == pos:
+                raise CQL2ParseError(
+                    f"Unexpected character at position {pos}: {text[pos:pos + 10]}"
+                )
+            self.tokens.append(
+                _Token(
+                    match.lastgroup,
+                    match.group(match.lastgroup),
+                    match.start(match.lastgroup),
+                    match.end(),
+                )
+            )
+            pos = match.end()
+        self.index = 0
+
+    def peek(self) -> Optional[_Token]:
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+    def next(self) -> _Token:
+        token = self.peek()
+        if token is None:
+            raise CQL2ParseError("Unexpected end of filter")
+        self.index += 1
+        return token
+
+    def accept(self, value: str) -> bool:
+        token = self.peek()
+        if token and token.kind in ("ident", "punct") and token.value.upper() == value:
+            self.index += 1
+            return True
+        return False
+
+    def expect(self, value: str) -> None:
+        if not self.accept(value):
+            token = self.peek()
+            found = token.value if token else "end of filter"
+            raise CQL2ParseError(f"Expected {value}, found {found}")
+
+    def parse(self) -> Node:
+        node = self.or_()
+        if self.peek() is not None:
+            raise CQL2ParseError(f"Unexpected token: {self.peek().value}")
+        return node
+
+    def or_(self) -> Node:
+        args = [self.and_()]
+        while self.accept("OR"):
+            args.append(self.and_())
+        return args[0] if len(args) == 1 else Expression("or", args)
+
+    def and_(self) -> Node:
+        args = [self.not_()]
+        while self.accept("AND"):
+            args.append(self.not_())
+        return args[0] if len(args) == 1 else Expression("and", args)
+
+    def not_(self) -> Node:
+        if self.accept("NOT"):
+            return Expression("not", [self.not_()])
+        return self.predicate()
+
+    def predicate(self, allow_scalar: bool = False) -> Node:
+        if self.accept("("):
+            node = self.or_()
+            self.expect(")")
+            return node
+
+        lhs = self.scalar()
+        negate = self.accept("NOT")
+        if self.accept("LIKE"):
+            node = Expression("like", [lhs, self.scalar()])
+        elif self.accept("BETWEEN"):
+            low = self.scalar()
+            self.expect("AND")
+            node = Expression("between", [lhs, low, self.scalar()])
+        elif self.accept("IN"):
+            self.expect("(")
+            values = [self.scalar()]
+            while self.accept(","):
+                values.append(self.scalar())
+            self.expect(")")
+            node = Expression("in", [lhs, values])
+        elif negate:
+            raise CQL2ParseError("NOT must be followed by LIKE, BETWEEN or IN")
+        elif self.accept("IS"):
+            negate = self.accept("NOT")
+            self.expect("NULL")
+            node = Expression("isnull", [lhs])
+        elif self.peek() is not None and self.peek().kind == "operator":
+            node = Expression(self.next().value, [lhs, self.scalar()])
+        elif allow_scalar or isinstance(lhs, (Expression, bool)):
+            # Function style predicate (ex. `S_INTERSECTS(geometry, ...)`), boolean literal or function argument
+            node = lhs
+        else:
+            raise CQL2ParseError(f"Expected a predicate after {lhs}")
+        return Expression("not", [node]) if negate else node
+
+    def scalar(self) -> Node:
+        token = self.next()
+        if token.kind == "number":
+            return (
+                float(token.value)
+                if re.search(r"[.eE]", token.value)
+                else int(token.value)
+            )
+        if token.kind == "string":
+            return token.value[1:-1].replace("''", "'")
+        if token.kind == "quoted":
+            return Property(token.value[1:-1].replace('""', '"'))
+        if token.kind != "ident":
+            raise CQL2ParseError(f"Unexpected token: {token.value}")
+
+        name = token.value.upper()
+        if name in ("TRUE", "FALSE"):
+            return name == "TRUE"
+        if name in ("TIMESTAMP", "DATE"):
+            self.expect("(")
+            value = self.scalar()
+            self.expect(")")
+            return Timestamp(parse_instant(value))
+        if name == "INTERVAL":
+            self.expect("(")
+            start = self.scalar()
+            self.expect(",")
+            end = self.scalar()
+            self.expect(")")
+            return Interval(_interval_bound(start), _interval_bound(end))
+        if name in _WKT_TYPES:
+            return self.wkt(token)
+        if name == "BBOX":
+            return _bbox(self.arguments())
+        if self.peek() is not None and self.peek().value == "(":
+            return Expression(token.value, self.arguments())
+        return Property(token.value)
+
+    def arguments(self) -> List[Node]:
+        self.expect("(")
+        args: List[Node] = []
+        if self.accept(")"):
+            return args
+        args.append(self.predicate(allow_scalar=True))
+        while self.accept(","):
+            args.append(self.predicate(allow_scalar=True))
+        self.expect(")")
+        return args
+
+    def wkt(self, token: _Token) -> Geometry:
+        """Parse a WKT literal by handing the raw text (up to the matching parenthesis) to shapely."""
+        depth = 0
+        end = None
+        for index in range(self.index, len(self.tokens)):
+            value = self.tokens[index].value
+            if value == "(":
+                depth += 1
+            elif value == ")":
+                depth -= 1
+                if depth == 0:
+                    end = index
+                    break
+        if end is None:
+            raise CQL2ParseError(f"Unterminated {token.value} literal")
+        raw = self.text[token.start : self.tokens[end].end]
+        try:
+            geom = wkt.loads(raw)
+        except (WKTReadingError, ValueError):
+            raise CQL2ParseError(f"Invalid geometry: {raw}")
+        self.index = end + 1
+        return Geometry(mapping(geom))
+
+
+def parse_text(text: str) -> Node:
+    """Parse a CQL2-text expression."""
+    return _TextParser(text).parse()
+
+
+def parse(
+    expression: Union[str, Dict[str, Any]], lang: Optional[FilterLang] = None
+) -> Node:
+    """Parse a filter expression, the language is inferred from the type of the expression if not provided."""
+    if lang is None:
+        lang = (
+            FilterLang.cql2_text
+            if isinstance(expression, str)
+            else FilterLang.cql2_json
+        )
+    if lang == FilterLang.cql2_text:
+        if not isinstance(expression, str):
+            raise CQL2ParseError("cql2-text filters must be strings")
+        return parse_text(expression)
+    return parse_json(expression)
@@ -2,7 +2,7 @@
 
 import json
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, Optional
 
 import geoalchemy2 as ga
 import sqlalchemy as sa
@@ -12,7 +12,7 @@ from sqlalchemy.ext.declarative import declarative_base
 from stac_pydantic.shared import DATETIME_RFC339
 
 from stac_api import config
-from stac_api.models import schemas
+from stac_api.models import geohash, schemas
 
 BaseModel = declarative_base()
 
@@ -87,6 +87,34 @@ class Item(BaseModel):  # type:ignore
     parent_collection = sa.orm.relationship("Collection", back_populates="children")
     datetime = sa.Column(sa.TIMESTAMP, nullable=False)
     links = sa.Column(JSONB)
+    # Geohash of the centroid (see `stac_api.models.geohash`)
+    grid_cell = sa.Column(sa.VARCHAR(geohash.MAX_PRECISION), nullable=True)
+    # GeoJSON rendered by the database, populated when the query simplifies or quantizes geometries
+    geojson = sa.orm.query_expression()
+
+    @classmethod
+    def __declare_first__(cls):
+        """Map indexed fields to columns before the mappers are configured."""
+        if config.settings:
+            cls.promote_fields(config.settings.indexed_fields)
+
+    @classmethod
+    def promote_fields(cls, fields: Iterable[str]) -> None:
+        """Add columns for indexed fields which aren't declared by the model.
+
+        Promoted fields are mapped to nullable columns named after the field (without the extension namespace).  The
+        column type is taken from ``schemas.QueryableTypes``, so only queryable fields may be promoted.  The matching
+        DDL is managed by ``stac_api.clients.postgres.promotion.FieldPromotionClient``.
+        """
+        for field in fields:
+            column_name = field.split(":")[-1]
+            if hasattr(cls, column_name):
+                continue
+            setattr(
+                cls,
+                column_name,
+                sa.Column(schemas.QueryableTypes.get(field), nullable=True),
+            )
 
     @classmethod
     def get_database_model(cls, schema: schemas.Item) -> dict:
@@ -94,7 +122,7 @@ class Item(BaseModel):  # type:ignore
         indexed_fields = {}
         for field in config.settings.indexed_fields:
             # Use getattr to accommodate extension namespaces
-            field_value = getattr(schema.properties, field)
+            field_value = getattr(schema.properties, field, None)
             if field == "datetime":
                 field_value = datetime.strptime(field_value, DATETIME_RFC339)
             indexed_fields[field.split(":")[-1]] = field_value
@@ -106,9 +134,11 @@ class Item(BaseModel):  # type:ignore
             properties["created"] = now
         properties["updated"] = now
 
+        geom = shape(schema.geometry)
         return dict(
             collection_id=schema.collection,
-            geometry=ga.shape.from_shape(shape(schema.geometry), 4326),
+            geometry=ga.shape.from_shape(geom, 4326),
+            grid_cell=cls.get_grid_cell(geom),
             properties=properties,
             **indexed_fields,
             **schema.dict(
@@ -120,21 +150,45 @@ class Item(BaseModel):  # type:ignore
             )
         )
 
+    @staticmethod
+    def get_grid_cell(geom) -> Optional[str]:
+        """Compute the grid cell key of a shapely geometry."""
+        if geom.is_empty:
+            return None
+        centroid = geom.centroid
+        return geohash.encode(centroid.x, centroid.y)
+
     @classmethod
     def from_schema(cls, schema: schemas.Item) -> "Item":
         """Create orm model from pydantic model."""
         return cls(**cls.get_database_model(schema))
 
+    @classmethod
+    def get_column(cls, field_name):
+        """Get the column of a field, returns None if the field is stored in the properties JSONB field."""
+        column_name = field_name
+        # Indexed fields are stored as columns named without their extension namespace
+        if field_name in config.settings.indexed_fields:
+            column_name = field_name.split(":")[-1]
+        return getattr(cls, column_name, None)
+
     @classmethod
     def get_field(cls, field_name):
-        """Get a model field."""
-        try:
-            return getattr(cls, field_name)
-        except AttributeError:
-            # Use a JSONB field
-            return cls.properties[(field_name)].cast(
-                getattr(schemas.QueryableTypes, field_name.name)
-            )
+        """Get a model field.
+
+        Fields stored in the properties JSONB field are cast from their text value (`properties ->> field`).  Sort
+        indexes are built on the same expressions (see `ApiSettings.sortable_queryables`), so filters, sorts and
+        keyset predicates on the field can all be served by the index.
+        """
+        column = cls.get_column(field_name)
+        if column is not None:
+            return column
+        # Use a JSONB field
+        field = cls.properties[field_name].astext
+        field_type = schemas.QueryableTypes.get(field_name)
+        if field_type is sa.String:
+            return field
+        return field.cast(field_type)
 
 
 class PaginationToken(BaseModel):  # type:ignore
@@ -145,3 +199,38 @@ class PaginationToken(BaseModel):  # type:ignore
 
     id = sa.Column(sa.VARCHAR(100), nullable=False, primary_key=True)
     keyset = sa.Column(sa.VARCHAR(1000), nullable=False)
+
+
+class IngestJob(BaseModel):  # type:ignore
+    """Background ingest job orm model."""
+
+    __tablename__ = "ingest_jobs"
+    __table_args__ = {"schema": "data"}
+
+    id = sa.Column(sa.VARCHAR(36), nullable=False, primary_key=True)
+    collection_id = sa.Column(sa.VARCHAR(1024), nullable=False)
+    status = sa.Column(sa.VARCHAR(20), nullable=False)
+    created = sa.Column(sa.TIMESTAMP, nullable=False, server_default=sa.func.now())
+    started = sa.Column(sa.TIMESTAMP)
+    finished = sa.Column(sa.TIMESTAMP)
+    total = sa.Column(sa.INTEGER, nullable=False, default=0)
+    processed = sa.Column(sa.INTEGER, nullable=False, default=0)
+    inserted = sa.Column(sa.INTEGER, nullable=False, default=0)
+    updated = sa.Column(sa.INTEGER, nullable=False, default=0)
+    unchanged = sa.Column(sa.INTEGER, nullable=False, default=0)
+    rejected = sa.Column(sa.INTEGER, nullable=False, default=0)
+    errors = sa.Column(JSONB, nullable=False, server_default=sa.text("'[]'"))
+    error = sa.Column(sa.TEXT)
+
+
+class IngestJobItem(BaseModel):  # type:ignore
+    """Item staged by an ingest job, by line of the request body."""
+
+    __tablename__ = "ingest_job_items"
+    __table_args__ = {"schema": "data"}
+
+    job_id = sa.Column(
+        sa.VARCHAR(36), sa.ForeignKey(IngestJob.id), nullable=False, primary_key=True
+    )
+    line = sa.Column(sa.INTEGER, nullable=False, primary_key=True)
+    item = sa.Column(JSONB, nullable=False)
@@ -30,7 +30,8 @@ class ItemGetter(GetterDict):
     object resolves structural differences between the two models, for example:
       - relative links stored in the database must be resolved absolute links and inferred links must be added
       - ``datetime`` is defined as its own field in the database but as ``item.properties.datetime`` in the stac spec
-      - ``geometry`` can be one of several formats when exported from the database but the STAC item expects geojson
+      - ``geometry`` can be one of several formats when exported from the database but the STAC item expects geojson,
+        geometries rendered by the query (``geojson``) take precedence over the ``geometry`` column
     """
 
     @staticmethod
@@ -50,6 +51,9 @@ class ItemGetter(GetterDict):
         for field in config.settings.indexed_fields:
             # Use getattr to accommodate extension namespaces
             field_value = getattr(obj, field.split(":")[-1])
+            if field_value is None:
+                # Field is missing or the row hasn't been backfilled yet (see `Item.promote_fields`)
+                continue
             if field == "datetime":
                 field_value = field_value.strftime(DATETIME_RFC339)
             properties[field] = field_value
@@ -63,7 +67,9 @@ class ItemGetter(GetterDict):
         db_model = obj.__class__(
             id=obj.id,
             stac_version=obj.stac_version,
-            geometry=self.decode_geom(obj.geometry),
+            geometry=self.decode_geom(
+                obj.geojson if obj.geojson is not None else obj.geometry
+            ),
             bbox=obj.bbox,
             properties=properties,
             assets=obj.assets,
@@ -0,0 +1,95 @@
+"""Geohash grid cells.
+
+Items are keyed by the geohash of their centroid (`Item.grid_cell`), a base 32 string in which each character
+subdivides the cell of the previous one, so the cells of a coarser grid are the prefixes of the key.  This makes the
+key usable both as a btree prefilter (`grid_cell LIKE 'r3gx%'`) and as a bucketing key (`substr(grid_cell, 1, 4)`).
+
+https://en.wikipedia.org/wiki/Geohash
+"""
+from typing import List, Set, Tuple
+
+from shapely.geometry.base import BaseGeometry
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Length of the key stored in the database (cells of ~3.7cm x 1.9cm)
+MAX_PRECISION = 12
+
+
+def encode(lon: float, lat: float, precision: int = MAX_PRECISION) -> str:
+    """Encode a point to a geohash, matches postgis `ST_GeoHash`."""
+    lon_range, lat_range = [-180.0, 180.0], [-90.0, 90.0]
+    cells = []
+    bits, char, even = 0, 0, True
+    while len(cells) < precision:
+        # Even bits subdivide longitude, odd bits latitude
+        interval, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (interval[0] + interval[1]) / 2
+        if value >= mid:
+            char = (char << 1) | 1
+            interval[0] = mid
+        else:
+            char = char << 1
+            interval[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            cells.append(BASE32[char])
+            bits, char = 0, 0
+    return "".join(cells)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """Size (width, height) in degrees of a cell."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = (5 * precision) // 2
+    return 360.0 / 2**lon_bits, 180.0 / 2**lat_bits
+
+
+def covering_cells(
+    bounds: Tuple[float, float, float, float], precision: int
+) -> Set[str]:
+    """Get the cells of a grid which cover a bounding box."""
+    minx, miny, maxx, maxy = bounds
+    minx, miny = max(minx, -180.0), max(miny, -90.0)
+    maxx, maxy = min(maxx, 180.0 - 1e-9), min(maxy, 90.0 - 1e-9)
+    width, height = cell_size(precision)
+    # Align to the grid so each cell is visited once
+    start_x = -180.0 + ((minx + 180.0) // width) * width
+    start_y = -90.0 + ((miny + 90.0) // height) * height
+    cells = set()
+    y = start_y
+    while y <= maxy:
+        x = start_x
+        while x <= maxx:
+            cells.add(encode(x + width / 2, y + height / 2, precision))
+            x += width
+        y += height
+    return cells
+
+
+def prefilter_cells(
+    geom: BaseGeometry, margin: float, max_cells: int = 32
+) -> List[str]:
+    """Get the cells covering a geometry expanded by a margin.
+
+    The margin is in degrees, cells are taken at the finest precision yielding at most `max_cells` cells.
+
+    Returns:
+        Sorted list of cells, empty if the geometry can't be covered (ex. it spans most of the globe).
+    """
+    minx, miny, maxx, maxy = geom.bounds
+    bounds = (minx - margin, miny - margin, maxx + margin, maxy + margin)
+    # A single character prefix covers 1/32 of the globe and filters nothing
+    for precision in range(MAX_PRECISION, 1, -1):
+        width, height = cell_size(precision)
+        # Cheap upper bound of the number of cells before enumerating them
+        estimate = ((bounds[2] - bounds[0]) / width + 2) * (
+            (bounds[3] - bounds[1]) / height + 2
+        )
+        if estimate > max_cells * 4:
+            continue
+        cells = covering_cells(bounds, precision)
+        if len(cells) <= max_cells:
+            return sorted(cells)
+    return []
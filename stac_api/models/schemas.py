@@ -9,7 +9,15 @@ from typing import Any, Callable, Dict, List, Optional, Set, Union
 
 import sqlalchemy as sa
 from geojson_pydantic.geometries import Polygon
-from pydantic import BaseModel, Field, ValidationError, root_validator
+from pydantic import (
+    BaseModel,
+    Field,
+    ValidationError,
+    confloat,
+    conint,
+    conlist,
+    root_validator,
+)
 from pydantic.error_wrappers import ErrorWrapper
 from shapely.geometry import Polygon as ShapelyPolygon
 from shapely.geometry import shape
@@ -22,6 +30,7 @@ from stac_pydantic.shared import Link
 from stac_pydantic.utils import AutoValueEnum
 
 from stac_api import config
+from stac_api.models.cql2 import FilterLang
 from stac_api.models.decompose import CollectionGetter, ItemGetter
 
 # Be careful: https://github.com/samuelcolvin/pydantic/issues/1423#issuecomment-642797287
@@ -37,16 +46,16 @@ class Operator(str, AutoValueEnum):
     le = auto()
     gt = auto()
     ge = auto()
-    # TODO: These are defined in the spec but aren't currently implemented by the api
-    # startsWith = auto()
-    # endsWith = auto()
-    # contains = auto()
-    # in = auto()
+    in_ = "in"
+    # String operators, only supported by text queryables (see `ApiSettings.text_queryables`)
+    startsWith = auto()
+    endsWith = auto()
+    contains = auto()
 
     @DynamicClassAttribute
     def operator(self) -> Callable[[Any, Any], bool]:
         """Return python operator."""
-        return getattr(operator, self._value_)
+        return getattr(operator, self._name_)
 
 
 class Queryables(str, AutoValueEnum):
@@ -103,6 +112,14 @@ class QueryableTypes:
 
     dtype = sa.String
 
+    @classmethod
+    def get(cls, field_name: str) -> Any:
+        """Get the sqlalchemy type of a queryable field."""
+        try:
+            return getattr(cls, Queryables(field_name).name)
+        except (ValueError, AttributeError):
+            raise ValueError(f"Field {field_name} is not a typed queryable")
+
 
 class FieldsExtension(FieldsBase):
     """FieldsExtension.
@@ -193,6 +210,99 @@ class Items(BaseModel):
     items: List[Item]
 
 
+class BulkItems(BaseModel):
+    """Items of a bulk upsert, validated one by one so invalid items are rejected individually."""
+
+    items: List[Dict[str, Any]]
+
+
+class BulkItemStatusType(str, AutoValueEnum):
+    """Outcome of the upsert of an item."""
+
+    inserted = auto()
+    updated = auto()
+    # The stored item is identical
+    unchanged = auto()
+    # Invalid item, or item of a collection which doesn't exist
+    rejected = auto()
+
+
+class BulkItemStatus(BaseModel):
+    """Outcome of the upsert of an item, the reason is only set for rejected items."""
+
+    id: Optional[str]
+    status: BulkItemStatusType
+    reason: Optional[str] = None
+
+
+class BulkItemsResult(BaseModel):
+    """Result of a bulk upsert.
+
+    Attributes:
+        inserted: number of inserted items.
+        updated: number of updated items.
+        unchanged: number of items which were already stored as sent.
+        rejected: number of rejected items.
+        items: outcome of each item, in request order.
+    """
+
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    rejected: int = 0
+    items: List[BulkItemStatus] = []
+
+
+class IngestJobStatus(str, AutoValueEnum):
+    """Status of a background ingest job."""
+
+    # The request body is being staged
+    staging = auto()
+    queued = auto()
+    running = auto()
+    succeeded = auto()
+    # The job stopped on an error, items written before the error are kept and the others stay staged
+    failed = auto()
+    # The job was cancelled, items which weren't written are dropped
+    cancelled = auto()
+
+
+class IngestJob(BaseModel):
+    """Background ingest job.
+
+    Attributes:
+        id: job id.
+        collection: collection of the request.
+        status: status of the job.
+        created: time the job was submitted.
+        started: time the job started running.
+        finished: time the job succeeded, failed or was cancelled.
+        total: number of staged lines.
+        processed: number of lines written or rejected so far.
+        inserted: number of inserted items.
+        updated: number of updated items.
+        unchanged: number of items which were already stored as sent.
+        rejected: number of rejected items.
+        errors: rejected items (reasons prefixed by their line number), the first `ingest_job_max_errors` are kept.
+        error: error which failed the job, or the last attempt of a requeued job.
+    """
+
+    id: str
+    collection: str
+    status: IngestJobStatus
+    created: datetime
+    started: Optional[datetime] = None
+    finished: Optional[datetime] = None
+    total: int = 0
+    processed: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    rejected: int = 0
+    errors: List[BulkItemStatus] = []
+    error: Optional[str] = None
+
+
 class STACSearch(Search):
     """Search model."""
 
@@ -202,6 +312,12 @@ class STACSearch(Search):
     field: FieldsExtension = Field(FieldsExtension(), alias="fields")
     # Override query extension with supported operators
     query: Optional[Dict[Queryables, Dict[Operator, Any]]]
+    # Filter extension (CQL2), the language is inferred from the type of the filter if not provided
+    filter: Optional[Union[str, Dict[str, Any]]] = None
+    filter_lang: Optional[FilterLang] = Field(None, alias="filter-lang")
+    # Output geometry simplification tolerance (degrees) and number of decimal digits
+    simplify: Optional[confloat(ge=0)] = None  # type:ignore
+    precision: Optional[conint(ge=0, le=15)] = None  # type:ignore
     token: Optional[str] = None
 
     @root_validator(pre=True)
@@ -226,14 +342,8 @@ class STACSearch(Search):
     def include_query_fields(cls, values: Dict) -> Dict:
         """Root validator to ensure query fields are included in the API response."""
         if "query" in values and values["query"]:
-            query_include = set(
-                [
-                    k.value
-                    if k in config.settings.indexed_fields
-                    else f"properties.{k.value}"
-                    for k in values["query"]
-                ]
-            )
+            # Indexed fields are recomposed into `item.properties` by the ItemGetter
+            query_include = set([f"properties.{k.value}" for k in values["query"]])
             if not values["field"].include:
                 values["field"].include = query_include
             else:
@@ -248,3 +358,162 @@ class STACSearch(Search):
             return ShapelyPolygon.from_bounds(*self.bbox)
         else:
             return None
+
+
+class ItemsByIds(BaseModel):
+    """Request of items by id.
+
+    Attributes:
+        ids: item ids, items are returned in this order.
+        field: fields extension include/exclude sets.
+        simplify: output geometry simplification tolerance (degrees).
+        precision: number of decimal digits of output geometries.
+    """
+
+    ids: conlist(str, min_items=1)  # type:ignore
+    field: FieldsExtension = Field(FieldsExtension(), alias="fields")
+    simplify: Optional[confloat(ge=0)] = None  # type:ignore
+    precision: Optional[conint(ge=0, le=15)] = None  # type:ignore
+
+
+class AggregationType(str, AutoValueEnum):
+    """Supported aggregations."""
+
+    # Count by collection
+    collection = auto()
+    # Count by datetime truncated to an interval
+    datetime = auto()
+    # Count by value of a queryable
+    terms = auto()
+    # Statistics of a numeric queryable
+    stats = auto()
+    # Count by grid cell (see `stac_api.models.geohash`)
+    grid = auto()
+
+
+class DatetimeInterval(str, AutoValueEnum):
+    """Datetime histogram intervals (postgres `date_trunc` fields)."""
+
+    year = auto()
+    quarter = auto()
+    month = auto()
+    week = auto()
+    day = auto()
+    hour = auto()
+
+
+class Aggregation(BaseModel):
+    """Aggregation.
+
+    Attributes:
+        name: name of the aggregation in the response, defaults to the aggregation type.
+        type: aggregation type.
+        field: queryable field (`terms` and `stats` aggregations).
+        interval: histogram interval (`datetime` aggregation).
+        precision: length of the grid cell keys (`grid` aggregation).
+        limit: maximum number of buckets, the largest buckets are returned.
+    """
+
+    name: Optional[str] = None
+    type: AggregationType
+    field: Optional[Queryables] = None
+    interval: DatetimeInterval = DatetimeInterval.month
+    precision: int = Field(5, ge=1, le=12)
+    limit: int = Field(100, ge=1, le=10000)
+
+    @root_validator
+    def validate_field(cls, values: Dict) -> Dict:
+        """Validate the aggregated field."""
+        if values.get("type") in (AggregationType.terms, AggregationType.stats):
+            if not values.get("field"):
+                raise ValueError(
+                    f"Field is required by {values['type'].value} aggregations"
+                )
+        if values.get("type") == AggregationType.stats:
+            field_type = QueryableTypes.get(values["field"])
+            if field_type not in (sa.Integer, sa.Float):
+                raise ValueError(
+                    f"Field {values['field'].value} is not numeric, stats aggregations require a numeric field"
+                )
+        if not values.get("name") and values.get("type"):
+            values["name"] = values["type"].value
+        return values
+
+
+class AggregationRequest(STACSearch):
+    """Aggregation request, a search with a list of aggregations."""
+
+    aggregations: conlist(Aggregation, min_items=1) = Field(...)  # type:ignore
+
+
+class AggregationBucket(BaseModel):
+    """Aggregation bucket."""
+
+    key: Any
+    count: int
+
+
+class AggregationStats(BaseModel):
+    """Statistics of a numeric field."""
+
+    count: int
+    min: Optional[float]
+    max: Optional[float]
+    avg: Optional[float]
+    sum: Optional[float]
+
+
+class AggregationResult(BaseModel):
+    """Aggregation result, either a list of buckets or statistics."""
+
+    name: str
+    type: AggregationType
+    buckets: Optional[List[AggregationBucket]] = None
+    stats: Optional[AggregationStats] = None
+
+
+class AggregationCollection(BaseModel):
+    """Aggregation response."""
+
+    matched: int
+    aggregations: List[AggregationResult]
+
+
+class QueryPlan(BaseModel):
+    """Query plan of a search.
+
+    Attributes:
+        sql: compiled SQL statement.
+        parameters: bound parameters of the statement.
+        plan: output of `EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`.
+    """
+
+    sql: str
+    parameters: Dict[str, Any]
+    plan: Any
+
+
+class PoolStatus(BaseModel):
+    """Metrics of a database connection pool.
+
+    Attributes:
+        role: role of the database (`reader` or `writer`).
+        host: database host.
+        size: number of connections kept open.
+        checked_out: number of connections currently in use.
+        overflow: number of connections opened on top of the pool size.
+        checkouts: number of connections checked out since startup.
+        timeouts: number of requests which timed out waiting for a connection.
+        wait_time_avg_ms: average time spent waiting for a connection.
+        wait_time_max_ms: longest time spent waiting for a connection.
+    """
+
+    role: str
+    host: Optional[str]
+    size: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    wait_time_avg_ms: float
+    wait_time_max_ms: float
@@ -1,8 +1,21 @@
+import asyncio
 from datetime import datetime, timedelta
 
+import pytest
+from starlette.testclient import TestClient
+
+from stac_api.api.app import StacApi
+from stac_api.api.extensions import ContextExtension, TransactionExtension
+from stac_api.clients.postgres.async_core import AsyncCoreCrudClient
+from stac_api.clients.postgres.async_session import AsyncSession
+from stac_api.clients.postgres.core import CoreCrudClient
+from stac_api.clients.postgres.replicas import ReadYourWritesMiddleware
+from stac_api.clients.postgres.session import Session
+from stac_api.clients.postgres.transactions import TransactionsClient
+from stac_api.config import PostgresSettings
 from stac_api.models.schemas import Item
 
-from ..conftest import MockStarletteRequest
+from ..conftest import MockStarletteRequest, settings
 
 STAC_CORE_ROUTES = [
     "GET /",
@@ -41,6 +54,34 @@ def test_transactions_router(api_client):
     assert not transaction_routes - api_routes
 
 
+def test_async_core_router(app_client, load_test_data, postgres_transactions):
+    pytest.importorskip("asyncpg")
+    item = Item.parse_obj(load_test_data("test_item.json"))
+    postgres_transactions.create_item(item, request=MockStarletteRequest)
+
+    session = AsyncSession(
+        settings.reader_connection_string, settings.writer_connection_string
+    )
+    api = StacApi(
+        settings=PostgresSettings(),
+        client=AsyncCoreCrudClient(session=session),
+        extensions=[ContextExtension()],
+    )
+    api.app.add_event_handler("shutdown", session.close)
+    # Core endpoints are awaited on the event loop
+    for route in api.app.routes:
+        if f"{list(route.methods)[0]} {route.path}" in STAC_CORE_ROUTES:
+            assert asyncio.iscoroutinefunction(route.endpoint)
+
+    with TestClient(api.app) as test_app:
+        resp = test_app.get("/search", params={"collections": [item.collection]})
+        assert resp.status_code == 200
+        assert resp.json()["context"]["matched"] == 1
+        resp = test_app.get(f"/collections/{item.collection}/items/{item.id}")
+        assert resp.status_code == 200
+        assert resp.json()["id"] == item.id
+
+
 def test_app_transaction_extension(app_client, load_test_data):
     item = load_test_data("test_item.json")
     resp = app_client.post(f"/collections/{item['collection']}/items", json=item)
@@ -108,3 +149,35 @@ def test_app_sort_extension(load_test_data, app_client, postgres_transactions):
     resp_json = resp.json()
     assert resp_json["features"][0]["id"] == first_item["id"]
     assert resp_json["features"][1]["id"] == second_item["id"]
+
+
+def test_read_your_writes(load_test_data, monkeypatch):
+    session = Session(
+        reader_conn_string=[settings.reader_connection_string] * 2,
+        writer_conn_string=settings.writer_connection_string,
+        read_your_writes=True,
+    )
+    api = StacApi(
+        settings=PostgresSettings(),
+        client=CoreCrudClient(session=session),
+        extensions=[TransactionExtension(client=TransactionsClient(session=session))],
+    )
+    api.app.add_middleware(ReadYourWritesMiddleware, window=60)
+
+    collection = load_test_data("test_collection.json")
+    with TestClient(api.app) as client:
+        resp = client.get("/collections")
+        assert resp.status_code == 200
+        assert "stac-last-write" not in resp.cookies
+
+        resp = client.post("/collections", json=collection)
+        assert resp.status_code == 200
+        assert "stac-last-write" in resp.cookies
+
+        # Reads of the client are routed to the writer
+        def choose():
+            raise AssertionError("read routed to a replica")
+
+        monkeypatch.setattr(session.reader, "choose", choose)
+        resp = client.get(f"/collections/{collection['id']}")
+        assert resp.status_code == 200
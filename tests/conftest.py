@@ -7,13 +7,25 @@ from starlette.testclient import TestClient
 
 from stac_api.api.app import StacApi
 from stac_api.api.extensions import (
+    AggregationExtension,
+    BatchSearchExtension,
+    BulkTransactionExtension,
     ContextExtension,
+    DiagnosticsExtension,
+    ExportExtension,
     FieldsExtension,
+    FilterExtension,
+    IngestJobsExtension,
     QueryExtension,
     SortExtension,
     TransactionExtension,
 )
+from stac_api.clients.postgres.aggregation import AggregationClient
+from stac_api.clients.postgres.batch import BatchSearchClient
 from stac_api.clients.postgres.core import CoreCrudClient
+from stac_api.clients.postgres.diagnostics import DiagnosticsClient
+from stac_api.clients.postgres.export import ExportClient
+from stac_api.clients.postgres.jobs import IngestJobsClient
 from stac_api.clients.postgres.session import Session
 from stac_api.clients.postgres.transactions import (
     BulkTransactionsClient,
@@ -106,10 +118,17 @@ def api_client(db_session):
         client=CoreCrudClient(session=db_session),
         extensions=[
             TransactionExtension(client=TransactionsClient(session=db_session)),
+            BulkTransactionExtension(client=BulkTransactionsClient(session=db_session)),
+            IngestJobsExtension(client=IngestJobsClient(session=db_session)),
             ContextExtension(),
             SortExtension(),
             FieldsExtension(),
             QueryExtension(),
+            FilterExtension(),
+            AggregationExtension(client=AggregationClient(session=db_session)),
+            DiagnosticsExtension(client=DiagnosticsClient(session=db_session)),
+            ExportExtension(client=ExportClient(session=db_session)),
+            BatchSearchExtension(client=BatchSearchClient(session=db_session)),
         ],
     )
 
@@ -1,17 +1,20 @@
 from typing import Type
 
+import pytest
 import sqlalchemy as sa
 from starlette.testclient import TestClient
 
 from stac_api.api.app import StacApi
 from stac_api.api.extensions import TransactionExtension
 from stac_api.clients.postgres.core import CoreCrudClient, Session
+from stac_api.clients.postgres.promotion import FieldPromotionClient
 from stac_api.clients.postgres.transactions import TransactionsClient
-from stac_api.config import ApiSettings
+from stac_api.config import ApiSettings, inject_settings
 from stac_api.models.database import Item
 from stac_api.models.schemas import Collection
+from stac_api.models.schemas import Item as ItemSchema
 
-from ..conftest import MockStarletteRequest
+from ..conftest import MockStarletteRequest, settings
 
 
 class CustomItem(Item):
@@ -70,3 +73,87 @@ def test_custom_item(load_test_data, postgres_transactions, db_session):
         db_session.writer.cached_engine.execute(
             "ALTER TABLE data.items DROP COLUMN foo"
         )
+
+
+class PromotedItem(Item):
+    # Mapped to a copy of the items table, promoted columns aren't added to the table of `Item`
+    __table__ = Item.__table__.tometadata(sa.MetaData())
+    __mapper_args__ = {"concrete": True}
+
+
+@pytest.fixture
+def promoted_item(db_session):
+    """Item model used to promote a field, the promoted column is dropped on teardown."""
+    yield PromotedItem
+    inject_settings(settings)
+    db_session.writer.cached_engine.execute(
+        "ALTER TABLE data.items DROP COLUMN IF EXISTS cloud_cover"
+    )
+
+
+def test_promote_field(
+    load_test_data, postgres_transactions, db_session, promoted_item
+):
+    # Ingest an item before the field is promoted
+    coll = Collection.parse_obj(load_test_data("test_collection.json"))
+    postgres_transactions.create_collection(coll, request=MockStarletteRequest)
+    test_item = load_test_data("test_item.json")
+    postgres_transactions.create_item(
+        ItemSchema.parse_obj(test_item), request=MockStarletteRequest
+    )
+
+    promotion = FieldPromotionClient(
+        session=db_session, item_table=promoted_item, batch_size=1, throttle=0
+    )
+    assert promotion.promote("eo:cloud_cover") == 1
+    # Promotion is idempotent
+    assert promotion.promote("eo:cloud_cover") == 0
+
+    # The value is copied, processes without the new settings still read it from the properties
+    with db_session.reader.context_session() as session:
+        row = (
+            session.query(promoted_item)
+            .filter(promoted_item.id == test_item["id"])
+            .one()
+        )
+        assert row.cloud_cover == test_item["properties"]["eo:cloud_cover"]
+        assert (
+            row.properties["eo:cloud_cover"]
+            == test_item["properties"]["eo:cloud_cover"]
+        )
+
+    api = StacApi(
+        settings=ApiSettings(indexed_fields={"datetime", "eo:cloud_cover"}),
+        extensions=[],
+        client=CoreCrudClient(item_table=promoted_item, session=db_session),
+    )
+    with TestClient(api.app) as test_client:
+        assert promotion.strip_properties("eo:cloud_cover") == 1
+
+        # The field is recomposed into the item properties
+        resp = test_client.get(
+            f"/collections/{test_item['collection']}/items/{test_item['id']}"
+        )
+        assert resp.status_code == 200
+        assert (
+            resp.json()["properties"]["eo:cloud_cover"]
+            == test_item["properties"]["eo:cloud_cover"]
+        )
+
+        # Search for the item using the promoted column
+        body = {"query": {"eo:cloud_cover": {"lt": 0}}}
+        resp = test_client.post("/search", json=body)
+        assert resp.status_code == 200
+        assert [feat["id"] for feat in resp.json()["features"]] == [test_item["id"]]
+
+    with db_session.reader.context_session() as session:
+        row = (
+            session.query(promoted_item)
+            .filter(promoted_item.id == test_item["id"])
+            .one()
+        )
+        assert "eo:cloud_cover" not in row.properties
+
+    # Cleanup
+    postgres_transactions.delete_item(test_item["id"], request=MockStarletteRequest)
+    postgres_transactions.delete_collection(coll.id, request=MockStarletteRequest)
@@ -0,0 +1,78 @@
+import uuid
+
+
+def test_aggregate(app_client, load_test_data):
+    """Test POST aggregate (aggregation extension)"""
+    test_item = load_test_data("test_item.json")
+    for idx in range(3):
+        test_item["id"] = str(uuid.uuid4())
+        test_item["properties"]["aidash:feeder_id"] = f"feeder-{idx % 2}"
+        resp = app_client.post(
+            f"/collections/{test_item['collection']}/items", json=test_item
+        )
+        assert resp.status_code == 200
+
+    params = {
+        "collections": [test_item["collection"]],
+        "aggregations": [
+            {"type": "collection"},
+            {"type": "datetime", "interval": "month"},
+            {"type": "terms", "field": "aidash:feeder_id", "name": "feeders"},
+            {"type": "stats", "field": "gsd"},
+            {"type": "grid", "precision": 3},
+        ],
+    }
+    resp = app_client.post("/aggregate", json=params)
+    assert resp.status_code == 200
+    resp_json = resp.json()
+    assert resp_json["matched"] == 3
+    aggregations = {agg["name"]: agg for agg in resp_json["aggregations"]}
+
+    assert aggregations["collection"]["buckets"] == [
+        {"key": test_item["collection"], "count": 3}
+    ]
+    assert aggregations["datetime"]["buckets"] == [
+        {"key": "2020-02-01T00:00:00", "count": 3}
+    ]
+    assert aggregations["feeders"]["buckets"] == [
+        {"key": "feeder-0", "count": 2},
+        {"key": "feeder-1", "count": 1},
+    ]
+    assert aggregations["stats"]["stats"] == {
+        "count": 3,
+        "min": 15,
+        "max": 15,
+        "avg": 15,
+        "sum": 45,
+    }
+    assert aggregations["grid"]["buckets"] == [{"key": "r65", "count": 3}]
+
+
+def test_aggregate_filtered(app_client, load_test_data):
+    """Test POST aggregate only aggregates items matched by the search (aggregation extension)"""
+    test_item = load_test_data("test_item.json")
+    resp = app_client.post(
+        f"/collections/{test_item['collection']}/items", json=test_item
+    )
+    assert resp.status_code == 200
+
+    params = {
+        "query": {"gsd": {"gt": 20}},
+        "aggregations": [{"type": "collection"}],
+    }
+    resp = app_client.post("/aggregate", json=params)
+    assert resp.status_code == 200
+    assert resp.json()["matched"] == 0
+    assert resp.json()["aggregations"][0]["buckets"] == []
+
+
+def test_aggregate_invalid(app_client):
+    """Test POST aggregate validation (aggregation extension)"""
+    for aggregations in [
+        [],
+        [{"type": "terms"}],
+        [{"type": "stats", "field": "aidash:feeder_id"}],
+        [{"type": "grid", "precision": 13}],
+    ]:
+        resp = app_client.post("/aggregate", json={"aggregations": aggregations})
+        assert resp.status_code == 422
@@ -0,0 +1,81 @@
+def test_batch_search(app_client, load_test_data):
+    """Test POST search batch (batch search extension)"""
+    test_item = load_test_data("test_item.json")
+    for idx in range(4):
+        test_item["id"] = f"batch-{idx}"
+        test_item["properties"]["gsd"] = idx
+        resp = app_client.post(
+            f"/collections/{test_item['collection']}/items", json=test_item
+        )
+        assert resp.status_code == 200
+
+    searches = [
+        {"ids": ["batch-1", "batch-3"]},
+        {
+            "collections": [test_item["collection"]],
+            "sortby": [{"field": "gsd", "direction": "desc"}],
+            "limit": 2,
+        },
+        {"collections": [test_item["collection"]], "precision": 2, "limit": 1},
+        {"collections": ["invalid-collection"]},
+    ]
+    resp = app_client.post("/search/batch", json=searches)
+    assert resp.status_code == 200
+    results = resp.json()
+    assert len(results) == len(searches)
+
+    assert {feat["id"] for feat in results[0]["features"]} == {"batch-1", "batch-3"}
+    assert results[0]["context"]["matched"] == 2
+
+    assert [feat["id"] for feat in results[1]["features"]] == ["batch-3", "batch-2"]
+    assert results[1]["context"]["matched"] == 4
+    next_link = next(link for link in results[1]["links"] if link["rel"] == "next")
+
+    assert len(results[2]["features"]) == 1
+    ring = results[2]["features"][0]["geometry"]["coordinates"][0]
+    assert all(round(v, 2) == v for point in ring for v in point)
+
+    assert results[3]["features"] == []
+    assert results[3]["context"]["matched"] == 0
+
+    # Pagination tokens are honoured per search
+    searches[1]["token"] = next_link["body"]["token"]
+    resp = app_client.post("/search/batch", json=searches[1:2])
+    assert resp.status_code == 200
+    assert [feat["id"] for feat in resp.json()[0]["features"]] == [
+        "batch-1",
+        "batch-0",
+    ]
+
+
+def test_batch_search_too_large(app_client):
+    """Test rejecting batches larger than the configured maximum"""
+    resp = app_client.post("/search/batch", json=[{"limit": 1}] * 101)
+    assert resp.status_code == 400
+
+
+def test_get_items_by_ids(app_client, load_test_data):
+    """Test POST search ids (batch search extension)"""
+    test_item = load_test_data("test_item.json")
+    for idx in range(3):
+        test_item["id"] = f"by-id-{idx}"
+        resp = app_client.post(
+            f"/collections/{test_item['collection']}/items", json=test_item
+        )
+        assert resp.status_code == 200
+
+    ids = ["by-id-2", "unknown", "by-id-0", "by-id-2", "by-id-1"]
+    resp = app_client.post("/search/ids", json={"ids": ids, "precision": 1})
+    assert resp.status_code == 200
+    resp_json = resp.json()
+    assert [feat["id"] for feat in resp_json["features"]] == [
+        "by-id-2",
+        "by-id-0",
+        "by-id-1",
+    ]
+    assert resp_json["missing"] == ["unknown"]
+    ring = resp_json["features"][0]["geometry"]["coordinates"][0]
+    assert all(round(v, 1) == v for point in ring for v in point)
+
+    resp = app_client.post("/search/ids", json={"ids": []})
+    assert resp.status_code == 422
@@ -1,3 +1,6 @@
+from stac_api.clients.postgres.extents import CollectionExtentsClient
+
+
 def test_create_and_delete_collection(app_client, load_test_data):
     """Test creation and deletion of a collection"""
     test_collection = load_test_data("test_collection.json")
@@ -50,3 +53,50 @@ def test_collection_not_found(app_client):
     """Test read a collection which does not exist"""
     resp = app_client.get("/collections/does-not-exist")
     assert resp.status_code == 404
+
+
+def test_collection_extent_maintained(app_client, load_test_data, db_session):
+    """Test the extent and summaries of a collection follow its items"""
+    extents = CollectionExtentsClient(session=db_session)
+    extents.merge()
+    test_item = load_test_data("test_item.json")
+    collection_id = test_item["collection"]
+    for (idx, (dt, gsd)) in enumerate(
+        [("2020-02-12T12:30:22Z", 15), ("2021-06-01T00:00:00Z", 60)]
+    ):
+        test_item["id"] = f"extent-{idx}"
+        test_item["properties"]["datetime"] = dt
+        test_item["properties"]["gsd"] = gsd
+        resp = app_client.post(f"/collections/{collection_id}/items", json=test_item)
+        assert resp.status_code == 200
+
+    # Writes only queue their aggregates, collections are updated by the next merge
+    resp = app_client.get(f"/collections/{collection_id}")
+    assert resp.json()["summaries"]["gsd"] == [30]
+    assert extents.merge() == 1
+
+    resp = app_client.get(f"/collections/{collection_id}")
+    assert resp.status_code == 200
+    resp_json = resp.json()
+    xs = [x for (x, _) in test_item["geometry"]["coordinates"][0]]
+    ys = [y for (_, y) in test_item["geometry"]["coordinates"][0]]
+    assert resp_json["extent"]["spatial"]["bbox"] == [
+        [min(xs), min(ys), max(xs), max(ys)]
+    ]
+    assert resp_json["extent"]["temporal"]["interval"] == [
+        ["2020-02-12T12:30:22Z", "2021-06-01T00:00:00Z"]
+    ]
+    assert resp_json["summaries"]["gsd"] == {"min": 15, "max": 60}
+    # Summaries which aren't maintained are kept
+    assert resp_json["summaries"]["platform"] == ["landsat-8"]
+
+    resp = app_client.delete(f"/collections/{collection_id}/items/extent-1")
+    assert resp.status_code == 200
+    assert extents.merge() == 1
+
+    resp = app_client.get(f"/collections/{collection_id}")
+    resp_json = resp.json()
+    assert resp_json["extent"]["temporal"]["interval"] == [
+        ["2020-02-12T12:30:22Z", "2020-02-12T12:30:22Z"]
+    ]
+    assert resp_json["summaries"]["gsd"] == {"min": 15, "max": 15}
@@ -0,0 +1,47 @@
+from stac_api import config
+
+
+def test_explain_search(app_client, load_test_data, monkeypatch):
+    """Test POST search explain (diagnostics extension)"""
+    monkeypatch.setattr(config.settings, "admin_api_key", "test-key")
+    test_item = load_test_data("test_item.json")
+    params = {
+        "collections": [test_item["collection"]],
+        "query": {"gsd": {"eq": 15}},
+        "limit": 5,
+    }
+    resp = app_client.post(
+        "/search/explain", json=params, headers={"X-API-Key": "test-key"}
+    )
+    assert resp.status_code == 200
+    resp_json = resp.json()
+    assert "FROM data.items" in resp_json["sql"]
+    assert test_item["collection"] in resp_json["parameters"].values()
+    assert 6 in resp_json["parameters"].values()
+    # EXPLAIN ANALYZE output
+    assert "Actual Total Time" in resp_json["plan"][0]["Plan"]
+
+
+def test_explain_search_forbidden(app_client, monkeypatch):
+    """Test POST search explain requires the admin api key (diagnostics extension)"""
+    resp = app_client.post("/search/explain", json={})
+    assert resp.status_code == 403
+
+    monkeypatch.setattr(config.settings, "admin_api_key", "test-key")
+    resp = app_client.post("/search/explain", json={}, headers={"X-API-Key": "bad"})
+    assert resp.status_code == 403
+
+
+def test_pool_status(app_client, monkeypatch):
+    """Test GET connection pool metrics (diagnostics extension)"""
+    monkeypatch.setattr(config.settings, "admin_api_key", "test-key")
+    assert app_client.get("/diagnostics/pools").status_code == 403
+
+    app_client.get("/search")
+    resp = app_client.get("/diagnostics/pools", headers={"X-API-Key": "test-key"})
+    assert resp.status_code == 200
+    pools = {pool["role"]: pool for pool in resp.json()}
+    assert set(pools) == {"reader", "writer"}
+    assert pools["reader"]["checkouts"] >= 1
+    assert pools["reader"]["checked_out"] == 0
+    assert pools["reader"]["timeouts"] == 0
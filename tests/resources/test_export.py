@@ -0,0 +1,54 @@
+import json
+import uuid
+
+
+def test_export_collection(app_client, load_test_data):
+    """Test GET collection export (export extension)"""
+    test_item = load_test_data("test_item.json")
+    ids = set()
+    for _ in range(5):
+        test_item["id"] = str(uuid.uuid4())
+        ids.add(test_item["id"])
+        resp = app_client.post(
+            f"/collections/{test_item['collection']}/items", json=test_item
+        )
+        assert resp.status_code == 200
+
+    resp = app_client.get(f"/collections/{test_item['collection']}/export")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    items = [json.loads(line) for line in resp.text.splitlines()]
+    assert {item["id"] for item in items} == ids
+    assert all(item["collection"] == test_item["collection"] for item in items)
+
+
+def test_export_missing_collection(app_client):
+    """Test exporting a collection which does not exist"""
+    resp = app_client.get("/collections/invalid-collection/export")
+    assert resp.status_code == 404
+
+
+def test_export_search(app_client, load_test_data):
+    """Test POST search export (export extension)"""
+    test_item = load_test_data("test_item.json")
+    for idx in range(4):
+        test_item["id"] = f"export-{idx}"
+        test_item["properties"]["gsd"] = idx
+        resp = app_client.post(
+            f"/collections/{test_item['collection']}/items", json=test_item
+        )
+        assert resp.status_code == 200
+
+    params = {
+        "collections": [test_item["collection"]],
+        "query": {"gsd": {"ge": 2}},
+        "sortby": [{"field": "gsd", "direction": "desc"}],
+        "limit": 1,
+    }
+    resp = app_client.post("/search/export", json=params)
+    assert resp.status_code == 200
+    ids = [json.loads(line)["id"] for line in resp.text.splitlines()]
+    assert ids == ["export-3", "export-2"]
+
+    resp = app_client.post("/search/export", json={"filter": "gsd ="})
+    assert resp.status_code == 400
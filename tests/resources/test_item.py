@@ -6,9 +6,11 @@ from datetime import datetime, timedelta
 from random import randint
 from urllib.parse import parse_qs, urlparse, urlsplit
 
-from shapely.geometry import Polygon
+from shapely.geometry import Polygon, mapping, shape
 from stac_pydantic.api.search import DATETIME_RFC339
 
+from stac_api import config
+
 
 def test_create_and_delete_item(app_client, load_test_data):
     """Test creation and deletion of a single item (transactions extension)"""
@@ -496,6 +498,254 @@ def test_item_search_get_query_extension(app_client, load_test_data):
     )
 
 
+def test_item_search_query_eq_string(app_client, load_test_data):
+    """Test POST search with JSONB equality on a string field (query extension)"""
+    test_item = load_test_data("test_item.json")
+    test_item["properties"]["aidash:feeder_id"] = "feeder-1"
+    resp = app_client.post(
+        f"/collections/{test_item['collection']}/items", json=test_item
+    )
+    assert resp.status_code == 200
+
+    params = {"query": {"aidash:feeder_id": {"eq": "feeder-1"}}}
+    resp = app_client.post("/search", json=params)
+    assert [feat["id"] for feat in resp.json()["features"]] == [test_item["id"]]
+
+    params = {"query": {"aidash:feeder_id": {"ne": "feeder-1"}}}
+    resp = app_client.post("/search", json=params)
+    assert len(resp.json()["features"]) == 0
+
+
+def test_item_search_query_in(app_client, load_test_data):
+    """Test POST search with the `in` operator (query extension)"""
+    test_item = load_test_data("test_item.json")
+    resp = app_client.post(
+        f"/collections/{test_item['collection']}/items", json=test_item
+    )
+    assert resp.status_code == 200
+
+    epsg = test_item["properties"]["proj:epsg"]
+    params = {"query": {"proj:epsg": {"in": [epsg, epsg + 1]}}}
+    resp = app_client.post("/search", json=params)
+    assert resp.status_code == 200
+    assert [feat["id"] for feat in resp.json()["features"]] == [test_item["id"]]
+
+    params = {"query": {"proj:epsg": {"in": [epsg + 1]}}}
+    resp = app_client.post("/search", json=params)
+    assert len(resp.json()["features"]) == 0
+
+    params = {"query": {"proj:epsg": {"in": epsg}}}
+    resp = app_client.post("/search", json=params)
+    assert resp.status_code == 400
+
+
+def test_item_search_query_string_operators(app_client, load_test_data):
+    """Test POST search with string operators (query extension)"""
+    test_item = load_test_data("test_item.json")
+    test_item["properties"]["aidash:feeder_id"] = "feeder_100%"
+    resp = app_client.post(
+        f"/collections/{test_item['collection']}/items", json=test_item
+    )
+    assert resp.status_code == 200
+
+    for (op, value, matched) in [
+        ("startsWith", "feeder_", 1),
+        ("startsWith", "feederX", 0),
+        ("endsWith", "100%", 1),
+        ("endsWith", "200%", 0),
+        ("contains", "der_1", 1),
+        ("contains", "_2", 0),
+    ]:
+        params = {"query": {"aidash:feeder_id": {op: value}}}
+        resp = app_client.post("/search", json=params)
+        assert resp.status_code == 200
+        assert len(resp.json()["features"]) == matched
+
+    # String operators are only supported by text queryables
+    params = {"query": {"gsd": {"contains": "1"}}}
+    resp = app_client.post("/search", json=params)
+    assert resp.status_code == 400
+
+
+def test_item_search_intersects_large_polygon(app_client, load_test_data):
+    """Test POST search with a geometry which is subdivided before the intersection test (core)"""
+    test_item = load_test_data("test_item.json")
+    resp = app_client.post(
+        f"/collections/{test_item['collection']}/items", json=test_item
+    )
+    assert resp.status_code == 200
+
+    item_geom = shape(test_item["geometry"])
+    # Circles with 4000 vertices, the annulus bounding box contains the item but the item is inside the hole
+    circle = item_geom.centroid.buffer(5, resolution=1000)
+    annulus = item_geom.centroid.buffer(10, resolution=1000).difference(circle)
+    for (geom, matched) in [(circle, 1), (annulus, 0)]:
+        params = {
+            "collections": [test_item["collection"]],
+            "intersects": mapping(geom),
+        }
+        resp = app_client.post("/search", json=params)
+        assert resp.status_code == 200
+        assert len(resp.json()["features"]) == matched
+
+
+def test_item_geometry_simplify_precision(app_client, load_test_data):
+    """Test simplified and quantized output geometries (core)"""
+    test_item = load_test_data("test_item.json")
+    resp = app_client.post(
+        f"/collections/{test_item['collection']}/items", json=test_item
+    )
+    assert resp.status_code == 200
+
+    def coordinates(feature):
+        return [tuple(c) for c in feature["geometry"]["coordinates"][0]]
+
+    resp = app_client.get(
+        f"/collections/{test_item['collection']}/items/{test_item['id']}",
+        params={"precision": 2},
+    )
+    assert resp.status_code == 200
+    expected = [(round(x, 2), round(y, 2)) for (x, y) in coordinates(test_item)]
+    assert coordinates(resp.json()) == expected
+
+    params = {"ids": [test_item["id"]], "simplify": 0.5, "precision": 1}
+    resp = app_client.post("/search", json=params)
+    assert resp.status_code == 200
+    feature = resp.json()["features"][0]
+    assert len(coordinates(feature)) <= len(coordinates(test_item))
+    assert all(round(v, 1) == v for c in coordinates(feature) for v in c)
+
+    resp = app_client.get("/search", params={"ids": test_item["id"], "precision": 1})
+    assert resp.status_code == 200
+    assert coordinates(resp.json()["features"][0])[0] == (152.2, -33.8)
+
+    resp = app_client.get("/search", params={"precision": -1})
+    assert resp.status_code == 422
+
+
+def test_item_search_filter_text(app_client, load_test_data):
+    """Test POST search with a CQL2-text filter (filter extension)"""
+    test_item = load_test_data("test_item.json")
+    resp = app_client.post(
+        f"/collections/{test_item['collection']}/items", json=test_item
+    )
+    assert resp.status_code == 200
+
+    for (expression, matched) in [
+        (f"collection = '{test_item['collection']}' AND gsd = 15", 1),
+        ("gsd = 15 AND NOT eo:cloud_cover > 0", 1),
+        ("gsd > 20 OR landsat:row IN ('160', '161')", 1),
+        (
+            "datetime BETWEEN TIMESTAMP('2020-02-01T00:00:00Z') AND TIMESTAMP('2020-03-01T00:00:00Z')",
+            1,
+        ),
+        ("T_BEFORE(datetime, TIMESTAMP('2020-01-01T00:00:00Z'))", 0),
+        ("S_INTERSECTS(geometry, BBOX(152, -34, 153, -33)) AND gsd <> 15", 0),
+    ]:
+        params = {"filter": expression, "filter-lang": "cql2-text"}
+        resp = app_client.post("/search", json=params)
+        assert resp.status_code == 200
+        assert len(resp.json()["features"]) == matched
+
+    for expression in [
+        "gsd = ",
+        "T_EQUALS(datetime, INTERVAL('..', '..'))",
+        "S_INTERSECTS(geometry, BBOX(1, 2, 3))",
+        "T_BEFORE(datetime, TIMESTAMP(5))",
+    ]:
+        params = {"filter": expression, "filter-lang": "cql2-text"}
+        resp = app_client.post("/search", json=params)
+        assert resp.status_code == 400
+
+
+def test_item_search_filter_json(app_client, load_test_data):
+    """Test POST and GET search with a CQL2-JSON filter (filter extension)"""
+    test_item = load_test_data("test_item.json")
+    resp = app_client.post(
+        f"/collections/{test_item['collection']}/items", json=test_item
+    )
+    assert resp.status_code == 200
+
+    cql = {
+        "op": "and",
+        "args": [
+            {"op": "=", "args": [{"property": "id"}, test_item["id"]]},
+            {"op": "<", "args": [{"property": "eo:cloud_cover"}, 10]},
+        ],
+    }
+    resp = app_client.post("/search", json={"filter": cql, "filter-lang": "cql2-json"})
+    assert resp.status_code == 200
+    assert resp.json()["features"][0]["id"] == test_item["id"]
+
+    params = {"filter": json.dumps(cql), "filter-lang": "cql2-json"}
+    resp = app_client.get("/search", params=params)
+    assert resp.status_code == 200
+    assert resp.json()["features"][0]["id"] == test_item["id"]
+
+    params = {"filter": json.dumps(cql)[:-1], "filter-lang": "cql2-json"}
+    resp = app_client.get("/search", params=params)
+    assert resp.status_code == 400
+
+    for cql in [
+        {"interval": ["2020-01-01"]},
+        {"bbox": [1, 2, 3]},
+        {"op": 5},
+        {"timestamp": 5},
+    ]:
+        resp = app_client.post(
+            "/search", json={"filter": cql, "filter-lang": "cql2-json"}
+        )
+        assert resp.status_code == 400
+
+
+def test_item_search_filter_strict_mode(app_client, load_test_data, monkeypatch):
+    """Test filters which can't be served by an index are rejected in strict mode"""
+    monkeypatch.setattr(config.settings, "filter_strict_mode", True)
+    test_item = load_test_data("test_item.json")
+    resp = app_client.post(
+        f"/collections/{test_item['collection']}/items", json=test_item
+    )
+    assert resp.status_code == 200
+
+    resp = app_client.get("/search", params={"filter": "NOT gsd = 15"})
+    assert resp.status_code == 400
+
+    resp = app_client.get(
+        "/search", params={"filter": "gsd = 15 AND NOT eo:cloud_cover > 0"}
+    )
+    assert resp.status_code == 200
+    assert len(resp.json()["features"]) == 1
+
+
+def test_item_search_admission_control(app_client, load_test_data, monkeypatch):
+    """Test searches exceeding the cost budget are rejected with suggestions"""
+    test_item = load_test_data("test_item.json")
+    resp = app_client.post(
+        f"/collections/{test_item['collection']}/items", json=test_item
+    )
+    assert resp.status_code == 200
+
+    monkeypatch.setattr(config.settings, "search_max_cost", 0)
+    resp = app_client.post(
+        "/search", json={"sortby": [{"field": "gsd", "direction": "asc"}]}
+    )
+    assert resp.status_code == 422
+    resp_json = resp.json()
+    assert resp_json["estimates"]["cost"] > 0
+    assert any("collections" in s for s in resp_json["suggestions"])
+    assert any("gsd" in s for s in resp_json["suggestions"])
+
+    # Searches over the count budget are served without the exact count
+    monkeypatch.setattr(config.settings, "search_max_cost", None)
+    monkeypatch.setattr(config.settings, "search_max_count_rows", 0)
+    monkeypatch.setattr(config.settings, "search_statement_timeout", 5000)
+    resp = app_client.post("/search", json={"collections": [test_item["collection"]]})
+    assert resp.status_code == 200
+    resp_json = resp.json()
+    assert resp_json["context"]["matched"] is None
+    assert resp_json["context"]["returned"] == 1
+
+
 def test_get_missing_item_collection(app_client):
     """Test reading a collection which does not exist"""
     resp = app_client.get("/collections/invalid-collection/items")
@@ -579,6 +829,70 @@ def test_pagination_post(app_client, load_test_data):
     # Confirm we have paginated through all items
     assert not set(item_ids) - set(ids)
 
+    # Searches by ids are sorted by id
+    assert item_ids == sorted(ids)
+
+
+def test_pagination_sorted_previous(app_client, load_test_data):
+    """Test paginating a sorted search forwards and backwards (paging extension)"""
+    test_item = load_test_data("test_item.json")
+    for idx in range(7):
+        item = deepcopy(test_item)
+        item["id"] = f"sorted-{idx}"
+        # Items missing the sort field (null keys) sort last in ascending order
+        if idx < 5:
+            item["properties"]["eo:cloud_cover"] = idx % 3
+        else:
+            item["properties"].pop("eo:cloud_cover", None)
+        resp = app_client.post(f"/collections/{item['collection']}/items", json=item)
+        assert resp.status_code == 200
+
+    request_body = {
+        "collections": [test_item["collection"]],
+        "sortby": [
+            {"field": "eo:cloud_cover", "direction": "asc"},
+            {"field": "datetime", "direction": "desc"},
+        ],
+        "limit": 2,
+    }
+    pages = []
+    page_data = app_client.post("/search", json=request_body).json()
+    while True:
+        pages.append([feature["id"] for feature in page_data["features"]])
+        links = {link["rel"]: link for link in page_data["links"]}
+        assert ("previous" in links) == (len(pages) > 1)
+        if "next" not in links:
+            break
+        page_data = app_client.post(
+            "/search", json={**request_body, **links["next"]["body"]}
+        ).json()
+
+    ids = [item_id for page in pages for item_id in page]
+    assert ids == [
+        "sorted-3",
+        "sorted-0",
+        "sorted-4",
+        "sorted-1",
+        "sorted-2",
+        "sorted-6",
+        "sorted-5",
+    ]
+
+    # Walk back to the first page
+    for expected in reversed(pages[:-1]):
+        links = {link["rel"]: link for link in page_data["links"]}
+        page_data = app_client.post(
+            "/search", json={**request_body, **links["previous"]["body"]}
+        ).json()
+        assert [feature["id"] for feature in page_data["features"]] == expected
+    assert "previous" not in {link["rel"] for link in page_data["links"]}
+
+
+def test_pagination_invalid_token(app_client):
+    """Test searching with a malformed pagination token"""
+    resp = app_client.post("/search", json={"token": "not-a-token!"})
+    assert resp.status_code == 400
+
 
 def test_pagination_token_idempotent(app_client, load_test_data):
     """Test that pagination tokens are idempotent (paging extension)"""
@@ -709,3 +1023,85 @@ def test_search_invalid_query_field(app_client):
     body = {"query": {"gsd": {"lt": 100}, "invalid-field": {"eq": 50}}}
     resp = app_client.post("/search", json=body)
     assert resp.status_code == 422
+
+
+def test_bulk_items_stream(app_client, load_test_data):
+    """Test streaming newline-delimited items (bulk transaction extension)"""
+    test_item = load_test_data("test_item.json")
+    lines = []
+    for idx in range(5):
+        test_item["id"] = f"stream-{idx}"
+        lines.append(json.dumps(test_item))
+    lines.insert(2, "not json")
+    body = "\n".join(lines) + "\n"
+
+    def chunks():
+        # Split lines across network chunks
+        for start in range(0, len(body), 1000):
+            yield body[start : start + 1000].encode()
+
+    resp = app_client.put(
+        f"/collections/{test_item['collection']}/bulk_items/stream",
+        data=chunks(),
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert resp.status_code == 200
+    resp_json = resp.json()
+    assert resp_json["inserted"] == 5
+    assert resp_json["rejected"] == 1
+    assert resp_json["items"][0]["reason"].startswith("line 3:")
+
+    resp = app_client.get(f"/collections/{test_item['collection']}/items/stream-4")
+    assert resp.status_code == 200
+
+    # Re-sent items are left untouched
+    resp = app_client.put(
+        f"/collections/{test_item['collection']}/bulk_items/stream",
+        data=body.encode(),
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert resp.json()["unchanged"] == 5
+
+
+def test_bulk_items_job(app_client, load_test_data):
+    """Test background ingest jobs (ingest jobs extension)"""
+    test_item = load_test_data("test_item.json")
+    lines = []
+    for idx in range(5):
+        test_item["id"] = f"job-{idx}"
+        lines.append(json.dumps(test_item))
+    lines.insert(2, "not json")
+    body = "\n".join(lines) + "\n"
+
+    resp = app_client.post(
+        f"/collections/{test_item['collection']}/bulk_items/jobs",
+        data=body.encode(),
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert resp.status_code == 202
+    job = resp.json()
+    assert job["total"] == 6
+
+    for _ in range(100):
+        job = app_client.get(f"/jobs/{job['id']}").json()
+        if job["status"] in ("succeeded", "failed"):
+            break
+        time.sleep(0.1)
+    assert job["status"] == "succeeded"
+    assert job["processed"] == 6
+    assert job["inserted"] == 5
+    assert job["rejected"] == 1
+    assert job["errors"][0]["reason"].startswith("line 3:")
+
+    resp = app_client.get(f"/collections/{test_item['collection']}/items/job-4")
+    assert resp.status_code == 200
+
+    resp = app_client.get("/jobs/missing")
+    assert resp.status_code == 404
+
+    # Finished jobs can't be cancelled
+    resp = app_client.delete(f"/jobs/{job['id']}")
+    assert resp.status_code == 409
+
+    resp = app_client.delete("/jobs/missing")
+    assert resp.status_code == 404
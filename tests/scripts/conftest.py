@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cleanup():
+    """Script tests run against fake targets, there is nothing to clean up."""
+    yield
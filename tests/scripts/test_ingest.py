@@ -0,0 +1,96 @@
+import json
+from typing import Dict, List
+
+import pytest
+
+from scripts import ingest
+
+
+class FakeTarget:
+    """Record the writes of an ingest, failing the batches of `failing` items."""
+
+    def __init__(self, failing: List[str] = None, unavailable: int = 0):
+        self.failing = set(failing or [])
+        self.unavailable = unavailable
+        self.collections: List[str] = []
+        self.batches: List[List[str]] = []
+
+    def create_collection(self, collection: Dict) -> None:
+        self.collections.append(collection["id"])
+
+    def upsert_items(self, collection_id: str, items: List[Dict]) -> Dict:
+        if self.unavailable:
+            self.unavailable -= 1
+            raise ingest.RetryableError("database unavailable")
+        ids = [item["id"] for item in items]
+        if self.failing & set(ids):
+            raise ValueError("batch failed")
+        self.batches.append(ids)
+        return {"inserted": len(items), "items": []}
+
+
+@pytest.fixture
+def source(tmp_path, load_test_data) -> str:
+    collection = load_test_data("test_collection.json")
+    item = load_test_data("test_item.json")
+    lines = [json.dumps(collection)]
+    for idx in range(5):
+        lines.append(json.dumps(dict(item, id=f"item-{idx}")))
+        if idx == 1:
+            lines.extend(["", '{"id": "truncated', "[]"])
+    path = tmp_path / "items.ndjson"
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_ingest_batches(source):
+    target = FakeTarget()
+    progress = ingest.ingest([source], target, workers=1, batch_size=2)
+    assert target.collections == ["test-collection"]
+    assert target.batches == [
+        ["item-0", "item-1"],
+        ["item-2", "item-3"],
+        ["item-4"],
+    ]
+    # Malformed lines are rejected, the ingest goes on
+    assert progress.counts["inserted"] == 5
+    assert progress.counts["rejected"] == 2
+    assert progress.failed == 0
+
+
+def test_ingest_checkpoint(source, tmp_path):
+    checkpoint = str(tmp_path / "ingest.ckpt")
+    target = FakeTarget(failing=["item-2"])
+    progress = ingest.ingest(
+        [source], target, workers=1, batch_size=2, checkpoint=checkpoint
+    )
+    assert target.batches == [["item-0", "item-1"], ["item-4"]]
+    assert progress.failed == 1
+
+    # A resumed ingest only sends the batches which didn't complete
+    target = FakeTarget()
+    progress = ingest.ingest(
+        [source], target, workers=1, batch_size=2, checkpoint=checkpoint
+    )
+    assert target.batches == [["item-2", "item-3"]]
+    assert progress.skipped == 3
+    assert progress.failed == 0
+
+
+def test_ingest_backoff(source, monkeypatch):
+    delays: List[float] = []
+    monkeypatch.setattr(ingest.time, "sleep", delays.append)
+
+    target = FakeTarget(unavailable=2)
+    progress = ingest.ingest([source], target, workers=1, batch_size=5, retries=2)
+    assert target.batches == [["item-0", "item-1", "item-2", "item-3", "item-4"]]
+    assert progress.failed == 0
+    # Delays double on each attempt, with up to 100% jitter
+    assert len(delays) == 2
+    assert 1 <= delays[0] <= 2
+    assert 2 <= delays[1] <= 4
+
+    target = FakeTarget(unavailable=3)
+    progress = ingest.ingest([source], target, workers=1, batch_size=5, retries=2)
+    assert target.batches == []
+    assert progress.failed == 1